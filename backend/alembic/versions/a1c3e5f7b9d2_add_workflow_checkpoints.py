@@ -0,0 +1,55 @@
+"""add_workflow_checkpoints
+
+Revision ID: a1c3e5f7b9d2
+Revises: refactor_presets_json_001
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3e5f7b9d2'
+down_revision: Union[str, Sequence[str], None] = 'refactor_presets_json_001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'workflow_checkpoints',
+        sa.Column('run_id', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+        sa.Column('workflow', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+        sa.Column('user_id', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True),
+        sa.Column('stage', sqlmodel.sql.sqltypes.AutoString(length=32), nullable=False),
+        sa.Column('request', sa.JSON(), nullable=False),
+        sa.Column('analysis_raw', sa.Text(), nullable=True),
+        sa.Column('analysis', sa.JSON(), nullable=True),
+        sa.Column('answers', sa.JSON(), nullable=True),
+        sa.Column('final_raw', sa.Text(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('owner', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('run_id'),
+    )
+    op.create_index(op.f('ix_workflow_checkpoints_stage'), 'workflow_checkpoints', ['stage'], unique=False)
+    op.create_index(
+        op.f('ix_workflow_checkpoints_lease_expires_at'),
+        'workflow_checkpoints',
+        ['lease_expires_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_workflow_checkpoints_lease_expires_at'), table_name='workflow_checkpoints')
+    op.drop_index(op.f('ix_workflow_checkpoints_stage'), table_name='workflow_checkpoints')
+    op.drop_table('workflow_checkpoints')
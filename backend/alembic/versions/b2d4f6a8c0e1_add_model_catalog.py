@@ -0,0 +1,57 @@
+"""add_model_catalog
+
+Revision ID: b2d4f6a8c0e1
+Revises: a1c3e5f7b9d2
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d4f6a8c0e1'
+down_revision: Union[str, Sequence[str], None] = 'a1c3e5f7b9d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'model_catalog',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('provider', sa.String(), nullable=False),
+        sa.Column('source', sqlmodel.sql.sqltypes.AutoString(length=512), nullable=False),
+        sa.Column('model_id', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+        sa.Column('name', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+        sa.Column('model_type', sa.String(), nullable=False),
+        sa.Column('context_length', sa.Integer(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('supported_parameters', sa.JSON(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('provider', 'source', 'model_id', name='uq_model_catalog_model'),
+    )
+    op.create_index(
+        'ix_model_catalog_listing',
+        'model_catalog',
+        ['provider', 'source', 'model_type', 'name'],
+        unique=False,
+    )
+    op.create_table(
+        'model_catalog_sources',
+        sa.Column('provider', sa.String(), nullable=False),
+        sa.Column('source', sqlmodel.sql.sqltypes.AutoString(length=512), nullable=False),
+        sa.Column('etag', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('provider', 'source'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('model_catalog_sources')
+    op.drop_index('ix_model_catalog_listing', table_name='model_catalog')
+    op.drop_table('model_catalog')
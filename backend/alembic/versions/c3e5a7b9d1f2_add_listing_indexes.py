@@ -0,0 +1,60 @@
+"""add_listing_indexes
+
+Revision ID: c3e5a7b9d1f2
+Revises: b2d4f6a8c0e1
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e5a7b9d1f2'
+down_revision: Union[str, Sequence[str], None] = 'b2d4f6a8c0e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Composite indexes matching the list queries (filter by user, ordered by time);
+    # the partial ones only cover the rows their query selects (SQLite / Postgres).
+    op.create_index(
+        'ix_stories_user_updated', 'stories', ['user_id', 'updated_at'], unique=False
+    )
+    op.create_index(
+        'ix_stories_user_active_updated',
+        'stories',
+        ['user_id', 'updated_at'],
+        unique=False,
+        sqlite_where=sa.text('is_active = 1'),
+        postgresql_where=sa.text('is_active'),
+    )
+    op.create_index(
+        'ix_config_presets_user_created',
+        'config_presets',
+        ['user_id', 'created_at'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_config_presets_user_default',
+        'config_presets',
+        ['user_id'],
+        unique=False,
+        sqlite_where=sa.text('is_default = 1'),
+        postgresql_where=sa.text('is_default'),
+    )
+    op.create_index(
+        'ix_tokens_user_created', 'tokens', ['user_id', 'created_at'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tokens_user_created', table_name='tokens')
+    op.drop_index('ix_config_presets_user_default', table_name='config_presets')
+    op.drop_index('ix_config_presets_user_created', table_name='config_presets')
+    op.drop_index('ix_stories_user_active_updated', table_name='stories')
+    op.drop_index('ix_stories_user_updated', table_name='stories')
@@ -0,0 +1,18 @@
+"""
+Database diagnostics endpoints.
+"""
+
+from typing import List
+
+from fastapi import APIRouter
+
+from app.core import sql_metrics
+from app.schemas.db import RouteQueryStats
+
+router = APIRouter(prefix="/db", tags=["db"])
+
+
+@router.get("/query-stats", response_model=List[RouteQueryStats])
+def get_query_stats():
+    """SQL statements, database time and N+1 suspects per route since startup."""
+    return sql_metrics.route_stats()
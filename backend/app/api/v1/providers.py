@@ -4,10 +4,16 @@ Provider API endpoints.
 
 from typing import List
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Header, Query, Response, status
 
 from app.models.provider import ModelType, ProviderType
-from app.schemas.provider import ProviderInfo, ProviderModelsResponse
+from app.schemas.provider import (
+    HttpPoolStats,
+    ModelDiscoveryResponse,
+    ModelsCacheStats,
+    ProviderInfo,
+    ProviderModelsResponse,
+)
 from app.services import providers as provider_service
 
 router = APIRouter(prefix="/providers", tags=["providers"])
@@ -19,6 +25,30 @@ def list_providers():
     return provider_service.get_providers()
 
 
+@router.get("/http-pools", response_model=List[HttpPoolStats])
+def get_http_pools():
+    """Connection pool utilization of the shared outbound HTTP clients."""
+    return provider_service.get_http_pool_stats()
+
+
+@router.get("/models", response_model=ModelDiscoveryResponse)
+async def discover_models(
+    model_type: ModelType | None = Query(default=None, description="Filter by model type"),
+    x_user_id: str | None = Header(default=None, description="Include the user's custom endpoints"),
+):
+    """
+    Models of all providers in one call, fetched concurrently with a timeout
+    per provider. Providers that fail or time out come back with `error`.
+    """
+    return await provider_service.discover_models(x_user_id, model_type=model_type)
+
+
+@router.get("/models-cache", response_model=ModelsCacheStats)
+def get_models_cache_stats():
+    """Hit / miss counters of the model catalog and cached fetch failures."""
+    return provider_service.get_models_cache_stats()
+
+
 @router.get("/{provider_id}", response_model=ProviderInfo)
 def get_provider(provider_id: ProviderType):
     """Get information about a specific provider."""
@@ -35,31 +65,39 @@ def get_provider(provider_id: ProviderType):
 @router.get("/{provider_id}/models", response_model=ProviderModelsResponse)
 async def get_provider_models(
     provider_id: ProviderType,
+    response: Response,
     model_type: ModelType | None = Query(default=None, description="Filter by model type"),
+    q: str | None = Query(default=None, max_length=200, description="Search in model id / name"),
+    offset: int = Query(default=0, ge=0),
+    limit: int | None = Query(default=None, ge=1, le=1000, description="Page size (default: all)"),
     force_refresh: bool = Query(default=False, description="Force refresh the cache"),
     api_key: str | None = Query(default=None, description="API key for authenticated requests"),
     base_url: str | None = Query(default=None, description="Base URL for custom providers (OpenAI Compatible)"),
+    if_none_match: str | None = Header(default=None),
 ):
     """
     Get available models from a provider.
 
-    Models are cached in memory with a 5-minute TTL.
-    Use force_refresh=true to bypass the cache.
+    Models come from the persisted model catalog, refreshed in the background
+    every 5 minutes. Use force_refresh=true to refresh it first.
+    Responses carry an ETag; a matching If-None-Match gets 304 Not Modified.
     """
-    response = await provider_service.get_provider_models(
+    result, etag = await provider_service.get_catalog_models(
         provider=provider_id,
         api_key=api_key,
         base_url=base_url,
+        model_type=model_type,
+        q=q,
+        offset=offset,
+        limit=limit,
         force_refresh=force_refresh,
+        if_none_match=if_none_match,
     )
-
-    # Filter by type if requested
-    if model_type:
-        response.models = provider_service.filter_models_by_type(
-            response.models, model_type
-        )
-
-    return response
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if result is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return result
 
 
 @router.post("/{provider_id}/models/refresh", response_model=ProviderModelsResponse)
@@ -68,11 +106,12 @@ async def refresh_provider_models(
     api_key: str | None = Query(default=None, description="API key for authenticated requests"),
     base_url: str | None = Query(default=None, description="Base URL for custom providers"),
 ):
-    """Force refresh the models cache for a provider."""
-    return await provider_service.get_provider_models(
+    """Force refresh the model catalog of a provider."""
+    result, _ = await provider_service.get_catalog_models(
         provider=provider_id,
         api_key=api_key,
         base_url=base_url,
         force_refresh=True,
     )
+    return result
 
@@ -4,11 +4,14 @@ Run / SSE endpoints (foundation for long-running agent workflows).
 Not used by the app yet; intended for future integration.
 """
 
-from fastapi import APIRouter, HTTPException, Request, status
+from fastapi import APIRouter, Header, HTTPException, Query, Request, status
 from starlette.responses import StreamingResponse
 
-from app.schemas.run import RunCreateResponse, RunStatus
+from app.core.database import run_in_session
+from app.schemas.run import OverflowPolicy, RunCreateResponse, RunStats, RunStatus
+from app.services import checkpoints as checkpoints_service
 from app.services import runs as runs_service
+from app.services.task_supervisor import supervisor as task_supervisor
 
 router = APIRouter(prefix="/runs", tags=["runs"])
 
@@ -19,6 +22,16 @@ async def create_run() -> RunCreateResponse:
     return RunCreateResponse(run_id=run_id)
 
 
+@router.get("/stats", response_model=RunStats)
+async def get_runs_stats() -> RunStats:
+    """Live runs, subscribers and approximate memory held by the run registry."""
+    stats = await runs_service.get_stats()
+    stats.tasks_running = task_supervisor.running
+    stats.tasks_queued = task_supervisor.queued
+    stats.tasks_rejected = task_supervisor.rejected_total
+    return stats
+
+
 @router.get("/{run_id}", response_model=RunStatus)
 async def get_run(run_id: str) -> RunStatus:
     st = await runs_service.get_run_status(run_id)
@@ -32,11 +45,32 @@ async def cancel_run(run_id: str) -> RunStatus:
     st = await runs_service.cancel_run(run_id)
     if not st:
         raise HTTPException(status_code=404, detail="Run not found")
+    # Never resume it; a worker executing it elsewhere loses its lease and stops.
+    await run_in_session(
+        checkpoints_service.save_checkpoint, run_id, stage="cancelled"
+    )
+    task_supervisor.cancel(run_id)
     return st
 
 
 @router.get("/{run_id}/events")
-async def run_events(run_id: str, request: Request):
+async def run_events(
+    run_id: str,
+    request: Request,
+    last_event_id_header: int | None = Header(
+        default=None,
+        alias="Last-Event-ID",
+        description="Resume after this event id (sent automatically by EventSource on reconnect)",
+    ),
+    last_event_id: int | None = Query(
+        default=None,
+        description="Same as the Last-Event-ID header, for clients that cannot set headers",
+    ),
+    overflow: OverflowPolicy | None = Query(
+        default=None,
+        description="What to do when this client falls behind (defaults to server setting)",
+    ),
+):
     """
     Server-Sent Events stream.
 
@@ -44,11 +78,18 @@ async def run_events(run_id: str, request: Request):
     - hello
     - run_created
     - run_cancelled
+    - replay_truncated (requested events are no longer buffered)
+    - overflow (client was too slow; reconnect with Last-Event-ID = resume_from)
     - (future) stage, question, done, error, etc.
+
+    Buffered events after `Last-Event-ID` are replayed before live events.
     """
+    resume_from = last_event_id_header if last_event_id_header is not None else last_event_id
 
     async def gen():
-        async for msg in runs_service.subscribe(run_id):
+        async for msg in runs_service.subscribe(
+            run_id, last_event_id=resume_from, overflow_policy=overflow
+        ):
             if await request.is_disconnected():
                 break
             yield msg
@@ -5,9 +5,10 @@ Story API endpoints.
 from typing import List
 
 from fastapi import APIRouter, Depends, Header, Query, status
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.database import get_session
+from app.schemas.config_preset import EffectiveConfig
 from app.schemas.story import (
     StoryCreate,
     StoryRead,
@@ -27,35 +28,35 @@ def get_user_id(x_user_id: str = Header(..., description="Current user ID")) ->
 
 
 @router.get("/", response_model=List[StoryRead])
-def list_stories(
+async def list_stories(
     active_only: bool = Query(default=False, description="Only return active stories"),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     user_id: str = Depends(get_user_id),
 ):
     """List all stories for the current user."""
-    stories = story_service.list_stories(session, user_id, active_only=active_only)
+    stories = await story_service.list_stories(session, user_id, active_only=active_only)
     return [StoryRead.model_validate(s) for s in stories]
 
 
 @router.post("/", response_model=StoryRead, status_code=status.HTTP_201_CREATED)
-def create_story(
+async def create_story(
     payload: StoryCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     user_id: str = Depends(get_user_id),
 ):
     """Create a new story."""
-    story = story_service.create_story(session, user_id, payload)
+    story = await story_service.create_story(session, user_id, payload)
     return StoryRead.model_validate(story)
 
 
 @router.get("/{story_id}", response_model=StoryWithConfig)
-def get_story(
+async def get_story(
     story_id: str,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     user_id: str = Depends(get_user_id),
 ):
     """Get a specific story with its config."""
-    story = story_service.get_story(session, user_id, story_id)
+    story = await story_service.get_story(session, user_id, story_id)
     result = StoryWithConfig.model_validate(story)
     if story.config:
         result.config = StoryConfigRead.model_validate(story.config)
@@ -63,25 +64,25 @@ def get_story(
 
 
 @router.patch("/{story_id}", response_model=StoryRead)
-def update_story(
+async def update_story(
     story_id: str,
     payload: StoryUpdate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     user_id: str = Depends(get_user_id),
 ):
     """Update a story."""
-    story = story_service.update_story(session, user_id, story_id, payload)
+    story = await story_service.update_story(session, user_id, story_id, payload)
     return StoryRead.model_validate(story)
 
 
 @router.delete("/{story_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_story(
+async def delete_story(
     story_id: str,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     user_id: str = Depends(get_user_id),
 ):
     """Delete a story."""
-    story_service.delete_story(session, user_id, story_id)
+    await story_service.delete_story(session, user_id, story_id)
     return None
 
 
@@ -89,35 +90,44 @@ def delete_story(
 
 
 @router.get("/{story_id}/config", response_model=StoryConfigRead)
-def get_story_config(
+async def get_story_config(
     story_id: str,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     user_id: str = Depends(get_user_id),
 ):
     """Get the configuration overrides for a story."""
-    config = story_service.get_story_config(session, user_id, story_id)
+    config = await story_service.get_story_config(session, user_id, story_id)
     return StoryConfigRead.model_validate(config)
 
 
 @router.patch("/{story_id}/config", response_model=StoryConfigRead)
-def update_story_config(
+async def update_story_config(
     story_id: str,
     payload: StoryConfigUpdate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     user_id: str = Depends(get_user_id),
 ):
     """Update story configuration overrides."""
-    config = story_service.update_story_config(session, user_id, story_id, payload)
+    config = await story_service.update_story_config(session, user_id, story_id, payload)
     return StoryConfigRead.model_validate(config)
 
 
 @router.delete("/{story_id}/config", response_model=StoryConfigRead)
-def reset_story_config(
+async def reset_story_config(
     story_id: str,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     user_id: str = Depends(get_user_id),
 ):
     """Reset all story configuration overrides."""
-    config = story_service.reset_story_config(session, user_id, story_id)
+    config = await story_service.reset_story_config(session, user_id, story_id)
     return StoryConfigRead.model_validate(config)
 
+
+@router.get("/{story_id}/effective-config", response_model=EffectiveConfig)
+async def get_story_effective_config(
+    story_id: str,
+    session: AsyncSession = Depends(get_session),
+    user_id: str = Depends(get_user_id),
+):
+    """Get the config the story runs with: preset config plus story overrides."""
+    return await story_service.get_story_effective_config(session, user_id, story_id)
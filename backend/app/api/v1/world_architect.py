@@ -1,11 +1,13 @@
 from __future__ import annotations
 
-import asyncio
-
 from fastapi import APIRouter, Depends, Header, HTTPException, status
 
 from app.schemas.run import RunCreateResponse, RunStatus
-from app.schemas.world_architect import WorldArchitectAnswersRequest, WorldArchitectStartRequest
+from app.schemas.world_architect import (
+    WorldArchitectAnswersRequest,
+    WorldArchitectStartRequest,
+    WorldArchitectStats,
+)
 from app.services import runs as runs_service
 from app.services import world_architect as world_architect_service
 
@@ -14,17 +16,16 @@ router = APIRouter(prefix="/world-architect", tags=["world-architect"])
 
 
 def get_user_id(x_user_id: str = Header(..., description="Current user ID")) -> str:
-    # We don't persist anything yet, but we keep the API consistent with the rest of v1.
+    # Only recorded on workflow checkpoints; no user row is required.
     return x_user_id
 
 
 @router.post("/runs", response_model=RunCreateResponse, status_code=status.HTTP_201_CREATED)
 async def start_world_architect_run(
     payload: WorldArchitectStartRequest,
-    _user_id: str = Depends(get_user_id),
+    user_id: str = Depends(get_user_id),
 ) -> RunCreateResponse:
-    run_id = await runs_service.create_run()
-    asyncio.create_task(world_architect_service.run_world_architect(run_id, payload))
+    run_id = await world_architect_service.start_run(payload, user_id=user_id)
     return RunCreateResponse(run_id=run_id)
 
 
@@ -43,3 +44,10 @@ async def submit_world_architect_answers(
     return st
 
 
+@router.get("/stats", response_model=WorldArchitectStats)
+async def get_world_architect_stats() -> WorldArchitectStats:
+    return WorldArchitectStats(
+        json_parse=world_architect_service.get_json_parse_stats(),
+        llm_usage=world_architect_service.get_llm_usage_stats(),
+        llm_cache=await world_architect_service.get_llm_cache_stats(),
+    )
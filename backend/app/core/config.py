@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from pathlib import Path
 
@@ -29,6 +30,24 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = "sqlite:///./talespinner.db"
+    # Log every SQL statement; None follows DEBUG.
+    DATABASE_ECHO: bool | None = None
+    # Connection pool (server databases, e.g. Postgres), per worker
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30.0
+    # Recycle connections older than this (seconds) before the server drops them.
+    DATABASE_POOL_RECYCLE: int = 1800
+    # SQLite pragmas, applied to every new connection (journal_mode=WAL, synchronous=NORMAL)
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    # Per-request SQL metrics (`/db/query-stats`); X-DB-* response headers, None follows DEBUG.
+    SQL_METRICS_HEADERS: bool | None = None
+    # Requests issuing more statements are logged; when strict the exceeding statement fails.
+    SQL_QUERY_BUDGET: int | None = None
+    SQL_QUERY_BUDGET_STRICT: bool = False
+    # A statement repeated this often within one request is logged as a likely N+1.
+    SQL_REPEATED_STATEMENT_THRESHOLD: int = 5
 
     # Encryption key for API tokens (required)
     # Generate with: python -c 'from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())'
@@ -38,6 +57,15 @@ class Settings(BaseSettings):
     OPENROUTER_BASE_URL: str = "https://openrouter.ai/api/v1"
     OLLAMA_BASE_URL: str = "http://localhost:11434"
 
+    # Outbound HTTP: one pooled client per provider origin, shared by all calls
+    HTTP_CLIENT_HTTP2: bool = True
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
+    HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS: float = 10.0
+    # Origins with a pooled client (custom base URLs add more); least recently used are closed.
+    HTTP_CLIENT_MAX_ORIGINS: int = 64
+
     # ===== Env-managed model selection (current mode) =====
     # When true, `/providers/*/models` will prefer lists from env.
     MODELS_FROM_ENV_ONLY: bool = True
@@ -52,6 +80,25 @@ class Settings(BaseSettings):
     # If empty/null -> will fallback to first item in OPENROUTER_MODELS (if present)
     OPENROUTER_DEFAULT_MODEL: str | None = None
 
+    # Request native structured output (`response_format: json_schema`) from models whose
+    # OpenRouter catalog entry lists "structured_outputs"; others get the schema in the prompt only.
+    OPENROUTER_STRUCTURED_OUTPUT: bool = True
+    # Mark the shared system prompt + SCHEMA prefix with a `cache_control` breakpoint
+    OPENROUTER_PROMPT_CACHE: bool = True
+    # Stream world architect completions, forwarding deltas to the run as `token` events
+    OPENROUTER_STREAMING: bool = True
+    # A streamed completion fails after this long without a chunk (total duration is unbounded).
+    OPENROUTER_STREAM_IDLE_TIMEOUT_SECONDS: float = 60.0
+    # Streamed deltas are batched into one `token` event per this interval.
+    LLM_TOKEN_EVENT_INTERVAL_SECONDS: float = 0.1
+
+    # World architect LLM response cache (opt-in), keyed by a hash of the request
+    LLM_CACHE_ENABLED: bool = False
+    LLM_CACHE_PATH: str = "./llm_cache.db"
+    # Least recently used responses are evicted beyond this total size.
+    LLM_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    LLM_CACHE_TTL_SECONDS: int = 86400
+
     # Preset model selection (4 LLM blocks)
     # If not set -> falls back to OPENROUTER_DEFAULT_MODEL / first OPENROUTER_MODELS item.
     OPENROUTER_MAIN_MODEL: str | None = None
@@ -66,8 +113,64 @@ class Settings(BaseSettings):
     OLLAMA_EMBEDDING_MODEL: str = "nomic-embed-text"
     OLLAMA_EMBEDDING_DIMENSIONS: int | None = None
 
-    # Model cache TTL in seconds
+    # Model cache / persisted model catalog TTL in seconds
     MODEL_CACHE_TTL: int = 300
+    # Expired entries are still served for this long while being refreshed in the background.
+    MODEL_CACHE_STALE_TTL: int = 3600
+    # Cached fetch failures (per provider / base_url / API key); least recently failed are evicted.
+    MODEL_CACHE_MAX_ENTRIES: int = 256
+    # Stored catalogs of sources (base_url / API key) not refreshed for this long are deleted.
+    MODEL_CATALOG_SOURCE_TTL: int = 7 * 24 * 3600
+    # At most this many catalogs are stored; the least recently refreshed are deleted first.
+    MODEL_CATALOG_MAX_SOURCES: int = 256
+    # A failed model list fetch (e.g. Ollama not running) is not retried for this long.
+    MODEL_CACHE_NEGATIVE_TTL: int = 30
+    # Per-endpoint timeout of `/providers/models` (aggregated discovery).
+    MODEL_DISCOVERY_TIMEOUT_SECONDS: float = 10.0
+
+    # Resolved story configs (preset + story overrides) kept in memory
+    EFFECTIVE_CONFIG_CACHE_SIZE: int = 1024
+
+    # Runs (registry behind `/runs/*` SSE streams)
+    # "memory": in-process (single worker); "sqlite": shared by all workers on one host.
+    RUN_BUS_BACKEND: Literal["memory", "sqlite"] = "memory"
+    RUN_BUS_SQLITE_PATH: str = "./run_bus.db"
+    # How often sqlite-backed workers poll for new events / workflow payloads.
+    RUN_BUS_POLL_INTERVAL_SECONDS: float = 0.05
+    # Number of shards the run registry is partitioned into (by run_id hash).
+    RUNS_REGISTRY_SHARDS: int = 64
+    # Finished (completed/failed/cancelled) runs are evicted after this many seconds.
+    RUNS_TERMINAL_TTL_SECONDS: int = 600
+    # Runs without subscribers and without any activity are evicted after this many seconds.
+    RUNS_IDLE_TTL_SECONDS: int = 3600
+    # Hard cap on runs kept in memory; least recently used runs are evicted first.
+    RUNS_MAX_COUNT: int = 10000
+    RUNS_REAPER_INTERVAL_SECONDS: float = 30.0
+    # Per-run replay buffer used to resume SSE streams via Last-Event-ID.
+    RUNS_EVENT_BUFFER_MAX_EVENTS: int = 256
+    RUNS_EVENT_BUFFER_MAX_BYTES: int = 512 * 1024
+    # Pending events per SSE subscriber before the overflow policy kicks in.
+    RUNS_SUBSCRIBER_QUEUE_SIZE: int = 100
+    # "disconnect": close slow streams with a resume cursor; "drop": discard overflowing events.
+    RUNS_SUBSCRIBER_OVERFLOW_POLICY: Literal["drop", "disconnect"] = "disconnect"
+
+    # Background workflow tasks (task supervisor), limits are per worker
+    TASKS_MAX_RUNNING: int = 16
+    # Runs waiting for a slot; beyond this new runs are rejected with 503.
+    TASKS_MAX_QUEUED: int = 100
+    TASKS_PER_USER_MAX_RUNNING: int = 2
+    # Running + queued runs per user; beyond this new runs are rejected with 429.
+    TASKS_PER_USER_MAX_ACTIVE: int = 10
+    # On shutdown running tasks get this long to finish before being cancelled.
+    TASKS_DRAIN_TIMEOUT_SECONDS: float = 20.0
+
+    # Workflow checkpoints (resume `/world-architect/runs` after a restart / crash)
+    WORKFLOW_RESUME_ENABLED: bool = True
+    # A worker renews the lease on its runs every third of this; runs of a worker
+    # that stopped renewing are resumed elsewhere once the lease expires.
+    WORKFLOW_CHECKPOINT_LEASE_SECONDS: int = 60
+    # Checkpoints of finished runs are deleted after this many seconds.
+    WORKFLOW_CHECKPOINT_RETENTION_SECONDS: int = 86400
 
     # LLM & Vector DB (placeholders for keys)
     OPENAI_API_KEY: str | None = None
@@ -1,10 +1,102 @@
-from sqlmodel import SQLModel, create_engine, Session
+from typing import Any, Callable, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core import sql_metrics
 from app.core.config import settings
 
-# check_same_thread=False is needed only for SQLite
-connect_args = {"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+T = TypeVar("T")
+
+# Async drivers used when DATABASE_URL names none (e.g. "sqlite:///..." -> aiosqlite)
+_ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def _set_sqlite_pragmas(dbapi_connection: Any, _connection_record: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        # WAL: readers don't block the writer (and vice versa); NORMAL is durable in WAL mode
+        # except for the last transactions on power loss.
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+    finally:
+        cursor.close()
+
+
+def engine_options(url: str) -> dict[str, Any]:
+    """`create_engine()` options for `url`, driven by settings."""
+    echo = settings.DEBUG if settings.DATABASE_ECHO is None else settings.DATABASE_ECHO
+    options: dict[str, Any] = {"echo": echo}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        # Connections are used from other threads (aiosqlite runs each one in its own).
+        options["connect_args"] = {"check_same_thread": False}
+        if parsed.database in (None, "", ":memory:"):
+            # One shared connection, otherwise every connection is a new empty database
+            options["poolclass"] = StaticPool
+    else:
+        options.update(
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+    return options
+
+
+def build_engine(url: str) -> Engine:
+    """Engine for `url` with SQL metrics; SQLite connections get the pragmas above."""
+    new_engine = create_engine(url, **engine_options(url))
+    if new_engine.dialect.name == "sqlite":
+        event.listen(new_engine, "connect", _set_sqlite_pragmas)
+    sql_metrics.instrument(new_engine)
+    return new_engine
+
+
+def async_url(url: str) -> str:
+    """`url` with the async driver of its backend, unless it already names a driver."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if parsed.drivername != backend or backend not in _ASYNC_DRIVERS:
+        return url
+    return parsed.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}").render_as_string(
+        hide_password=False
+    )
+
+
+def build_async_engine(url: str) -> AsyncEngine:
+    """
+    Async counterpart of `build_engine()` (same pooling, echo and pragmas).
+    Fails at startup if the async driver of the backend is not installed.
+    """
+    try:
+        new_engine = create_async_engine(async_url(url), **engine_options(url))
+    except ImportError as e:
+        backend = make_url(url).get_backend_name()
+        raise RuntimeError(
+            f"DATABASE_URL uses {backend}, but its async driver {e.name!r} is not "
+            f"installed: install it (postgresql: the `postgres` extra) or name an "
+            f"installed async driver in the URL, e.g. {backend}+<driver>://..."
+        ) from e
+    if new_engine.dialect.name == "sqlite":
+        event.listen(new_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    sql_metrics.instrument(new_engine.sync_engine)
+    return new_engine
+
 
-engine = create_engine(settings.DATABASE_URL, echo=True, connect_args=connect_args)
+# Sync engine: schema setup, migrations and scripts
+engine = build_engine(settings.DATABASE_URL)
+# Async engine: API requests, served on the event loop
+async_engine = build_async_engine(settings.DATABASE_URL)
+# Objects stay usable after commit: every column value is set client-side (ids, timestamps),
+# so services return them without a refresh round-trip.
+async_session = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 
 def init_db():
     # Import models so they are registered on metadata before create_all
@@ -12,7 +104,14 @@ def init_db():
 
     SQLModel.metadata.create_all(engine)
 
-def get_session():
-    with Session(engine) as session:
+async def get_session():
+    async with async_session() as session:
         yield session
 
+async def run_in_session(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a sync `fn(session, ...)` with its own session on the async engine
+    (`AsyncSession.run_sync`: no worker thread, same pool as the API).
+    """
+    async with async_session() as session:
+        return await session.run_sync(fn, *args, **kwargs)
@@ -0,0 +1,202 @@
+"""
+Shared outbound HTTP clients: one pooled `httpx.AsyncClient` per origin
+(scheme://host:port), reused by every LLM / provider call to that origin so
+connections (TCP + TLS, HTTP/2 when available) are kept alive between calls.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+from collections import OrderedDict
+from typing import AsyncIterator
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# How long an evicted client is kept around (and polled) before it is closed
+_EVICTED_CLOSE_DELAY_SECONDS = 1.0
+
+
+class _MeteredStream(httpx.AsyncByteStream):
+    """Response body stream that reports back when the response is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, transport: "_MeteredTransport") -> None:
+        self._stream = stream
+        self._transport = transport
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._transport.in_flight -= 1
+        await self._stream.aclose()
+
+
+class _MeteredTransport(httpx.AsyncHTTPTransport):
+    """HTTP transport counting requests and exposing its connection pool state."""
+
+    def __init__(self, **kwargs: object) -> None:
+        super().__init__(**kwargs)  # type: ignore[arg-type]
+        self.requests_total = 0
+        self.errors_total = 0
+        self.in_flight = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests_total += 1
+        self.in_flight += 1
+        try:
+            response = await super().handle_async_request(request)
+        except Exception:
+            self.in_flight -= 1
+            self.errors_total += 1
+            raise
+        assert isinstance(response.stream, httpx.AsyncByteStream)
+        response.stream = _MeteredStream(response.stream, self)
+        return response
+
+    def pool_stats(self) -> dict[str, int]:
+        """Connection counts of the pool; empty if httpcore's internals changed."""
+        try:
+            connections = list(self._pool.connections)
+            idle = sum(1 for c in connections if c.is_idle())
+            http2 = sum(1 for c in connections if "HTTP/2" in c.info())
+        except AttributeError:
+            return {}
+        return {
+            "connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+            "http2_connections": http2,
+        }
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        raise ValueError(f"Not an absolute URL: {url!r}")
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+class HttpClientRegistry:
+    """
+    Pooled clients keyed by origin, created on first use of an origin while the
+    registry is open (`open()` / `aclose()` from the app lifespan).
+    At most `max_origins` are kept: the least recently used client without
+    requests in flight is evicted when a new origin needs one, and closed once
+    nobody can still be about to use it.
+    """
+
+    def __init__(self, max_origins: int) -> None:
+        self.max_origins = max_origins
+        self._clients: OrderedDict[str, tuple[httpx.AsyncClient, _MeteredTransport]] = (
+            OrderedDict()
+        )
+        # Evicted clients being closed in the background
+        self._closing: set[asyncio.Task[None]] = set()
+        self._open = False
+
+    def open(self) -> None:
+        self._open = True
+
+    def get(self, base_url: str) -> httpx.AsyncClient:
+        """Client for the origin of `base_url` (callers still pass full URLs)."""
+        if not self._open:
+            raise RuntimeError("HTTP client registry is not open (see the app lifespan)")
+        origin = _origin(base_url)
+        entry = self._clients.get(origin)
+        if entry is None:
+            entry = self._create()
+            self._clients[origin] = entry
+            self._evict()
+        else:
+            self._clients.move_to_end(origin)
+        return entry[0]
+
+    def _evict(self) -> None:
+        # Clients with requests in flight (e.g. a streamed completion) are skipped;
+        # the registry stays above the cap until they finish.
+        excess = len(self._clients) - self.max_origins
+        for origin in list(self._clients)[:-1]:
+            if excess <= 0:
+                break
+            client, transport = self._clients[origin]
+            if transport.in_flight:
+                continue
+            del self._clients[origin]
+            excess -= 1
+            task = asyncio.ensure_future(self._close_when_idle(client, transport))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close_when_idle(client: httpx.AsyncClient, transport: _MeteredTransport) -> None:
+        # A caller may have got this client from `get()` just before the eviction
+        # without having sent its request yet: give it time to do so, then wait
+        # for every request on the client to finish before closing it.
+        try:
+            await asyncio.sleep(_EVICTED_CLOSE_DELAY_SECONDS)
+            while transport.in_flight:
+                await asyncio.sleep(_EVICTED_CLOSE_DELAY_SECONDS)
+        finally:
+            await client.aclose()
+
+    def _create(self) -> tuple[httpx.AsyncClient, _MeteredTransport]:
+        http2 = settings.HTTP_CLIENT_HTTP2
+        if http2 and not _http2_available():
+            logger.warning("HTTP_CLIENT_HTTP2 is enabled but `h2` is not installed; using HTTP/1.1")
+            http2 = False
+        transport = _MeteredTransport(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            retries=1,  # connect errors only, e.g. a pooled connection closed by the server
+        )
+        client = httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(30.0, connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS),
+        )
+        return client, transport
+
+    def stats(self) -> list[dict[str, object]]:
+        return [
+            {
+                "origin": origin,
+                "max_connections": settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                "requests_total": transport.requests_total,
+                "errors_total": transport.errors_total,
+                "in_flight": transport.in_flight,
+                **transport.pool_stats(),
+            }
+            for origin, (_, transport) in self._clients.items()
+        ]
+
+    async def aclose(self) -> None:
+        self._open = False
+        clients, self._clients = self._clients, OrderedDict()
+        for client, _ in clients.values():
+            await client.aclose()
+        # Shutdown: evicted clients are closed now, without waiting for them to idle
+        for task in self._closing:
+            task.cancel()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+
+http_clients = HttpClientRegistry(settings.HTTP_CLIENT_MAX_ORIGINS)
@@ -0,0 +1,221 @@
+"""
+Request-scoped SQL instrumentation.
+
+Engine events count the statements, the time spent executing them and how
+often each statement text repeats (N+1 candidates) into the `QueryStats` of
+the current context. `SqlMetricsMiddleware` opens one per HTTP request,
+aggregates it per route (`route_stats()`), logs suspicious requests and, in
+debug mode, reports it in `X-DB-*` response headers.
+
+Budgets: `track(budget=n)` / `query_budget(n)` (and SQL_QUERY_BUDGET for every
+request) fail the statement that exceeds the budget with `QueryBudgetExceeded`
+when strict, so tests catch regressions instead of just slower endpoints.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """More statements were issued than the budget of the current scope allows."""
+
+
+@dataclass
+class QueryStats:
+    """Statements issued within one `track()` scope (e.g. one request)."""
+
+    budget: int | None = None
+    strict: bool = False
+    statements: int = 0
+    db_time: float = 0.0
+    # A statement was refused because of the (strict) budget
+    exceeded: bool = False
+    # Statement text (parameters are bound separately) -> executions
+    patterns: Counter[str] = field(default_factory=Counter)
+    parent: QueryStats | None = field(default=None, repr=False)
+
+    def most_repeated(self) -> tuple[str | None, int]:
+        """The statement executed most often and its count."""
+        if not self.patterns:
+            return None, 0
+        return self.patterns.most_common(1)[0]
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("sql_query_stats", default=None)
+
+
+def _before_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    stats = _current.get()
+    while stats is not None:
+        if stats.strict and stats.budget is not None and stats.statements >= stats.budget:
+            stats.exceeded = True
+            raise QueryBudgetExceeded(
+                f"Query budget of {stats.budget} exceeded by: {statement[:200]}"
+            )
+        stats = stats.parent
+    conn.info.setdefault("sql_metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    started = conn.info.get("sql_metrics_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    stats = _current.get()
+    while stats is not None:
+        stats.statements += 1
+        stats.db_time += elapsed
+        stats.patterns[statement] += 1
+        stats = stats.parent
+
+
+def _handle_error(exception_context: Any) -> None:
+    # A failed statement never reaches after_cursor_execute.
+    if exception_context.connection is not None:
+        started = exception_context.connection.info.get("sql_metrics_started")
+        if started:
+            started.pop()
+
+
+def instrument(engine: Engine) -> None:
+    """Collect statements of `engine` (the sync engine of an AsyncEngine) into `QueryStats`."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def track(budget: int | None = None, *, strict: bool = False) -> Iterator[QueryStats]:
+    """
+    Count statements issued in this context (including worker threads started
+    from it) into a new `QueryStats`; enclosing scopes keep counting too.
+    """
+    stats = QueryStats(budget=budget, strict=strict, parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def query_budget(max_statements: int) -> Iterator[QueryStats]:
+    """Fail with `QueryBudgetExceeded` once more than `max_statements` are issued."""
+    with track(max_statements, strict=True) as stats:
+        yield stats
+
+
+@dataclass
+class _RouteTotals:
+    requests: int = 0
+    statements: int = 0
+    statements_max: int = 0
+    db_time: float = 0.0
+    repeated_requests: int = 0
+    over_budget_requests: int = 0
+
+
+_routes: dict[str, _RouteTotals] = {}
+
+
+def _record(route: str, stats: QueryStats) -> None:
+    totals = _routes.get(route)
+    if totals is None:
+        totals = _routes[route] = _RouteTotals()
+    totals.requests += 1
+    totals.statements += stats.statements
+    totals.statements_max = max(totals.statements_max, stats.statements)
+    totals.db_time += stats.db_time
+
+    statement, repeats = stats.most_repeated()
+    if repeats >= settings.SQL_REPEATED_STATEMENT_THRESHOLD:
+        totals.repeated_requests += 1
+        logger.warning(
+            "%s executed the same statement %d times (N+1?): %s",
+            route,
+            repeats,
+            (statement or "")[:200],
+        )
+    if stats.exceeded or (stats.budget is not None and stats.statements > stats.budget):
+        totals.over_budget_requests += 1
+        logger.warning(
+            "%s issued %s%d SQL statements (budget %d)",
+            route,
+            "over " if stats.exceeded else "",
+            stats.statements,
+            stats.budget,
+        )
+
+
+def route_stats() -> list[dict[str, Any]]:
+    """Per-route totals since startup, most statements first."""
+    return [
+        {
+            "route": route,
+            "requests": totals.requests,
+            "statements": totals.statements,
+            "statements_max": totals.statements_max,
+            "db_time_ms": round(totals.db_time * 1000, 3),
+            "repeated_requests": totals.repeated_requests,
+            "over_budget_requests": totals.over_budget_requests,
+        }
+        for route, totals in sorted(
+            _routes.items(), key=lambda item: item[1].statements, reverse=True
+        )
+    ]
+
+
+def _headers_enabled() -> bool:
+    if settings.SQL_METRICS_HEADERS is None:
+        return settings.DEBUG
+    return settings.SQL_METRICS_HEADERS
+
+
+class SqlMetricsMiddleware:
+    """Tracks the SQL statements of every HTTP request (plain ASGI: SSE streams pass through)."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers_enabled = _headers_enabled()
+        with track(settings.SQL_QUERY_BUDGET, strict=settings.SQL_QUERY_BUDGET_STRICT) as stats:
+
+            async def send_with_headers(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers["X-DB-Queries"] = str(stats.statements)
+                    headers["X-DB-Time-Ms"] = f"{stats.db_time * 1000:.2f}"
+                    headers["X-DB-Repeated"] = str(stats.most_repeated()[1])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_headers if headers_enabled else send)
+            finally:
+                route = scope.get("route")
+                if route is not None and stats.statements:
+                    _record(f"{scope['method']} {route.path}", stats)
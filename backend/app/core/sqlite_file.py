@@ -0,0 +1,65 @@
+"""
+Local SQLite files shared by the worker processes of one host (the run bus,
+the LLM response cache): WAL mode, one connection per process, statements run
+in worker threads so the event loop never blocks on disk or on the write lock.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import sqlite3
+import threading
+from collections.abc import Callable, Iterator
+from typing import Any, TypeVar
+
+_T = TypeVar("_T")
+
+
+@contextlib.contextmanager
+def write_transaction(conn: sqlite3.Connection) -> Iterator[None]:
+    """Write transaction; IMMEDIATE takes the write lock up front (no upgrade deadlocks)."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+class SqliteFile:
+    """
+    Lazily opened connection to the SQLite file at `path`, creating `schema`.
+    Calls run one at a time: `fn(conn, *args)` in the calling thread with
+    `run`, in a worker thread with `call`.
+    """
+
+    def __init__(self, path: str, schema: str) -> None:
+        self._path = path
+        self._schema = schema
+        self._conn: sqlite3.Connection | None = None
+        self._conn_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.executescript(self._schema)
+        return conn
+
+    def run(self, fn: Callable[..., _T], *args: Any) -> _T:
+        with self._conn_lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            return fn(self._conn, *args)
+
+    async def call(self, fn: Callable[..., _T], *args: Any) -> _T:
+        return await asyncio.to_thread(self.run, fn, *args)
+
+    def close(self) -> None:
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -10,16 +10,30 @@ from app.api.v1.presets import router as presets_router
 from app.api.v1.stories import router as stories_router
 from app.api.v1.runs import router as runs_router
 from app.api.v1.world_architect import router as world_architect_router
+from app.api.v1.db import router as db_router
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.sql_metrics import SqlMetricsMiddleware
+from app.core.database import async_engine, init_db
+from app.core.http_client import http_clients
+from app.services import runs as runs_service
+from app.services import world_architect as world_architect_service
+from app.services.task_supervisor import supervisor as task_supervisor
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: create db tables
     init_db()
+    http_clients.open()
+    await runs_service.start()
+    await world_architect_service.start()
     yield
-    # Shutdown
+    # Shutdown: let running workflows finish, then hand the rest over to other workers
+    await task_supervisor.drain(settings.TASKS_DRAIN_TIMEOUT_SECONDS)
+    await world_architect_service.stop()
+    await runs_service.stop()
+    await http_clients.aclose()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -29,6 +43,8 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Per-request SQL statement counts (see app.core.sql_metrics)
+app.add_middleware(SqlMetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
@@ -45,6 +61,7 @@ app.include_router(presets_router, prefix=settings.API_V1_STR)
 app.include_router(stories_router, prefix=settings.API_V1_STR)
 app.include_router(runs_router, prefix=settings.API_V1_STR)
 app.include_router(world_architect_router, prefix=settings.API_V1_STR)
+app.include_router(db_router, prefix=settings.API_V1_STR)
 
 @app.get("/")
 async def root():
@@ -1,4 +1,5 @@
 from app.models.config_preset import ConfigPreset
+from app.models.model_catalog import ModelCatalogEntry, ModelCatalogSource
 from app.models.provider import (
     ModelType,
     ProviderType,
@@ -8,9 +9,12 @@ from app.models.provider import (
 from app.models.story import Story, StoryConfig
 from app.models.token import Token
 from app.models.user import User
+from app.models.workflow_checkpoint import WorkflowCheckpoint
 
 __all__ = [
     "ConfigPreset",
+    "ModelCatalogEntry",
+    "ModelCatalogSource",
     "ModelType",
     "ProviderType",
     "TokenSelectionStrategy",
@@ -19,5 +23,6 @@ __all__ = [
     "StoryConfig",
     "Token",
     "User",
+    "WorkflowCheckpoint",
 ]
 
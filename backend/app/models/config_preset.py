@@ -6,6 +6,7 @@ from datetime import datetime
 from typing import TYPE_CHECKING, Any
 from uuid import uuid4
 
+from sqlalchemy import Index, text
 from sqlmodel import JSON, Column, Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -17,6 +18,17 @@ class ConfigPreset(SQLModel, table=True):
     """User's configuration preset combining model configs."""
 
     __tablename__ = "config_presets"
+    __table_args__ = (
+        # list_presets: by user, oldest first
+        Index("ix_config_presets_user_created", "user_id", "created_at"),
+        # get_default_preset: the (single) default preset of a user
+        Index(
+            "ix_config_presets_user_default",
+            "user_id",
+            sqlite_where=text("is_default = 1"),
+            postgresql_where=text("is_default"),
+        ),
+    )
 
     id: str = Field(
         default_factory=lambda: str(uuid4()),
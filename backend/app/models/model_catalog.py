@@ -0,0 +1,48 @@
+"""
+Model catalog: persisted model lists of providers, refreshed in the background
+and searched / paginated in the database instead of in memory per request.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Index, Text, UniqueConstraint
+from sqlmodel import JSON, Column, Field, SQLModel
+
+from app.models.provider import ModelType, ProviderType
+
+
+class ModelCatalogEntry(SQLModel, table=True):
+    """One model of a provider source."""
+
+    __tablename__ = "model_catalog"
+    __table_args__ = (
+        UniqueConstraint("provider", "source", "model_id", name="uq_model_catalog_model"),
+        # Listing / filtering by type, ordered by name
+        Index("ix_model_catalog_listing", "provider", "source", "model_type", "name"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    provider: ProviderType = Field(nullable=False)
+    # base_url of custom (OpenAI compatible) providers ("" for the default endpoint),
+    # plus "#<fingerprint>" of the API key the list was fetched with, if one was given
+    source: str = Field(default="", max_length=512, nullable=False)
+    model_id: str = Field(max_length=255, nullable=False)
+    name: str = Field(max_length=255, nullable=False)
+    model_type: ModelType = Field(nullable=False)
+    context_length: int | None = Field(default=None, nullable=True)
+    description: str | None = Field(default=None, sa_column=Column(Text))
+    supported_parameters: list[str] = Field(
+        default_factory=list, sa_column=Column(JSON, nullable=False)
+    )
+
+
+class ModelCatalogSource(SQLModel, table=True):
+    """Refresh state of the catalog of one provider source."""
+
+    __tablename__ = "model_catalog_sources"
+
+    provider: ProviderType = Field(primary_key=True, nullable=False)
+    source: str = Field(default="", primary_key=True, max_length=512, nullable=False)
+    # Hash of the stored model list; changes only when the list does
+    etag: str = Field(max_length=64, nullable=False)
+    refreshed_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
@@ -6,6 +6,7 @@ from datetime import datetime
 from typing import TYPE_CHECKING, Any
 from uuid import uuid4
 
+from sqlalchemy import Index, text
 from sqlmodel import JSON, Column, Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -17,6 +18,17 @@ class Story(SQLModel, table=True):
     """A story/session created by a user."""
 
     __tablename__ = "stories"
+    __table_args__ = (
+        # list_stories: by user, newest first; the partial one serves `active_only`
+        Index("ix_stories_user_updated", "user_id", "updated_at"),
+        Index(
+            "ix_stories_user_active_updated",
+            "user_id",
+            "updated_at",
+            sqlite_where=text("is_active = 1"),
+            postgresql_where=text("is_active"),
+        ),
+    )
 
     id: str = Field(
         default_factory=lambda: str(uuid4()),
@@ -6,6 +6,7 @@ from datetime import datetime
 from typing import TYPE_CHECKING
 from uuid import uuid4
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 from app.models.provider import ProviderType
@@ -18,6 +19,8 @@ class Token(SQLModel, table=True):
     """Encrypted API token for a provider."""
 
     __tablename__ = "tokens"
+    # list_tokens: by user, oldest first
+    __table_args__ = (Index("ix_tokens_user_created", "user_id", "created_at"),)
 
     id: str = Field(
         default_factory=lambda: str(uuid4()),
@@ -0,0 +1,43 @@
+"""
+Workflow checkpoint model: durable progress of long-running workflows (runs).
+"""
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import Text
+from sqlmodel import JSON, Column, Field, SQLModel
+
+
+class WorkflowCheckpoint(SQLModel, table=True):
+    """
+    Last completed stage of a workflow run plus everything needed to resume it
+    (input, raw LLM outputs, HITL questions and answers), keyed by run_id.
+    """
+
+    __tablename__ = "workflow_checkpoints"
+
+    run_id: str = Field(primary_key=True, max_length=64, nullable=False)
+    workflow: str = Field(max_length=64, nullable=False)
+    # Free-form X-User-ID of the caller (not a FK: such workflows don't require a user row)
+    user_id: str | None = Field(default=None, max_length=64, nullable=True)
+    stage: str = Field(index=True, max_length=32, nullable=False)
+
+    request: dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))
+    # Raw LLM outputs and their validated forms, per completed stage
+    analysis_raw: str | None = Field(default=None, sa_column=Column(Text))
+    analysis: dict[str, Any] | None = Field(default=None, sa_column=Column(JSON))
+    answers: dict[str, Any] | None = Field(default=None, sa_column=Column(JSON))
+    final_raw: str | None = Field(default=None, sa_column=Column(Text))
+    result: dict[str, Any] | None = Field(default=None, sa_column=Column(JSON))
+    error: str | None = Field(default=None, sa_column=Column(Text))
+
+    # Worker currently executing the run; the lease is renewed while it runs,
+    # so checkpoints of crashed workers can be picked up once it expires.
+    owner: str | None = Field(default=None, max_length=64, nullable=True)
+    lease_expires_at: datetime | None = Field(default=None, index=True, nullable=True)
+    # Times the run was taken over by a worker after its previous one stopped
+    attempt: int = Field(default=0, nullable=False)
+
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
@@ -5,7 +5,7 @@ Configuration preset schemas for API.
 from datetime import datetime
 from typing import Any
 
-from pydantic import Field
+from pydantic import ConfigDict, Field
 from sqlmodel import SQLModel
 
 from app.models.provider import ProviderType, TokenSelectionStrategy
@@ -14,6 +14,8 @@ from app.models.provider import ProviderType, TokenSelectionStrategy
 class FallbackStrategy(SQLModel):
     """Fallback strategy configuration."""
 
+    model_config = ConfigDict(frozen=True)
+
     use_main_for_unset: bool = True
     model_fallback_order: list[str] = Field(default_factory=list)
     timeout_seconds: int = Field(default=30, ge=1, le=300)
@@ -23,6 +25,8 @@ class FallbackStrategy(SQLModel):
 class SamplerSettings(SQLModel):
     """Sampler settings for LLM inference."""
 
+    model_config = ConfigDict(frozen=True)
+
     temperature: float = Field(default=0.7, ge=0.0, le=2.0)
     top_p: float = Field(default=1.0, ge=0.0, le=1.0)
     top_k: int | None = Field(default=None, ge=1)
@@ -35,6 +39,8 @@ class SamplerSettings(SQLModel):
 class LLMConfig(SQLModel):
     """LLM model configuration."""
 
+    model_config = ConfigDict(frozen=True)
+
     provider: ProviderType
     model_id: str = Field(min_length=1, max_length=256)
     token_ids: list[str] = Field(default_factory=list)
@@ -48,6 +54,8 @@ class LLMConfig(SQLModel):
 class RAGConfig(SQLModel):
     """RAG configuration."""
 
+    model_config = ConfigDict(frozen=True)
+
     enabled: bool = False
     config: LLMConfig | None = None
 
@@ -55,6 +63,8 @@ class RAGConfig(SQLModel):
 class GuardConfig(SQLModel):
     """Guard model configuration."""
 
+    model_config = ConfigDict(frozen=True)
+
     enabled: bool = False
     config: LLMConfig | None = None
 
@@ -62,6 +72,8 @@ class GuardConfig(SQLModel):
 class StorytellingConfig(SQLModel):
     """Storytelling model configuration."""
 
+    model_config = ConfigDict(frozen=True)
+
     enabled: bool = False
     config: LLMConfig | None = None
 
@@ -69,6 +81,8 @@ class StorytellingConfig(SQLModel):
 class EmbeddingConfigData(SQLModel):
     """Embedding configuration data."""
 
+    model_config = ConfigDict(frozen=True)
+
     provider: ProviderType
     model_id: str = Field(min_length=1, max_length=256)
     token_ids: list[str] = Field(default_factory=list)
@@ -82,6 +96,8 @@ class EmbeddingConfigData(SQLModel):
 class GlobalConfigSchema(SQLModel):
     """Global configuration schema combining all model configs."""
 
+    model_config = ConfigDict(frozen=True)
+
     main_model: LLMConfig
     rag: RAGConfig = Field(default_factory=lambda: RAGConfig(enabled=False))
     guard: GuardConfig = Field(default_factory=lambda: GuardConfig(enabled=False))
@@ -91,6 +107,24 @@ class GlobalConfigSchema(SQLModel):
     embedding: EmbeddingConfigData
 
 
+class EffectiveConfig(SQLModel):
+    """
+    Config a story runs with: the preset's config_data with the story's
+    overrides and `fallback_strategy.use_main_for_unset` applied, validated.
+
+    Resolved objects are cached and shared between callers, hence frozen down
+    to the nested config models; their list / dict fields are still shared, so
+    copy (`model_copy(deep=True)`) before changing any of those.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    preset_id: str
+    story_id: str | None = None
+    config: GlobalConfigSchema
+    fallback_strategy: FallbackStrategy
+
+
 class ConfigPresetBase(SQLModel):
     """Base config preset schema."""
 
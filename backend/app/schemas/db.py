@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+
+
+class RouteQueryStats(BaseModel):
+    """SQL statements issued by one route since startup."""
+
+    # "<METHOD> <path template>"
+    route: str
+    requests: int
+    statements: int
+    # Most statements issued by a single request
+    statements_max: int
+    db_time_ms: float
+    # Requests that executed one statement SQL_REPEATED_STATEMENT_THRESHOLD+ times (N+1)
+    repeated_requests: int
+    # Requests that issued more than SQL_QUERY_BUDGET statements
+    over_budget_requests: int
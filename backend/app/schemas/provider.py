@@ -26,6 +26,8 @@ class ProviderModelInfo(BaseModel):
     model_type: ModelType
     context_length: int | None = None
     description: str | None = None
+    # Request parameters the model accepts (e.g. "structured_outputs"); empty if unknown
+    supported_parameters: list[str] = []
 
 
 class ProviderModelsResponse(BaseModel):
@@ -34,4 +36,59 @@ class ProviderModelsResponse(BaseModel):
     provider: ProviderType
     models: list[ProviderModelInfo]
     cached: bool = False
+    # Served from an expired cache entry while a background refresh runs
+    stale: bool = False
+    # Number of models matching the filters (across all pages)
+    total: int | None = None
+    # Set when the provider could not be reached (models are then stale or empty)
+    error: str | None = None
 
+
+
+class ProviderDiscoveryResult(BaseModel):
+    """Models of one provider endpoint within an aggregated model discovery."""
+
+    provider: ProviderType
+    # Custom endpoint (OpenAI compatible), None for the provider's default one
+    base_url: str | None = None
+    models: list[ProviderModelInfo] = []
+    cached: bool = False
+    stale: bool = False
+    # Unreachable or timed out; other endpoints are still returned
+    error: str | None = None
+    elapsed_ms: int
+
+
+class ModelDiscoveryResponse(BaseModel):
+    """Models of all providers (and a user's custom endpoints), fetched concurrently."""
+
+    results: list[ProviderDiscoveryResult]
+    elapsed_ms: int
+
+
+class HttpPoolStats(BaseModel):
+    """Utilization of the shared outbound HTTP connection pool of one origin."""
+
+    origin: str
+    max_connections: int
+    # Read from httpcore's pool internals; None if this httpcore version hides them
+    connections: int | None = None
+    idle_connections: int | None = None
+    active_connections: int | None = None
+    http2_connections: int | None = None
+    in_flight: int
+    requests_total: int
+    errors_total: int
+
+
+class ModelsCacheStats(BaseModel):
+    """Read counters of the persisted model catalog and its in-memory failure cache."""
+
+    # Endpoints whose last fetch failed recently (negative entries)
+    failures: int
+    max_entries: int
+    hits: int
+    stale_hits: int
+    misses: int
+    negative_hits: int
+    evictions: int
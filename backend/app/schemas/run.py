@@ -6,7 +6,9 @@ from typing import Any, Literal
 from sqlmodel import Field, SQLModel
 
 
-RunStateType = Literal["running", "completed", "cancelled"]
+RunStateType = Literal["running", "completed", "failed", "cancelled"]
+# What happens when an SSE subscriber falls too far behind (see runs.subscribe).
+OverflowPolicy = Literal["drop", "disconnect"]
 
 
 class RunCreateResponse(SQLModel):
@@ -19,6 +21,11 @@ class RunStatus(SQLModel):
     created_at: datetime
     updated_at: datetime
 
+    # Delivery metrics for slow SSE subscribers of this run
+    dropped_events: int = 0
+    coalesced_events: int = 0
+    slow_disconnects: int = 0
+
 
 class RunEvent(SQLModel):
     """
@@ -33,3 +40,25 @@ class RunEvent(SQLModel):
     payload: Any
 
 
+class RunStats(SQLModel):
+    """
+    Snapshot of the run bus.
+    `approx_bytes` is an estimate of memory (or database space for the sqlite
+    backend) held by run states, buffered events and workflow payloads.
+    """
+
+    backend: str
+    live_runs: int
+    runs_by_state: dict[str, int]
+    subscribers: int
+    buffered_events: int
+    dropped_events: int
+    coalesced_events: int
+    slow_disconnects: int
+    approx_bytes: int
+    evicted_total: int
+    max_runs: int
+    # Background workflow tasks of this worker (see task supervisor)
+    tasks_running: int = 0
+    tasks_queued: int = 0
+    tasks_rejected: int = 0
@@ -47,6 +47,11 @@ class WorldArchitectStartRequest(BaseModel):
             "is_global_conflict_enabled", "isGlobalConflictEnabled"
         ),
     )
+    # Skip the LLM response cache (when enabled) and always call the model.
+    bypass_cache: bool = Field(
+        default=False,
+        validation_alias=AliasChoices("bypass_cache", "bypassCache"),
+    )
 
 
 class HitlOption(BaseModel):
@@ -119,3 +124,19 @@ ArchitectLLMResponse = Annotated[
 ]
 
 
+
+
+class WorldArchitectStats(BaseModel):
+    """
+    How LLM outputs were parsed: `strict`, `local_repair` (fixed without a
+    network call), `llm_repair` (model asked to fix its JSON) or `failed`, plus
+    `local_repair:<kind>` counts per repaired defect.
+    `llm_usage` sums token usage of LLM calls; `cached_prompt_tokens` were
+    served from the provider's prompt cache.
+    `llm_cache` (None unless LLM_CACHE_ENABLED) counts response cache
+    hits / misses / stores / evictions and its current size.
+    """
+
+    json_parse: dict[str, int]
+    llm_usage: dict[str, int]
+    llm_cache: dict[str, int] | None = None
@@ -0,0 +1,152 @@
+"""
+Workflow checkpoint service: persist progress of runs so they can be resumed
+by another (or a restarted) worker.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import or_, update
+from sqlmodel import Session, col, delete, select
+
+from app.models.workflow_checkpoint import WorkflowCheckpoint
+
+# Identifies this process as the owner of the checkpoints it is executing.
+WORKER_ID = uuid.uuid4().hex
+
+TERMINAL_STAGES: frozenset[str] = frozenset({"completed", "failed", "cancelled"})
+
+
+def _lease_until(lease_seconds: float) -> datetime:
+    return datetime.utcnow() + timedelta(seconds=lease_seconds)
+
+
+def create_checkpoint(
+    session: Session,
+    *,
+    run_id: str,
+    workflow: str,
+    user_id: str | None,
+    request: dict[str, Any],
+    stage: str,
+    lease_seconds: float,
+) -> None:
+    """Create the checkpoint of a new run, leased to this worker."""
+    session.add(
+        WorkflowCheckpoint(
+            run_id=run_id,
+            workflow=workflow,
+            user_id=user_id,
+            stage=stage,
+            request=request,
+            owner=WORKER_ID,
+            lease_expires_at=_lease_until(lease_seconds),
+        )
+    )
+    session.commit()
+
+
+def save_checkpoint(session: Session, run_id: str, **fields: Any) -> None:
+    """Record a completed stage. Terminal stages also release the lease."""
+    values = {**fields, "updated_at": datetime.utcnow()}
+    if fields.get("stage") in TERMINAL_STAGES:
+        values.update(owner=None, lease_expires_at=None)
+    session.exec(  # type: ignore[call-overload]
+        update(WorkflowCheckpoint)
+        .where(col(WorkflowCheckpoint.run_id) == run_id)
+        .values(**values)
+    )
+    session.commit()
+
+
+def renew_leases(session: Session, run_ids: list[str], lease_seconds: float) -> set[str]:
+    """
+    Extend this worker's leases on `run_ids`. Returns the runs still owned by
+    it; the rest were finished, cancelled or taken over elsewhere.
+    """
+    if not run_ids:
+        return set()
+    owned = (
+        col(WorkflowCheckpoint.run_id).in_(run_ids),
+        col(WorkflowCheckpoint.owner) == WORKER_ID,
+    )
+    session.exec(  # type: ignore[call-overload]
+        update(WorkflowCheckpoint)
+        .where(*owned)
+        .values(lease_expires_at=_lease_until(lease_seconds))
+    )
+    session.commit()
+    return set(session.exec(select(WorkflowCheckpoint.run_id).where(*owned)).all())
+
+
+def claim_expired(
+    session: Session, *, workflow: str, lease_seconds: float
+) -> list[WorkflowCheckpoint]:
+    """
+    Take over unfinished runs whose lease expired or was released (their worker
+    crashed or shut down). Each run is claimed with a conditional UPDATE, so
+    concurrent workers never claim the same run.
+    """
+    now = datetime.utcnow()
+    claimable = or_(
+        col(WorkflowCheckpoint.lease_expires_at).is_(None),
+        col(WorkflowCheckpoint.lease_expires_at) < now,
+    )
+    candidates = session.exec(
+        select(WorkflowCheckpoint.run_id)
+        .where(WorkflowCheckpoint.workflow == workflow)
+        .where(col(WorkflowCheckpoint.stage).not_in(TERMINAL_STAGES))
+        .where(claimable)
+    ).all()
+
+    claimed: list[str] = []
+    for run_id in candidates:
+        result = session.exec(  # type: ignore[call-overload]
+            update(WorkflowCheckpoint)
+            .where(col(WorkflowCheckpoint.run_id) == run_id)
+            .where(claimable)
+            .values(
+                owner=WORKER_ID,
+                lease_expires_at=_lease_until(lease_seconds),
+                attempt=col(WorkflowCheckpoint.attempt) + 1,
+            )
+        )
+        if result.rowcount == 1:
+            claimed.append(run_id)
+    session.commit()
+    if not claimed:
+        return []
+
+    checkpoints = list(
+        session.exec(
+            select(WorkflowCheckpoint).where(col(WorkflowCheckpoint.run_id).in_(claimed))
+        ).all()
+    )
+    # Detach fully loaded rows: they outlive this session.
+    session.expunge_all()
+    return checkpoints
+
+
+def release_leases(session: Session) -> None:
+    """Release the leases of this worker so others resume its runs right away."""
+    session.exec(  # type: ignore[call-overload]
+        update(WorkflowCheckpoint)
+        .where(col(WorkflowCheckpoint.owner) == WORKER_ID)
+        .values(owner=None, lease_expires_at=None)
+    )
+    session.commit()
+
+
+def delete_finished(session: Session, *, older_than_seconds: float) -> int:
+    """Delete checkpoints of runs that finished more than `older_than_seconds` ago."""
+    before = datetime.utcnow() - timedelta(seconds=older_than_seconds)
+    result = session.exec(  # type: ignore[call-overload]
+        delete(WorkflowCheckpoint)
+        .where(col(WorkflowCheckpoint.stage).in_(TERMINAL_STAGES))
+        .where(col(WorkflowCheckpoint.updated_at) < before)
+    )
+    session.commit()
+    return result.rowcount
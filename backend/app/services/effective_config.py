@@ -0,0 +1,153 @@
+"""
+Effective config resolver: merge a preset's config_data with the sparse
+overrides of a story and validate the result once.
+
+Resolved configs are memoized by (preset_id, preset.updated_at, story_id,
+story_config.updated_at): every update bumps `updated_at`, so a changed
+preset or story never hits a stale entry, and `invalidate()` drops the
+superseded entries right away.
+"""
+
+from __future__ import annotations
+
+import copy
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.models.config_preset import ConfigPreset
+from app.models.story import StoryConfig
+from app.schemas.config_preset import (
+    EffectiveConfig,
+    FallbackStrategy,
+    GlobalConfigSchema,
+    SamplerSettings,
+)
+
+_CacheKey = tuple[str, datetime, str | None, datetime | None]
+
+# Optional LLM blocks: (block key, model override field, enabled override field)
+_LLM_BLOCKS = (
+    ("rag", "rag_model_override", "rag_enabled_override"),
+    ("guard", "guard_model_override", "guard_enabled_override"),
+    ("storytelling", "storytelling_model_override", "storytelling_enabled_override"),
+)
+_SAMPLER_FIELDS = frozenset(SamplerSettings.model_fields)
+
+_cache: OrderedDict[_CacheKey, EffectiveConfig] = OrderedDict()
+# hits / misses / invalidations
+_counters: Counter[str] = Counter()
+
+
+def _deep_merge(base: dict[str, Any], override: dict[str, Any]) -> dict[str, Any]:
+    """`override` on top of `base`; nested dicts are merged, None values are skipped."""
+    merged = dict(base)
+    for key, value in override.items():
+        if value is None:
+            continue
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _apply_model_override(
+    config: dict[str, Any], override: dict[str, Any] | None
+) -> dict[str, Any]:
+    """Story model overrides are flat: sampler fields go to `sampler_settings`."""
+    if not override:
+        return config
+    sampler = {k: v for k, v in override.items() if k in _SAMPLER_FIELDS}
+    rest = {k: v for k, v in override.items() if k not in _SAMPLER_FIELDS}
+    return _deep_merge(config, {**rest, "sampler_settings": sampler})
+
+
+def _merge(
+    preset: ConfigPreset, story_config: StoryConfig | None, fallback: FallbackStrategy
+) -> dict[str, Any]:
+    data = copy.deepcopy(preset.config_data or {})
+
+    main = _apply_model_override(
+        data.get("main_model") or {},
+        story_config.main_model_override if story_config else None,
+    )
+    data["main_model"] = main
+    for block, model_field, enabled_field in _LLM_BLOCKS:
+        section = dict(data.get(block) or {})
+        enabled = getattr(story_config, enabled_field) if story_config else None
+        if enabled is not None:
+            section["enabled"] = enabled
+        config = section.get("config")
+        if config is None and section.get("enabled") and fallback.use_main_for_unset:
+            # Enabled block without a model of its own runs on the (story's) main model
+            config = main
+        if config is not None:
+            section["config"] = _apply_model_override(
+                config, getattr(story_config, model_field) if story_config else None
+            )
+        data[block] = section
+    if story_config and story_config.embedding_override:
+        data["embedding"] = _deep_merge(data.get("embedding") or {}, story_config.embedding_override)
+    return data
+
+
+def resolve_effective_config(
+    preset: ConfigPreset, story_config: StoryConfig | None = None
+) -> EffectiveConfig:
+    """The validated effective config of `preset` (with `story_config` overrides), memoized."""
+    key: _CacheKey = (
+        preset.id,
+        preset.updated_at,
+        story_config.story_id if story_config else None,
+        story_config.updated_at if story_config else None,
+    )
+    cached = _cache.get(key)
+    if cached is not None:
+        _cache.move_to_end(key)
+        _counters["hits"] += 1
+        return cached
+    _counters["misses"] += 1
+
+    fallback = FallbackStrategy.model_validate(preset.fallback_strategy or {})
+    merged = _merge(preset, story_config, fallback)
+    try:
+        config = GlobalConfigSchema.model_validate(merged)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Effective config is invalid: {e.errors()[:3]}",
+        ) from e
+
+    resolved = EffectiveConfig(
+        preset_id=preset.id,
+        story_id=key[2],
+        config=config,
+        fallback_strategy=fallback,
+    )
+    _cache[key] = resolved
+    while len(_cache) > settings.EFFECTIVE_CONFIG_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return resolved
+
+
+def invalidate(*, preset_id: str | None = None, story_id: str | None = None) -> None:
+    """Drop memoized configs of a changed / deleted preset or story."""
+    stale = [
+        key
+        for key in _cache
+        if (preset_id is not None and key[0] == preset_id)
+        or (story_id is not None and key[2] == story_id)
+    ]
+    for key in stale:
+        del _cache[key]
+    _counters["invalidations"] += len(stale)
+
+
+def cache_stats() -> dict[str, int]:
+    """Hit / miss / invalidation counters and size of the memo."""
+    return {**_counters, "entries": len(_cache)}
@@ -0,0 +1,128 @@
+"""
+Content-addressed cache of LLM responses in a local SQLite file.
+
+Entries are keyed by a hash of the request (model, messages, sampler params,
+response format), expire after LLM_CACHE_TTL_SECONDS and are evicted least
+recently used first once the stored responses exceed LLM_CACHE_MAX_BYTES.
+Opt-in (LLM_CACHE_ENABLED): only worth it for low-temperature calls whose
+input is resubmitted unchanged.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from collections import Counter
+from typing import Any
+
+from app.core.config import settings
+from app.core.sqlite_file import SqliteFile, write_transaction
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_llm_responses_last_access ON llm_responses (last_access);
+"""
+
+# Transport-only fields that do not change the completion
+_IGNORED_FIELDS = frozenset({"stream", "usage"})
+
+
+def cache_key(payload: dict[str, Any]) -> str:
+    """Hash of the chat completion request `payload`."""
+    canonical = json.dumps(
+        {k: v for k, v in payload.items() if k not in _IGNORED_FIELDS},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _get(conn: sqlite3.Connection, key: str, ttl_seconds: float) -> str | None:
+    now = time.time()
+    row = conn.execute(
+        "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+    ).fetchone()
+    if row is None:
+        return None
+    response, created_at = row
+    if now - created_at > ttl_seconds:
+        conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+        return None
+    conn.execute("UPDATE llm_responses SET last_access = ? WHERE key = ?", (now, key))
+    return str(response)
+
+
+def _put(
+    conn: sqlite3.Connection, key: str, response: str, ttl_seconds: float, max_bytes: int
+) -> int:
+    """Store `response`; returns the number of entries evicted to make room."""
+    now = time.time()
+    with write_transaction(conn):
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_responses (key, response, size, created_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, response, len(response.encode()), now, now),
+        )
+        evicted = conn.execute(
+            "DELETE FROM llm_responses WHERE created_at < ?", (now - ttl_seconds,)
+        ).rowcount
+        # Keep the most recently used entries that fit into `max_bytes`.
+        evicted += conn.execute(
+            "DELETE FROM llm_responses WHERE key IN ("
+            "SELECT key FROM ("
+            "SELECT key, SUM(size) OVER (ORDER BY last_access DESC, key) AS total "
+            "FROM llm_responses"
+            ") WHERE total > ?)",
+            (max_bytes,),
+        ).rowcount
+    return evicted
+
+
+def _size(conn: sqlite3.Connection) -> tuple[int, int]:
+    return conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses"
+    ).fetchone()
+
+
+class LlmResponseCache:
+    """On-disk LLM response cache; one connection per process, used from worker threads."""
+
+    def __init__(self, path: str, *, max_bytes: int, ttl_seconds: float) -> None:
+        self._db = SqliteFile(path, _SCHEMA)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # hits / misses / stores / evictions
+        self._counters: Counter[str] = Counter()
+
+    async def get(self, key: str) -> str | None:
+        response = await self._db.call(_get, key, self.ttl_seconds)
+        self._counters["hits" if response is not None else "misses"] += 1
+        return response
+
+    async def put(self, key: str, response: str) -> None:
+        evicted = await self._db.call(_put, key, response, self.ttl_seconds, self.max_bytes)
+        self._counters["stores"] += 1
+        self._counters["evictions"] += evicted
+
+    async def stats(self) -> dict[str, int]:
+        entries, size = await self._db.call(_size)
+        return {**self._counters, "entries": entries, "bytes": size}
+
+    def close(self) -> None:
+        self._db.close()
+
+
+llm_cache = LlmResponseCache(
+    settings.LLM_CACHE_PATH,
+    max_bytes=settings.LLM_CACHE_MAX_BYTES,
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,199 @@
+"""
+Helpers for JSON produced by LLMs: incremental scanning and local repair of
+the usual defects (markdown fences / prose around the object, trailing commas,
+raw newlines inside strings, truncated output), so a network round-trip asking
+the model to "fix JSON" is only needed for what cannot be repaired here.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any
+
+_SPECIAL_RE = re.compile(r'[{}\[\]",:\\\n\r\t]')
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+_CLOSERS = {"{": "}", "[": "]"}
+_PARTIAL_LITERAL_RE = re.compile(r"(?<![\w.])(t|tr|tru|f|fa|fal|fals|n|nu|nul)$")
+_LITERALS = {"t": "true", "f": "false", "n": "null"}
+
+
+class JsonObjectScanner:
+    """
+    Incrementally tracks the first top-level JSON object in streamed text.
+
+    Only structural characters are inspected (one regex pass per chunk), so
+    the end of the object is known the moment its closing brace arrives,
+    without re-parsing the accumulated text. Defects are recorded as edits on
+    the fly and applied by `finish()`; `repairs` names the kinds applied.
+    """
+
+    def __init__(self) -> None:
+        self._parts: list[str] = []
+        self._length = 0
+        self._start: int | None = None
+        self._end: int | None = None
+        # Closers of the open containers, innermost last.
+        self._stack: list[str] = []
+        self._in_string = False
+        self._string_is_key = False
+        self._expect_key = False
+        # Absolute index of a character escaped by a preceding backslash.
+        self._escaped_at = -1
+        # Comma outside strings with nothing but whitespace after it so far.
+        self._pending_comma: int | None = None
+        # Key string closed but no `:` seen yet.
+        self._dangling_key = False
+        # (position, length to delete, replacement), in increasing position order.
+        self._edits: list[tuple[int, int, str]] = []
+        self.repairs: list[str] = []
+
+    @property
+    def complete(self) -> bool:
+        return self._end is not None
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def _repair(self, kind: str) -> None:
+        if kind not in self.repairs:
+            self.repairs.append(kind)
+
+    def _gap(self, segment: str) -> None:
+        """Non-structural text outside strings between two structural characters."""
+        if segment.strip():
+            self._pending_comma = None
+            self._dangling_key = False
+
+    def feed(self, chunk: str) -> bool:
+        """Consume the next chunk; returns True once the object is complete."""
+        base = self._length
+        self._parts.append(chunk)
+        self._length += len(chunk)
+        if self._end is not None:
+            return True
+
+        prev = 0
+        for m in _SPECIAL_RE.finditer(chunk):
+            pos = base + m.start()
+            ch = m.group()
+            if self._in_string:
+                if pos == self._escaped_at:
+                    continue
+                if ch == "\\":
+                    self._escaped_at = pos + 1
+                elif ch == '"':
+                    self._in_string = False
+                    self._dangling_key = self._string_is_key
+                    prev = m.end()
+                elif ch in _CONTROL_ESCAPES:
+                    self._edits.append((pos, 1, _CONTROL_ESCAPES[ch]))
+                    self._repair("control_char_in_string")
+                continue
+
+            if self._start is None:
+                if ch == "{":
+                    self._start = pos
+                    self._stack.append("}")
+                    self._expect_key = True
+                    prev = m.end()
+                continue
+
+            self._gap(chunk[prev : m.start()])
+            prev = m.end()
+            if ch == '"':
+                self._in_string = True
+                self._string_is_key = self._expect_key
+                self._pending_comma = None
+            elif ch in "{[":
+                self._stack.append(_CLOSERS[ch])
+                self._expect_key = ch == "{"
+                self._pending_comma = None
+            elif ch in "}]":
+                if self._pending_comma is not None:
+                    self._edits.append((self._pending_comma, 1, ""))
+                    self._repair("trailing_comma")
+                    self._pending_comma = None
+                if self._stack:
+                    self._stack.pop()
+                self._dangling_key = False
+                if not self._stack:
+                    self._end = pos + 1
+                    return True
+            elif ch == ",":
+                self._pending_comma = pos
+                self._expect_key = bool(self._stack) and self._stack[-1] == "}"
+                self._dangling_key = False
+            elif ch == ":":
+                self._expect_key = False
+                self._dangling_key = False
+                self._pending_comma = None
+            # Whitespace control chars outside strings need nothing.
+        if not self._in_string and self._start is not None:
+            self._gap(chunk[prev:])
+        return False
+
+    def finish(self) -> str:
+        """
+        The object with all recorded repairs applied; a truncated object is
+        closed (open string, dangling key / comma / partial literal, brackets).
+        Raises ValueError if no object was found at all.
+        """
+        if self._start is None:
+            raise ValueError("No JSON object found")
+        text = self.text
+        end = self._end if self._end is not None else len(text)
+        if self._start > 0 or text[end:].strip():
+            self._repair("surrounding_text")
+
+        out: list[str] = []
+        cursor = self._start
+        for pos, length, replacement in self._edits:
+            out.append(text[cursor:pos])
+            out.append(replacement)
+            cursor = pos + length
+        out.append(text[cursor:end])
+        if self._end is not None:
+            return "".join(out)
+
+        self._repair("truncated")
+        body = "".join(out)
+        if self._in_string:
+            if self._escaped_at == len(text):
+                body = body[:-1]  # dangling backslash
+            body += '"'
+            dangling_key = self._string_is_key
+        else:
+            dangling_key = self._dangling_key
+            body = body.rstrip()
+            m = _PARTIAL_LITERAL_RE.search(body)
+            if m:
+                body = body[: m.start()] + _LITERALS[m.group()[0]]
+            elif body.endswith(","):
+                body = body[:-1]
+            elif body.endswith(":"):
+                body += " null"
+        if dangling_key:
+            body += ": null"
+        return body + "".join(reversed(self._stack))
+
+
+def loads_tolerant(text: str) -> tuple[Any, list[str]]:
+    """
+    Parse the JSON object in LLM output. Returns (value, repairs) where
+    `repairs` lists the local fixes that were needed (empty for valid JSON).
+    Raises ValueError if the text cannot be repaired locally.
+    """
+    stripped = text.strip()
+    if stripped.startswith("{"):
+        try:
+            return json.loads(stripped), []
+        except json.JSONDecodeError:
+            pass
+    scanner = JsonObjectScanner()
+    scanner.feed(text)
+    return json.loads(scanner.finish()), scanner.repairs
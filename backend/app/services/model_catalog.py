@@ -0,0 +1,210 @@
+"""
+Model catalog service: persist provider model lists and query them with
+filtering, search and pagination in the database.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_, tuple_
+from sqlmodel import Session, col, delete, select
+
+from app.models.model_catalog import ModelCatalogEntry, ModelCatalogSource
+from app.models.provider import ModelType, ProviderType
+from app.schemas.provider import ProviderModelInfo
+
+
+def _content_hash(models: list[ProviderModelInfo]) -> str:
+    canonical = json.dumps(
+        sorted((m.model_dump(mode="json") for m in models), key=lambda m: m["id"]),
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+def get_source(
+    session: Session, provider: ProviderType, source: str
+) -> ModelCatalogSource | None:
+    """Refresh state of a catalog; None if it was never stored."""
+    state = session.get(ModelCatalogSource, (provider, source))
+    if state is not None:
+        session.expunge(state)
+    return state
+
+
+def _prune_sources(
+    session: Session,
+    *,
+    before: datetime | None,
+    max_sources: int | None,
+    keep: tuple[ProviderType, str],
+) -> None:
+    """
+    Delete the catalogs last refreshed before `before` and those beyond `max_sources`,
+    least recently refreshed first (`keep` is about to be stored and counts as
+    the most recent one).
+    """
+    key = tuple_(col(ModelCatalogSource.provider), col(ModelCatalogSource.source))
+    sources = select(ModelCatalogSource.provider, ModelCatalogSource.source)
+    victims: set[tuple[ProviderType, str]] = set()
+    if before is not None:
+        victims.update(session.exec(sources.where(col(ModelCatalogSource.refreshed_at) < before)))
+    if max_sources is not None:
+        victims.update(
+            session.exec(
+                sources.where(key != tuple_(*keep))
+                .order_by(col(ModelCatalogSource.refreshed_at).desc())
+                .offset(max(max_sources - 1, 0))
+            )
+        )
+    if not victims:
+        return
+    victims_list = list(victims)
+    session.exec(  # type: ignore[call-overload]
+        delete(ModelCatalogEntry).where(
+            tuple_(col(ModelCatalogEntry.provider), col(ModelCatalogEntry.source)).in_(
+                victims_list
+            )
+        )
+    )
+    session.exec(delete(ModelCatalogSource).where(key.in_(victims_list)))  # type: ignore[call-overload]
+
+
+def store_models(
+    session: Session,
+    provider: ProviderType,
+    source: str,
+    models: list[ProviderModelInfo],
+    *,
+    prune_after_seconds: float | None = None,
+    max_sources: int | None = None,
+) -> ModelCatalogSource:
+    """
+    Replace the stored catalog of (provider, source) with `models`. Rows are only
+    rewritten when the list changed; otherwise just the refresh time is bumped.
+
+    With `prune_after_seconds`, catalogs of any source not refreshed for that
+    long (e.g. an old API key or a removed custom endpoint) are deleted too;
+    with `max_sources`, so are the least recently refreshed ones beyond that many.
+    """
+    if prune_after_seconds is not None or max_sources is not None:
+        _prune_sources(
+            session,
+            before=(
+                datetime.utcnow() - timedelta(seconds=prune_after_seconds)
+                if prune_after_seconds is not None
+                else None
+            ),
+            max_sources=max_sources,
+            keep=(provider, source),
+        )
+    etag = _content_hash(models)
+    state = session.get(ModelCatalogSource, (provider, source))
+    if state is None or state.etag != etag:
+        session.exec(  # type: ignore[call-overload]
+            delete(ModelCatalogEntry)
+            .where(col(ModelCatalogEntry.provider) == provider)
+            .where(col(ModelCatalogEntry.source) == source)
+        )
+        # Providers may list a model twice; the catalog keeps the first entry.
+        unique = {m.id: m for m in reversed(models)}
+        session.add_all(
+            ModelCatalogEntry(
+                provider=provider,
+                source=source,
+                model_id=m.id,
+                name=m.name,
+                model_type=m.model_type,
+                context_length=m.context_length,
+                description=m.description,
+                supported_parameters=m.supported_parameters,
+            )
+            for m in unique.values()
+        )
+    if state is None:
+        state = ModelCatalogSource(provider=provider, source=source, etag=etag)
+        session.add(state)
+    else:
+        state.etag = etag
+        state.refreshed_at = datetime.utcnow()
+    session.commit()
+    session.refresh(state)
+    session.expunge(state)
+    return state
+
+
+def _to_info(row: ModelCatalogEntry) -> ProviderModelInfo:
+    return ProviderModelInfo(
+        id=row.model_id,
+        name=row.name,
+        provider=row.provider,
+        model_type=row.model_type,
+        context_length=row.context_length,
+        description=row.description,
+        supported_parameters=row.supported_parameters,
+    )
+
+
+def get_model(
+    session: Session, provider: ProviderType, source: str, model_id: str
+) -> ProviderModelInfo | None:
+    """One model of the stored catalog of (provider, source)."""
+    row = session.exec(
+        select(ModelCatalogEntry)
+        .where(col(ModelCatalogEntry.provider) == provider)
+        .where(col(ModelCatalogEntry.source) == source)
+        .where(col(ModelCatalogEntry.model_id) == model_id)
+    ).first()
+    return _to_info(row) if row is not None else None
+
+
+def _escape_like(q: str) -> str:
+    return q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_models(
+    session: Session,
+    provider: ProviderType,
+    source: str,
+    *,
+    model_type: ModelType | None = None,
+    q: str | None = None,
+    offset: int = 0,
+    limit: int | None = None,
+) -> tuple[list[ProviderModelInfo], int]:
+    """
+    Models of (provider, source) ordered by name, optionally filtered by type
+    and a case-insensitive substring of the id or name. Returns (page, total).
+    """
+    conditions = [
+        col(ModelCatalogEntry.provider) == provider,
+        col(ModelCatalogEntry.source) == source,
+    ]
+    if model_type is not None:
+        conditions.append(col(ModelCatalogEntry.model_type) == model_type)
+    if q:
+        pattern = f"%{_escape_like(q.strip())}%"
+        conditions.append(
+            or_(
+                col(ModelCatalogEntry.name).ilike(pattern, escape="\\"),
+                col(ModelCatalogEntry.model_id).ilike(pattern, escape="\\"),
+            )
+        )
+
+    total = session.exec(
+        select(func.count()).select_from(ModelCatalogEntry).where(*conditions)
+    ).one()
+    query = (
+        select(ModelCatalogEntry)
+        .where(*conditions)
+        .order_by(col(ModelCatalogEntry.name), col(ModelCatalogEntry.model_id))
+        .offset(offset)
+    )
+    if limit is not None:
+        query = query.limit(limit)
+
+    return [_to_info(row) for row in session.exec(query).all()], total
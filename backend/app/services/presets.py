@@ -6,10 +6,13 @@ from datetime import datetime
 from typing import Iterable
 
 from fastapi import HTTPException, status
-from sqlmodel import Session, select
+from sqlalchemy import delete, exists, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
 from app.models.config_preset import ConfigPreset
+from app.models.story import Story
 from app.models.provider import ProviderType, TokenSelectionStrategy
 from app.schemas.config_preset import (
     ConfigPresetCreate,
@@ -22,15 +25,16 @@ from app.schemas.config_preset import (
     StorytellingConfig,
     SamplerSettings,
 )
+from app.services import effective_config
 
 
-def create_preset(
-    session: Session, user_id: str, payload: ConfigPresetCreate
+async def create_preset(
+    session: AsyncSession, user_id: str, payload: ConfigPresetCreate
 ) -> ConfigPreset:
     """Create a new configuration preset."""
     # If this is set as default, unset other defaults
     if payload.is_default:
-        _unset_other_defaults(session, user_id)
+        await _unset_other_defaults(session, user_id)
 
     preset = ConfigPreset(
         user_id=user_id,
@@ -41,26 +45,31 @@ def create_preset(
         fallback_strategy=payload.fallback_strategy.model_dump(),
     )
     session.add(preset)
-    session.commit()
-    session.refresh(preset)
+    await session.commit()
     return preset
 
 
-def list_presets(session: Session, user_id: str) -> Iterable[ConfigPreset]:
+async def list_presets(session: AsyncSession, user_id: str) -> Iterable[ConfigPreset]:
     """List all presets for a user."""
-    return session.exec(
-        select(ConfigPreset)
-        .where(ConfigPreset.user_id == user_id)
-        .order_by(ConfigPreset.created_at)
+    return (
+        await session.exec(
+            select(ConfigPreset)
+            .where(ConfigPreset.user_id == user_id)
+            .order_by(ConfigPreset.created_at)
+        )
     ).all()
 
 
-def get_preset(session: Session, user_id: str, preset_id: str) -> ConfigPreset:
+async def get_preset(
+    session: AsyncSession, user_id: str, preset_id: str
+) -> ConfigPreset:
     """Get a specific preset."""
-    preset = session.exec(
-        select(ConfigPreset)
-        .where(ConfigPreset.id == preset_id)
-        .where(ConfigPreset.user_id == user_id)
+    preset = (
+        await session.exec(
+            select(ConfigPreset)
+            .where(ConfigPreset.id == preset_id)
+            .where(ConfigPreset.user_id == user_id)
+        )
     ).first()
     if not preset:
         raise HTTPException(
@@ -70,25 +79,23 @@ def get_preset(session: Session, user_id: str, preset_id: str) -> ConfigPreset:
     return preset
 
 
-def get_default_preset(session: Session, user_id: str) -> ConfigPreset | None:
+async def get_default_preset(
+    session: AsyncSession, user_id: str
+) -> ConfigPreset | None:
     """Get the default preset for a user."""
-    return session.exec(
-        select(ConfigPreset)
-        .where(ConfigPreset.user_id == user_id)
-        .where(ConfigPreset.is_default == True)
+    return (
+        await session.exec(
+            select(ConfigPreset)
+            .where(ConfigPreset.user_id == user_id)
+            .where(ConfigPreset.is_default == True)
+        )
     ).first()
 
 
-def update_preset(
-    session: Session, user_id: str, preset_id: str, payload: ConfigPresetUpdate
+async def update_preset(
+    session: AsyncSession, user_id: str, preset_id: str, payload: ConfigPresetUpdate
 ) -> ConfigPreset:
     """Update a preset."""
-    preset = get_preset(session, user_id, preset_id)
-
-    # Handle default flag
-    if payload.is_default is True:
-        _unset_other_defaults(session, user_id, exclude_id=preset_id)
-
     update_data = payload.model_dump(exclude_unset=True)
 
     # Handle config_data separately - convert to dict if it's a Pydantic model
@@ -101,24 +108,50 @@ def update_preset(
         if hasattr(update_data["fallback_strategy"], "model_dump"):
             update_data["fallback_strategy"] = update_data["fallback_strategy"].model_dump()
 
-    for key, value in update_data.items():
-        setattr(preset, key, value)
+    preset = await session.scalar(
+        update(ConfigPreset)
+        .where(ConfigPreset.id == preset_id)
+        .where(ConfigPreset.user_id == user_id)
+        .values(**update_data, updated_at=datetime.utcnow())
+        .returning(ConfigPreset)
+    )
+    if preset is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Preset not found",
+        )
+
+    # Handle default flag
+    if payload.is_default is True:
+        await _unset_other_defaults(session, user_id, exclude_id=preset_id)
 
-    preset.updated_at = datetime.utcnow()
-    session.add(preset)
-    session.commit()
-    session.refresh(preset)
+    await session.commit()
+    effective_config.invalidate(preset_id=preset_id)
     return preset
 
 
-def delete_preset(session: Session, user_id: str, preset_id: str) -> None:
-    """Delete a preset."""
-    preset = get_preset(session, user_id, preset_id)
-    session.delete(preset)
-    session.commit()
+async def delete_preset(session: AsyncSession, user_id: str, preset_id: str) -> None:
+    """Delete a preset that no story uses."""
+    result = await session.execute(
+        delete(ConfigPreset)
+        .where(ConfigPreset.id == preset_id)
+        .where(ConfigPreset.user_id == user_id)
+        .where(~exists().where(Story.preset_id == preset_id))
+    )
+    if result.rowcount == 0:
+        # Failure path only: tell a missing preset from one still in use
+        await get_preset(session, user_id, preset_id)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Preset is used by stories",
+        )
+    await session.commit()
+    effective_config.invalidate(preset_id=preset_id)
 
 
-def create_default_preset_structure(session: Session, user_id: str) -> ConfigPreset:
+async def create_default_preset_structure(
+    session: AsyncSession, user_id: str
+) -> ConfigPreset:
     """Create a default preset structure with necessary model configs."""
     # Create default config_data structure
     default_llm_model_id = settings.openrouter_main_model or "openai/gpt-4o-mini"
@@ -207,23 +240,19 @@ def create_default_preset_structure(session: Session, user_id: str) -> ConfigPre
         config_data=default_config_data,
     )
 
-    return create_preset(session, user_id, preset_payload)
+    return await create_preset(session, user_id, preset_payload)
 
 
-def _unset_other_defaults(
-    session: Session, user_id: str, exclude_id: str | None = None
+async def _unset_other_defaults(
+    session: AsyncSession, user_id: str, exclude_id: str | None = None
 ) -> None:
     """Unset is_default for all other presets."""
-    query = select(ConfigPreset).where(
-        ConfigPreset.user_id == user_id,
-        ConfigPreset.is_default == True,
+    query = (
+        update(ConfigPreset)
+        .where(ConfigPreset.user_id == user_id)
+        .where(ConfigPreset.is_default == True)
+        .values(is_default=False)
     )
     if exclude_id:
         query = query.where(ConfigPreset.id != exclude_id)
-
-    for preset in session.exec(query).all():
-        preset.is_default = False
-        session.add(preset)
-
-
-
+    await session.execute(query)
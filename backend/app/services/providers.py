@@ -2,32 +2,139 @@
 Provider service for fetching and caching model lists from LLM providers.
 """
 
+import asyncio
+import hashlib
+import logging
 import time
-from dataclasses import dataclass, field
-from typing import Any
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Hashable
 
 import httpx
+from fastapi import HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
+from app.core.crypto import CryptoError
+from app.core.database import async_session, run_in_session
+from app.core.http_client import http_clients
 from app.models.provider import ModelType, ProviderType, PROVIDER_CAPABILITIES
-from app.schemas.provider import ProviderInfo, ProviderModelInfo, ProviderModelsResponse
+from app.schemas.provider import (
+    HttpPoolStats,
+    ModelDiscoveryResponse,
+    ModelsCacheStats,
+    ProviderDiscoveryResult,
+    ProviderInfo,
+    ProviderModelInfo,
+    ProviderModelsResponse,
+)
+from app.services import model_catalog
+from app.services import presets as preset_service
+from app.services import tokens as token_service
 
+logger = logging.getLogger(__name__)
 
-@dataclass
-class CacheEntry:
-    """Cache entry with TTL."""
 
-    data: list[ProviderModelInfo]
-    timestamp: float
-    ttl: int = field(default_factory=lambda: settings.MODEL_CACHE_TTL)
+class ProviderUnavailableError(Exception):
+    """Fetching a provider's model list failed (unreachable, HTTP error, bad base_url)."""
 
-    def is_expired(self) -> bool:
-        return time.time() - self.timestamp > self.ttl
 
+# (provider, base_url, credential fingerprint)
+ModelsCacheKey = tuple[ProviderType, str | None, str]
 
-# In-memory cache for provider models
-# Key is (ProviderType, base_url)
-_models_cache: dict[tuple[ProviderType, str | None], CacheEntry] = {}
+
+def credential_fingerprint(api_key: str | None) -> str:
+    """Short, non-reversible id of an API key ("" for none) to key caches by."""
+    if not api_key:
+        return ""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+class ModelsCache:
+    """
+    Bookkeeping of the model catalog: recent fetch failures (negative
+    entries, bounded to `max_entries` least recently failed) so an unreachable
+    endpoint is not retried on every call, and hit / miss counters of reads.
+    The model lists themselves live in the persisted catalog only.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        # key -> time the failure stops being cached
+        self._failures: OrderedDict[ModelsCacheKey, float] = OrderedDict()
+        # hits / stale_hits / misses / negative_hits / evictions
+        self.counters: Counter[str] = Counter()
+
+    def failed_recently(self, key: ModelsCacheKey) -> bool:
+        until = self._failures.get(key)
+        if until is None:
+            return False
+        if time.time() >= until:
+            del self._failures[key]
+            return False
+        return True
+
+    def put_failure(self, key: ModelsCacheKey, ttl: float) -> None:
+        self._failures[key] = time.time() + ttl
+        self._failures.move_to_end(key)
+        while len(self._failures) > self.max_entries:
+            self._failures.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def forget_failure(self, key: ModelsCacheKey) -> None:
+        self._failures.pop(key, None)
+
+    def clear(self, provider: ProviderType | None = None) -> None:
+        for key in [k for k in self._failures if provider is None or k[0] == provider]:
+            del self._failures[key]
+
+    def stats(self) -> ModelsCacheStats:
+        return ModelsCacheStats(
+            failures=len(self._failures),
+            max_entries=self.max_entries,
+            hits=self.counters["hits"],
+            stale_hits=self.counters["stale_hits"],
+            misses=self.counters["misses"],
+            negative_hits=self.counters["negative_hits"],
+            evictions=self.counters["evictions"],
+        )
+
+
+# Fetch failures and read counters of the model catalog
+_models_cache = ModelsCache(settings.MODEL_CACHE_MAX_ENTRIES)
+
+# Catalog source of the full OpenRouter model list with capabilities, fetched
+# from the API even when the exposed model list comes from env.
+_OPENROUTER_CAPABILITIES_SOURCE = "#capabilities"
+
+# Fetches in progress, so concurrent cache misses share one upstream request.
+_inflight: dict[Hashable, asyncio.Task[list[ProviderModelInfo]]] = {}
+
+
+def _single_flight(
+    key: Hashable, fetch: Callable[[], Awaitable[list[ProviderModelInfo]]]
+) -> asyncio.Task[list[ProviderModelInfo]]:
+    """The in-flight fetch for `key`, starting `fetch()` if there is none."""
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch())
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _fetch_done(key, t))
+    return task
+
+
+def _fetch_done(key: Hashable, task: asyncio.Task[list[ProviderModelInfo]]) -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if task.cancelled():
+        return
+    exc = task.exception()
+    # Retrieved here so background refreshes that fail do not go unnoticed;
+    # failures still being cached (no underlying error) were logged already.
+    if exc is not None and (
+        exc.__cause__ is not None or not isinstance(exc, ProviderUnavailableError)
+    ):
+        logger.warning("Fetching models for %s failed: %s", key, exc)
 
 
 def get_providers() -> list[ProviderInfo]:
@@ -102,19 +209,20 @@ async def fetch_openrouter_models(api_key: str | None = None) -> list[ProviderMo
                 for m in env_models
             ]
 
+    return await fetch_openrouter_catalog(api_key)
+
+
+async def fetch_openrouter_catalog(api_key: str | None = None) -> list[ProviderModelInfo]:
+    """Fetch all models (with their supported parameters) from OpenRouter API."""
     headers = {}
     token = api_key or (settings.OPENROUTER_API_KEY or None)
     if token:
         headers["Authorization"] = f"Bearer {token}"
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{settings.OPENROUTER_BASE_URL}/models",
-            headers=headers,
-            timeout=30.0,
-        )
-        response.raise_for_status()
-        data = response.json()
+    url = f"{settings.OPENROUTER_BASE_URL}/models"
+    response = await http_clients.get(url).get(url, headers=headers, timeout=30.0)
+    response.raise_for_status()
+    data = response.json()
 
     models: list[ProviderModelInfo] = []
     for model in data.get("data", []):
@@ -139,12 +247,62 @@ async def fetch_openrouter_models(api_key: str | None = None) -> list[ProviderMo
                 model_type=model_type,
                 context_length=model.get("context_length"),
                 description=model.get("description"),
+                supported_parameters=list(model.get("supported_parameters") or []),
             )
         )
 
     return models
 
 
+async def _refresh_openrouter_capabilities() -> list[ProviderModelInfo]:
+    """Fetch the full OpenRouter catalog and store it as the capabilities source."""
+    cache_key = (ProviderType.OPENROUTER, _OPENROUTER_CAPABILITIES_SOURCE, "")
+    if _models_cache.failed_recently(cache_key):
+        _models_cache.counters["negative_hits"] += 1
+        raise ProviderUnavailableError("OpenRouter catalog failed recently, not retrying yet")
+    try:
+        models = await fetch_openrouter_catalog()
+    except (httpx.HTTPError, ValueError) as e:
+        _models_cache.put_failure(cache_key, settings.MODEL_CACHE_NEGATIVE_TTL)
+        raise ProviderUnavailableError(f"Fetching the OpenRouter catalog failed: {e}") from e
+    _models_cache.forget_failure(cache_key)
+    await run_in_session(
+        model_catalog.store_models,
+        ProviderType.OPENROUTER,
+        _OPENROUTER_CAPABILITIES_SOURCE,
+        models,
+        prune_after_seconds=settings.MODEL_CATALOG_SOURCE_TTL,
+        max_sources=settings.MODEL_CATALOG_MAX_SOURCES,
+    )
+    return models
+
+
+async def get_openrouter_supported_parameters(model_id: str) -> set[str] | None:
+    """
+    Request parameters `model_id` supports per the persisted OpenRouter catalog.
+    None if that is unknown: the model is not listed or there is no catalog yet.
+
+    Never waits for the network (it runs before every LLM call): a missing or
+    expired catalog is refreshed in the background and used once stored.
+    """
+    state = await run_in_session(
+        model_catalog.get_source, ProviderType.OPENROUTER, _OPENROUTER_CAPABILITIES_SOURCE
+    )
+    if state is None or datetime.utcnow() - state.refreshed_at > timedelta(
+        seconds=settings.MODEL_CACHE_TTL
+    ):
+        _single_flight(("catalog", "openrouter_capabilities"), _refresh_openrouter_capabilities)
+    if state is None:
+        return None
+    model = await run_in_session(
+        model_catalog.get_model,
+        ProviderType.OPENROUTER,
+        _OPENROUTER_CAPABILITIES_SOURCE,
+        model_id,
+    )
+    return set(model.supported_parameters) if model is not None else None
+
+
 async def fetch_ollama_models() -> list[ProviderModelInfo]:
     """Fetch models from local Ollama instance."""
     # Prefer env-managed embedding model (current mode). If empty -> fallback to /api/tags.
@@ -161,19 +319,11 @@ async def fetch_ollama_models() -> list[ProviderModelInfo]:
             )
         ]
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{settings.OLLAMA_BASE_URL}/api/tags",
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            data = response.json()
-    except httpx.ConnectError:
-        # Ollama not running locally
-        return []
-    except httpx.HTTPError:
-        return []
+    url = f"{settings.OLLAMA_BASE_URL}/api/tags"
+    # Connect errors (Ollama not running locally) propagate: callers cache the failure
+    response = await http_clients.get(url).get(url, timeout=10.0)
+    response.raise_for_status()
+    data = response.json()
 
     models: list[ProviderModelInfo] = []
     for model in data.get("models", []):
@@ -212,17 +362,10 @@ async def fetch_openai_compatible_models(base_url: str, api_key: str | None = No
 
     url = base_url.rstrip("/") + "/models"
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                url,
-                headers=headers,
-                timeout=30.0,
-            )
-            response.raise_for_status()
-            data = response.json()
-    except httpx.HTTPError:
-        return []
+    # ValueError: base_url is not an absolute URL
+    response = await http_clients.get(url).get(url, headers=headers, timeout=30.0)
+    response.raise_for_status()
+    data = response.json()
 
     models: list[ProviderModelInfo] = []
     for model in data.get("data", []):
@@ -250,70 +393,285 @@ async def fetch_openai_compatible_models(base_url: str, api_key: str | None = No
     return models
 
 
-async def get_provider_models(
+async def _refresh_models(
+    provider: ProviderType,
+    api_key: str | None,
+    base_url: str | None,
+    force: bool = False,
+) -> list[ProviderModelInfo]:
+    """
+    Fetch a fresh model list. Raises ProviderUnavailableError if the fetch
+    fails, or failed less than MODEL_CACHE_NEGATIVE_TTL ago (unless `force`).
+    """
+    cache_key = (provider, base_url, credential_fingerprint(api_key))
+    if not force and _models_cache.failed_recently(cache_key):
+        _models_cache.counters["negative_hits"] += 1
+        raise ProviderUnavailableError(f"{provider.value} failed recently, not retrying yet")
+
+    models: list[ProviderModelInfo] = []
+    try:
+        if provider == ProviderType.OPENROUTER:
+            models = await fetch_openrouter_models(api_key)
+        elif provider == ProviderType.OLLAMA:
+            models = await fetch_ollama_models()
+        elif provider == ProviderType.OPENAI_COMPATIBLE:
+            if base_url:
+                models = await fetch_openai_compatible_models(base_url, api_key)
+            else:
+                # If no base_url provided for OpenAI Compatible, we can't fetch models
+                models = []
+    except (httpx.HTTPError, ValueError) as e:
+        _models_cache.put_failure(cache_key, settings.MODEL_CACHE_NEGATIVE_TTL)
+        raise ProviderUnavailableError(f"Fetching {provider.value} models failed: {e}") from e
+
+    _models_cache.forget_failure(cache_key)
+    return models
+
+
+def _catalog_source(base_url: str | None, api_key: str | None) -> str:
+    """Catalog source of a model list: base_url plus the fingerprint of a user-supplied key."""
+    fingerprint = credential_fingerprint(api_key)
+    return f"{base_url or ''}#{fingerprint}" if fingerprint else base_url or ""
+
+
+async def _refresh_catalog(
+    provider: ProviderType,
+    api_key: str | None,
+    base_url: str | None,
+    force: bool = False,
+) -> list[ProviderModelInfo]:
+    """Fetch fresh data and store it in the persisted model catalog."""
+    models = await _refresh_models(provider, api_key, base_url, force)
+    await run_in_session(
+        model_catalog.store_models,
+        provider,
+        _catalog_source(base_url, api_key),
+        models,
+        prune_after_seconds=settings.MODEL_CATALOG_SOURCE_TTL,
+        max_sources=settings.MODEL_CATALOG_MAX_SOURCES,
+    )
+    return models
+
+
+def _response_etag(catalog_etag: str, *parts: object) -> str:
+    digest = hashlib.sha256("|".join(map(str, (catalog_etag, *parts))).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip().removeprefix("W/") for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+async def get_catalog_models(
     provider: ProviderType,
     api_key: str | None = None,
     base_url: str | None = None,
+    *,
+    model_type: ModelType | None = None,
+    q: str | None = None,
+    offset: int = 0,
+    limit: int | None = None,
     force_refresh: bool = False,
-) -> ProviderModelsResponse:
+    if_none_match: str | None = None,
+) -> tuple[ProviderModelsResponse | None, str]:
     """
-    Get models for a provider with caching.
-
-    Args:
-        provider: The provider to get models for
-        api_key: Optional API key for authenticated requests
-        base_url: Optional base URL for custom providers
-        force_refresh: Force refresh the cache
-
-    Returns:
-        ProviderModelsResponse with list of models
+    A page of models from the persisted catalog, plus its ETag.
+
+    The catalog of (provider, base_url) is fetched on first use and refreshed
+    in the background once older than MODEL_CACHE_TTL (fetched inline once
+    older than MODEL_CACHE_TTL + MODEL_CACHE_STALE_TTL or with
+    `force_refresh`). If the provider cannot be reached, stored models are
+    served as stale, or an empty list if there are none. Returns
+    (None, etag) if `if_none_match` matches, i.e. the client already has this page.
     """
-    # Check cache
-    cache_key = (provider, base_url)
-    cached = _models_cache.get(cache_key)
-    if cached and not cached.is_expired() and not force_refresh:
+    source = _catalog_source(base_url, api_key)
+    state = await run_in_session(model_catalog.get_source, provider, source)
+    key = ("catalog", provider, source)
+    refresh = lambda: _refresh_catalog(provider, api_key, base_url, force_refresh)  # noqa: E731
+    cached = state is not None and not force_refresh
+    stale = False
+    error: str | None = None
+    if state is not None and cached:
+        age = datetime.utcnow() - state.refreshed_at
+        ttl = timedelta(seconds=settings.MODEL_CACHE_TTL)
+        if age > ttl + timedelta(seconds=settings.MODEL_CACHE_STALE_TTL):
+            cached = False
+        elif age > ttl:
+            stale = True
+            _models_cache.counters["stale_hits"] += 1
+            _single_flight(key, refresh)
+        else:
+            _models_cache.counters["hits"] += 1
+    if not cached:
+        _models_cache.counters["misses"] += 1
+        try:
+            await asyncio.shield(_single_flight(key, refresh))
+            state = await run_in_session(model_catalog.get_source, provider, source)
+        except ProviderUnavailableError as e:
+            stale, error = state is not None, str(e)
+    if state is None:
         return ProviderModelsResponse(
+            provider=provider, models=[], total=0, error=error
+        ), _response_etag("unavailable", provider.value, source)
+
+    etag = _response_etag(state.etag, provider.value, source, model_type, q, offset, limit)
+    if _etag_matches(if_none_match, etag):
+        return None, etag
+
+    models, total = await run_in_session(
+        model_catalog.search_models,
+        provider,
+        source,
+        model_type=model_type,
+        q=q,
+        offset=offset,
+        limit=limit,
+    )
+    return (
+        ProviderModelsResponse(
             provider=provider,
-            models=cached.data,
-            cached=True,
-        )
+            models=models,
+            cached=cached,
+            stale=stale,
+            total=total,
+            error=error,
+        ),
+        etag,
+    )
 
-    # Fetch fresh data
-    models: list[ProviderModelInfo] = []
 
-    if provider == ProviderType.OPENROUTER:
-        models = await fetch_openrouter_models(api_key)
-    elif provider == ProviderType.OLLAMA:
-        models = await fetch_ollama_models()
-    elif provider == ProviderType.OPENAI_COMPATIBLE:
-        if base_url:
-            models = await fetch_openai_compatible_models(base_url, api_key)
-        else:
-            # If no base_url provided for OpenAI Compatible, we can't fetch models
-            models = []
+async def _first_usable_token(
+    session: AsyncSession, user_id: str, token_ids: list[str]
+) -> str | None:
+    for token_id in token_ids:
+        try:
+            return await token_service.get_decrypted_token(session, user_id, token_id)
+        except (HTTPException, CryptoError):
+            # Missing / inactive token or undecryptable: try the next one
+            continue
+    return None
+
+
+async def user_openai_compatible_endpoints(
+    session: AsyncSession, user_id: str
+) -> list[tuple[str, str | None]]:
+    """(base_url, api_key) of the OpenAI compatible endpoints configured in a user's presets."""
+    endpoints: dict[tuple[str, str | None], None] = {}
+    for preset in await preset_service.list_presets(session, user_id):
+        data = preset.config_data or {}
+        configs = [data.get("main_model"), data.get("embedding")] + [
+            (data.get(block) or {}).get("config") for block in ("rag", "guard", "storytelling")
+        ]
+        for config in configs:
+            if (
+                not config
+                or config.get("provider") != ProviderType.OPENAI_COMPATIBLE.value
+                or not config.get("base_url")
+            ):
+                continue
+            api_key = await _first_usable_token(
+                session, user_id, config.get("token_ids") or []
+            )
+            endpoints[(config["base_url"], api_key)] = None
+    return list(endpoints)
 
-    # Update cache
-    _models_cache[cache_key] = CacheEntry(
-        data=models,
-        timestamp=time.time(),
-    )
 
-    return ProviderModelsResponse(
+async def _discover(
+    provider: ProviderType,
+    api_key: str | None,
+    base_url: str | None,
+    model_type: ModelType | None,
+    timeout: float,
+) -> ProviderDiscoveryResult:
+    started = time.monotonic()
+    try:
+        # On timeout the shared fetch keeps running (it is shielded) and fills the catalog.
+        response, _ = await asyncio.wait_for(
+            get_catalog_models(provider, api_key, base_url, model_type=model_type),
+            timeout,
+        )
+    except asyncio.TimeoutError:
+        response, error = None, f"Timed out after {timeout:g}s"
+    except Exception as e:  # noqa: BLE001
+        logger.exception("Model discovery for %s (%s) failed", provider.value, base_url)
+        response, error = None, str(e)
+    else:
+        error = response.error if response is not None else None
+    elapsed_ms = round((time.monotonic() - started) * 1000)
+    if response is None:
+        return ProviderDiscoveryResult(
+            provider=provider, base_url=base_url, error=error, elapsed_ms=elapsed_ms
+        )
+    return ProviderDiscoveryResult(
         provider=provider,
-        models=models,
-        cached=False,
+        base_url=base_url,
+        models=response.models,
+        cached=response.cached,
+        stale=response.stale,
+        error=error,
+        elapsed_ms=elapsed_ms,
+    )
+
+
+async def discover_models(
+    user_id: str | None = None,
+    *,
+    model_type: ModelType | None = None,
+) -> ModelDiscoveryResponse:
+    """
+    Models of every listed provider, fetched concurrently: one entry per
+    provider, plus one per OpenAI compatible endpoint of the user's presets.
+    Each fetch gets MODEL_DISCOVERY_TIMEOUT_SECONDS; slow or failing
+    endpoints are reported with `error` instead of failing the whole call.
+    """
+    started = time.monotonic()
+    targets: list[tuple[ProviderType, str | None, str | None]] = []
+    for info in get_providers():
+        if info.id != ProviderType.OPENAI_COMPATIBLE:
+            targets.append((info.id, None, None))
+        elif user_id:
+            async with async_session() as session:
+                endpoints = await user_openai_compatible_endpoints(session, user_id)
+            targets.extend(
+                (ProviderType.OPENAI_COMPATIBLE, api_key, base_url)
+                for base_url, api_key in endpoints
+            )
+
+    results = await asyncio.gather(
+        *(
+            _discover(
+                provider,
+                api_key,
+                base_url,
+                model_type,
+                settings.MODEL_DISCOVERY_TIMEOUT_SECONDS,
+            )
+            for provider, api_key, base_url in targets
+        )
+    )
+    return ModelDiscoveryResponse(
+        results=list(results),
+        elapsed_ms=round((time.monotonic() - started) * 1000),
     )
 
 
 def clear_models_cache(provider: ProviderType | None = None) -> None:
-    """Clear the models cache for a provider or all providers."""
-    if provider:
-        # Clear all entries for this provider (ignoring base_url)
-        keys_to_remove = [k for k in _models_cache.keys() if k[0] == provider]
-        for k in keys_to_remove:
-            _models_cache.pop(k, None)
-    else:
-        _models_cache.clear()
+    """Forget cached fetch failures of a provider or all providers."""
+    # All entries for this provider (any base_url / API key), or everything
+    _models_cache.clear(provider)
+
+
+def get_models_cache_stats() -> ModelsCacheStats:
+    """Hit / miss counters of model catalog reads and cached fetch failures."""
+    return _models_cache.stats()
+
+
+def get_http_pool_stats() -> list[HttpPoolStats]:
+    """Utilization of the shared outbound connection pools, one per origin."""
+    return [HttpPoolStats.model_validate(s) for s in http_clients.stats()]
 
 
 def filter_models_by_type(
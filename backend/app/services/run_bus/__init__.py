@@ -0,0 +1,26 @@
+"""
+Run bus backends: where run status, SSE events and workflow payloads live.
+
+- memory: in-process (default, single worker)
+- sqlite: shared SQLite WAL database for multiple workers on one host
+"""
+
+from app.core.config import settings
+from app.services.run_bus.base import RunBus
+from app.services.run_bus.memory import InMemoryRunBus
+from app.services.run_bus.sqlite import SqliteRunBus
+
+
+def create_run_bus() -> RunBus:
+    """Build the run bus selected by RUN_BUS_BACKEND."""
+    if settings.RUN_BUS_BACKEND == "sqlite":
+        return SqliteRunBus(settings.RUN_BUS_SQLITE_PATH)
+    return InMemoryRunBus()
+
+
+__all__ = [
+    "InMemoryRunBus",
+    "RunBus",
+    "SqliteRunBus",
+    "create_run_bus",
+]
@@ -0,0 +1,276 @@
+"""
+Run bus interface and the pieces shared by its backends: SSE framing,
+event classification and per-connection subscriber queues.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, AsyncGenerator, Literal
+
+from pydantic_core import to_json
+
+from app.schemas.run import OverflowPolicy, RunStateType, RunStats, RunStatus
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def format_sse(*, event: str, data: str, event_id: int | None = None) -> bytes:
+    """
+    Minimal SSE framing.
+    See: https://html.spec.whatwg.org/multipage/server-sent-events.html#server-sent-events
+    """
+    parts: list[str] = []
+    if event_id is not None:
+        parts.append(f"id: {event_id}")
+    parts.append(f"event: {event}")
+
+    # SSE supports multi-line data; we split to be safe.
+    for line in data.splitlines() or [""]:
+        parts.append(f"data: {line}")
+    parts.append("")  # blank line terminates event
+    return ("\n".join(parts) + "\n").encode()
+
+
+def encode_event(
+    *, run_id: str, seq: int, event_type: str, ts: datetime, payload: Any
+) -> bytes:
+    """
+    Serialize a run event (shape of `RunEvent`) straight to an SSE frame.
+
+    `pydantic_core.to_json` handles models, datetimes etc. in a single pass and
+    never emits raw newlines, so the whole envelope fits one `data:` line and
+    no splitting is needed. The frame is built once per publish and shared by
+    the replay buffer and all subscribers.
+    """
+    return frame_event(
+        run_id=run_id, seq=seq, event_type=event_type, ts=ts, payload_json=to_json(payload)
+    )
+
+
+def frame_event(
+    *, run_id: str, seq: int, event_type: str, ts: datetime, payload_json: bytes
+) -> bytes:
+    """
+    `encode_event` for a payload already serialized with `to_json`: lets a
+    backend serialize before taking a lock and only frame it once `seq` is known.
+    """
+    data = b'{"run_id":%s,"seq":%d,"type":%s,"ts":%s,"payload":%s}' % (
+        to_json(run_id),
+        seq,
+        to_json(event_type),
+        to_json(ts),
+        payload_json,
+    )
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (seq, event_type.encode(), data)
+
+
+PING_FRAME = b": ping\n\n"
+
+
+# Terminal events published by workflows, mapped to the run state they imply.
+TERMINAL_EVENT_STATES: dict[str, RunStateType] = {
+    "done": "completed",
+    "error": "failed",
+    "run_cancelled": "cancelled",
+}
+TERMINAL_STATES: frozenset[str] = frozenset(TERMINAL_EVENT_STATES.values())
+
+# Events a slow subscriber never loses: they are queued even past its capacity.
+CRITICAL_EVENTS: frozenset[str] = frozenset(
+    {*TERMINAL_EVENT_STATES, "hitl_questions", "world_skeleton"}
+)
+# Events where only the latest one matters: on overflow a newer one replaces
+# the pending one instead of being dropped.
+COALESCIBLE_EVENTS: frozenset[str] = frozenset({"stage"})
+
+OfferOutcome = Literal["queued", "coalesced", "dropped", "disconnected", "closed"]
+
+
+class Subscriber:
+    """
+    Per-connection delivery queue with an overflow policy.
+
+    `cursor` is the seq of the last event handed to the client; a subscriber
+    disconnected for being too slow reports it so the client can resume via
+    Last-Event-ID from the run's replay buffer.
+    """
+
+    __slots__ = ("policy", "maxsize", "pending", "cursor", "disconnect_reason", "_wakeup")
+
+    def __init__(self, *, policy: OverflowPolicy, maxsize: int, cursor: int) -> None:
+        self.policy = policy
+        self.maxsize = maxsize
+        self.pending: deque[tuple[int, str, bytes]] = deque()
+        self.cursor = cursor
+        self.disconnect_reason: Literal["overflow", "evicted"] | None = None
+        self._wakeup = asyncio.Event()
+
+    def offer(self, seq: int, event_type: str, message: bytes) -> OfferOutcome:
+        if self.disconnect_reason:
+            return "closed"
+        if len(self.pending) < self.maxsize or event_type in CRITICAL_EVENTS:
+            self._push(seq, event_type, message)
+            return "queued"
+
+        if event_type in COALESCIBLE_EVENTS:
+            for i in range(len(self.pending) - 1, -1, -1):
+                if self.pending[i][1] == event_type:
+                    del self.pending[i]
+                    self._push(seq, event_type, message)
+                    return "coalesced"
+
+        if self.policy == "disconnect":
+            self.pending.clear()
+            self.disconnect("overflow")
+            return "disconnected"
+        return "dropped"
+
+    def _push(self, seq: int, event_type: str, message: bytes) -> None:
+        self.pending.append((seq, event_type, message))
+        self._wakeup.set()
+
+    def disconnect(self, reason: Literal["overflow", "evicted"]) -> None:
+        self.disconnect_reason = reason
+        self._wakeup.set()
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait for new events or a disconnect; False on timeout."""
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except TimeoutError:
+            return False
+        return True
+
+
+def record_offer(status: RunStatus, outcome: OfferOutcome) -> None:
+    """Account a `Subscriber.offer` outcome in the run's delivery metrics."""
+    if outcome == "coalesced":
+        status.coalesced_events += 1
+    elif outcome == "dropped":
+        status.dropped_events += 1
+    elif outcome == "disconnected":
+        status.slow_disconnects += 1
+
+
+async def stream_subscriber(
+    run_id: str,
+    sub: Subscriber,
+    *,
+    replay: list[tuple[int, bytes]],
+    last_event_id: int,
+    oldest_buffered: int,
+    latest_seq: int,
+    keepalive_seconds: float,
+) -> AsyncGenerator[bytes, None]:
+    """
+    SSE stream of an already registered subscriber: hello, replayed events,
+    then live events until the subscriber is disconnected.
+
+    Live events already covered by the replay (seq <= last replayed seq) are
+    skipped, so backends may register the subscriber before reading the replay.
+    """
+    # Initial hello so the client sees immediate activity
+    yield format_sse(event="hello", data=json.dumps({"run_id": run_id}))
+
+    if oldest_buffered > last_event_id + 1 and last_event_id < latest_seq:
+        # Part of the requested range was already trimmed from the buffer
+        yield format_sse(
+            event="replay_truncated",
+            data=json.dumps(
+                {
+                    "run_id": run_id,
+                    "last_event_id": last_event_id,
+                    "oldest_available": oldest_buffered,
+                }
+            ),
+        )
+    for seq, msg in replay:
+        sub.cursor = max(sub.cursor, seq)
+        yield msg
+
+    while True:
+        if sub.pending:
+            seq, _, msg = sub.pending.popleft()
+            if seq <= sub.cursor:
+                continue
+            sub.cursor = seq
+            yield msg
+            continue
+        if sub.disconnect_reason == "overflow":
+            yield format_sse(
+                event="overflow",
+                data=json.dumps({"run_id": run_id, "resume_from": sub.cursor}),
+            )
+            return
+        if sub.disconnect_reason == "evicted":
+            return
+        if not await sub.wait(keepalive_seconds):
+            # Comment ping keeps the connection alive across some intermediaries
+            yield PING_FRAME
+
+
+class RunBus(ABC):
+    """
+    Storage and fan-out for runs: status, SSE events and workflow payloads
+    (e.g. HITL answers) exchanged between API handlers and running workflows.
+    """
+
+    async def start(self) -> None:
+        """Start background tasks (reaper, pollers)."""
+
+    async def stop(self) -> None:
+        """Stop background tasks and release resources."""
+
+    @abstractmethod
+    async def create_run(self) -> str: ...
+
+    @abstractmethod
+    async def resume_run(self, run_id: str, *, min_seq: int) -> None:
+        """
+        Register a run resumed from its checkpoint, if unknown here, and make
+        its next event seq greater than `min_seq`.
+        """
+
+    @abstractmethod
+    async def get_run_status(self, run_id: str) -> RunStatus | None: ...
+
+    @abstractmethod
+    async def cancel_run(self, run_id: str) -> RunStatus | None: ...
+
+    @abstractmethod
+    async def publish(self, run_id: str, event_type: str, payload: Any) -> None: ...
+
+    @abstractmethod
+    def subscribe(
+        self,
+        run_id: str,
+        *,
+        last_event_id: int | None = None,
+        overflow_policy: OverflowPolicy | None = None,
+        keepalive_seconds: int = 15,
+    ) -> AsyncGenerator[bytes, None]: ...
+
+    @abstractmethod
+    async def is_cancelled(self, run_id: str) -> bool: ...
+
+    @abstractmethod
+    async def submit_workflow_payload(self, run_id: str, key: str, payload: object) -> bool: ...
+
+    @abstractmethod
+    async def wait_workflow_payload(
+        self, run_id: str, key: str, *, timeout_seconds: float | None = None
+    ) -> object | None: ...
+
+    @abstractmethod
+    async def pop_workflow_payload(self, run_id: str, key: str) -> object | None: ...
+
+    @abstractmethod
+    async def get_stats(self) -> RunStats: ...
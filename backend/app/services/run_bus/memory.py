@@ -0,0 +1,409 @@
+"""
+In-process run bus: all run state lives in this worker's memory.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import sys
+import time
+import uuid
+import zlib
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Iterator
+
+from app.core.config import settings
+from app.schemas.run import OverflowPolicy, RunStateType, RunStats, RunStatus
+from app.services.run_bus.base import (
+    TERMINAL_EVENT_STATES,
+    TERMINAL_STATES,
+    RunBus,
+    Subscriber,
+    encode_event,
+    record_offer,
+    stream_subscriber,
+    utc_now,
+)
+from app.services.task_supervisor import supervisor as task_supervisor
+
+# Rough fixed cost of a run entry (state object, status model, containers).
+_RUN_STATE_OVERHEAD_BYTES = 2048
+
+
+@dataclass
+class _RunState:
+    status: RunStatus
+    cancelled: bool = False
+    seq: int = 0
+    subscribers: set[Subscriber] = field(default_factory=set)
+    workflow_payloads: dict[str, object] = field(default_factory=dict)
+    workflow_events: dict[str, asyncio.Event] = field(default_factory=dict)
+    # Workflows currently blocked in wait_workflow_payload()
+    waiters: int = 0
+    # Ring buffer of recent framed events for Last-Event-ID replay.
+    history: deque[tuple[int, bytes]] = field(default_factory=deque)
+    history_bytes: int = 0
+    # Monotonic timestamps used by the reaper / LRU eviction.
+    last_access: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.status.state in TERMINAL_STATES
+
+    def is_pinned(self, run_id: str) -> bool:
+        """A live run that a workflow waits on or a supervised task still drives."""
+        return not self.is_terminal and (self.waiters > 0 or run_id in task_supervisor)
+
+    def finish(self, state: RunStateType) -> None:
+        if self.is_terminal:
+            return
+        self.status.state = state
+        self.finished_at = time.monotonic()
+
+    def remember(self, seq: int, message: bytes) -> None:
+        """Append to the replay buffer, trimming it to the configured caps."""
+        self.history.append((seq, message))
+        self.history_bytes += len(message)
+        max_events = settings.RUNS_EVENT_BUFFER_MAX_EVENTS
+        max_bytes = settings.RUNS_EVENT_BUFFER_MAX_BYTES
+        # The newest event is always kept, even if it alone exceeds the byte cap.
+        while len(self.history) > 1 and (
+            len(self.history) > max_events or self.history_bytes > max_bytes
+        ):
+            _, dropped = self.history.popleft()
+            self.history_bytes -= len(dropped)
+
+    def replay_after(self, last_event_id: int) -> list[tuple[int, bytes]]:
+        return [(seq, message) for seq, message in self.history if seq > last_event_id]
+
+    def close(self) -> None:
+        """Release waiters and subscribers of a run that is being evicted."""
+        self.cancelled = True
+        for ev in self.workflow_events.values():
+            ev.set()
+        for sub in self.subscribers:
+            sub.disconnect("evicted")
+
+
+def _new_state(run_id: str) -> _RunState:
+    now = utc_now()
+    return _RunState(
+        status=RunStatus(run_id=run_id, state="running", created_at=now, updated_at=now)
+    )
+
+
+def _approx_size(obj: object, seen: set[int] | None = None) -> int:
+    """Best-effort deep `sys.getsizeof` for plain containers and pydantic models."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_approx_size(k, seen) + _approx_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_approx_size(x, seen) for x in obj)
+    elif hasattr(obj, "__dict__"):
+        size += _approx_size(vars(obj), seen)
+    return size
+
+
+class _RunRegistry:
+    """
+    Run states partitioned into shards by a stable hash of run_id.
+
+    There is intentionally no lock: every operation below reads or mutates the
+    state of a single run without awaiting in between, so within one event loop
+    each of them is already atomic. Shards keep per-run lookups independent of
+    the total number of runs and give sweeps (stats, eviction) a natural unit
+    of work.
+    """
+
+    def __init__(self, shard_count: int) -> None:
+        self._shards: tuple[dict[str, _RunState], ...] = tuple(
+            {} for _ in range(max(1, shard_count))
+        )
+        self._count = 0
+        self.evicted_total = 0
+
+    def _shard(self, run_id: str) -> dict[str, _RunState]:
+        return self._shards[zlib.crc32(run_id.encode()) % len(self._shards)]
+
+    def get(self, run_id: str) -> _RunState | None:
+        state = self._shard(run_id).get(run_id)
+        if state is not None:
+            state.last_access = time.monotonic()
+        return state
+
+    def get_or_create(self, run_id: str) -> _RunState:
+        shard = self._shard(run_id)
+        state = shard.get(run_id)
+        if state is None:
+            state = _new_state(run_id)
+            shard[run_id] = state
+            self._count += 1
+            if self._count > settings.RUNS_MAX_COUNT:
+                self._evict_lru(keep=run_id)
+        state.last_access = time.monotonic()
+        return state
+
+    def items(self) -> Iterator[tuple[str, _RunState]]:
+        for shard in self._shards:
+            yield from list(shard.items())
+
+    def remove(self, run_id: str) -> None:
+        state = self._shard(run_id).pop(run_id, None)
+        if state is None:
+            return
+        self._count -= 1
+        self.evicted_total += 1
+        state.close()
+
+    def reap(self, now: float) -> int:
+        """
+        Evict terminal runs past their TTL and idle runs nobody listens to.
+        Pinned runs (a workflow is waiting or its task is running) are kept.
+        """
+        terminal_ttl = settings.RUNS_TERMINAL_TTL_SECONDS
+        idle_ttl = settings.RUNS_IDLE_TTL_SECONDS
+        expired = [
+            run_id
+            for run_id, state in self.items()
+            if (
+                state.finished_at is not None
+                and now - state.finished_at > terminal_ttl
+            )
+            or (
+                not state.subscribers
+                and now - state.last_access > idle_ttl
+                and not state.is_pinned(run_id)
+            )
+        ]
+        for run_id in expired:
+            self.remove(run_id)
+        return len(expired)
+
+    def _evict_lru(self, *, keep: str) -> None:
+        """
+        Shrink the registry to ~90% of RUNS_MAX_COUNT, so eviction scans are
+        amortized over many inserts. Terminal runs go first, then runs without
+        subscribers, each in least-recently-used order; pinned runs are never
+        evicted, so the registry may stay above the target while they last.
+        """
+        target = int(settings.RUNS_MAX_COUNT * 0.9)
+        candidates = heapq.nsmallest(
+            self._count - target,
+            (
+                (bool(state.subscribers), not state.is_terminal, state.last_access, run_id)
+                for run_id, state in self.items()
+                if run_id != keep and not state.is_pinned(run_id)
+            ),
+        )
+        for *_, run_id in candidates:
+            self.remove(run_id)
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class InMemoryRunBus(RunBus):
+    """Run bus for a single worker process (the default)."""
+
+    def __init__(self) -> None:
+        self._runs = _RunRegistry(settings.RUNS_REGISTRY_SHARDS)
+        self._reaper_task: asyncio.Task[None] | None = None
+
+    async def _reap_forever(self) -> None:
+        while True:
+            await asyncio.sleep(settings.RUNS_REAPER_INTERVAL_SECONDS)
+            self._runs.reap(time.monotonic())
+
+    async def start(self) -> None:
+        if self._reaper_task is None or self._reaper_task.done():
+            self._reaper_task = asyncio.create_task(self._reap_forever())
+
+    async def stop(self) -> None:
+        if self._reaper_task is None:
+            return
+        self._reaper_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._reaper_task
+        self._reaper_task = None
+
+    async def get_stats(self) -> RunStats:
+        by_state: dict[str, int] = {}
+        subscribers = 0
+        buffered_events = 0
+        dropped_events = 0
+        coalesced_events = 0
+        slow_disconnects = 0
+        approx_bytes = 0
+        for _, state in self._runs.items():
+            by_state[state.status.state] = by_state.get(state.status.state, 0) + 1
+            subscribers += len(state.subscribers)
+            buffered_events += len(state.history)
+            dropped_events += state.status.dropped_events
+            coalesced_events += state.status.coalesced_events
+            slow_disconnects += state.status.slow_disconnects
+            approx_bytes += (
+                _RUN_STATE_OVERHEAD_BYTES
+                + state.history_bytes
+                + _approx_size(state.workflow_payloads)
+            )
+        return RunStats(
+            backend="memory",
+            live_runs=len(self._runs),
+            runs_by_state=by_state,
+            subscribers=subscribers,
+            buffered_events=buffered_events,
+            dropped_events=dropped_events,
+            coalesced_events=coalesced_events,
+            slow_disconnects=slow_disconnects,
+            approx_bytes=approx_bytes,
+            evicted_total=self._runs.evicted_total,
+            max_runs=settings.RUNS_MAX_COUNT,
+        )
+
+    async def create_run(self) -> str:
+        run_id = uuid.uuid4().hex
+        self._runs.get_or_create(run_id)
+        await self.publish(run_id, "run_created", {"run_id": run_id})
+        return run_id
+
+    async def resume_run(self, run_id: str, *, min_seq: int) -> None:
+        state = self._runs.get_or_create(run_id)
+        state.seq = max(state.seq, min_seq)
+
+    async def get_run_status(self, run_id: str) -> RunStatus | None:
+        state = self._runs.get(run_id)
+        if not state:
+            return None
+        return state.status
+
+    async def cancel_run(self, run_id: str) -> RunStatus | None:
+        state = self._runs.get(run_id)
+        if not state:
+            return None
+        state.cancelled = True
+        # Unblock any workflows waiting for input
+        for ev in state.workflow_events.values():
+            ev.set()
+
+        await self.publish(run_id, "run_cancelled", {"run_id": run_id})
+        return await self.get_run_status(run_id)
+
+    async def publish(self, run_id: str, event_type: str, payload: Any) -> None:
+        # If someone publishes before create_run, auto-create a placeholder
+        state = self._runs.get_or_create(run_id)
+
+        state.seq += 1
+        state.status.updated_at = utc_now()
+        terminal_state = TERMINAL_EVENT_STATES.get(event_type)
+        if terminal_state:
+            state.finish(terminal_state)
+        message = encode_event(
+            run_id=run_id,
+            seq=state.seq,
+            event_type=event_type,
+            ts=state.status.updated_at,
+            payload=payload,
+        )
+        state.remember(state.seq, message)
+
+        for sub in state.subscribers:
+            record_offer(state.status, sub.offer(state.seq, event_type, message))
+
+    async def subscribe(
+        self,
+        run_id: str,
+        *,
+        last_event_id: int | None = None,
+        overflow_policy: OverflowPolicy | None = None,
+        keepalive_seconds: int = 15,
+    ) -> AsyncGenerator[bytes, None]:
+        state = self._runs.get_or_create(run_id)
+        # Snapshot + registration happen without awaiting: no gaps or duplicates.
+        cursor = last_event_id or 0
+        replay = state.replay_after(cursor)
+        oldest_buffered = state.history[0][0] if state.history else state.seq + 1
+        sub = Subscriber(
+            policy=overflow_policy or settings.RUNS_SUBSCRIBER_OVERFLOW_POLICY,
+            maxsize=settings.RUNS_SUBSCRIBER_QUEUE_SIZE,
+            cursor=state.seq,
+        )
+        state.subscribers.add(sub)
+
+        try:
+            async for msg in stream_subscriber(
+                run_id,
+                sub,
+                replay=replay,
+                last_event_id=cursor,
+                oldest_buffered=oldest_buffered,
+                latest_seq=state.seq,
+                keepalive_seconds=keepalive_seconds,
+            ):
+                yield msg
+        finally:
+            state = self._runs.get(run_id)
+            if state:
+                state.subscribers.discard(sub)
+
+    async def is_cancelled(self, run_id: str) -> bool:
+        state = self._runs.get(run_id)
+        return bool(state.cancelled) if state else False
+
+    async def submit_workflow_payload(self, run_id: str, key: str, payload: object) -> bool:
+        state = self._runs.get(run_id)
+        if not state:
+            return False
+        state.workflow_payloads[key] = payload
+        ev = state.workflow_events.get(key)
+        if not ev:
+            ev = asyncio.Event()
+            state.workflow_events[key] = ev
+        ev.set()
+        return True
+
+    async def wait_workflow_payload(
+        self, run_id: str, key: str, *, timeout_seconds: float | None = None
+    ) -> object | None:
+        state = self._runs.get(run_id)
+        if not state:
+            return None
+        ev = state.workflow_events.get(key)
+        if not ev:
+            ev = asyncio.Event()
+            state.workflow_events[key] = ev
+
+        state.waiters += 1
+        try:
+            if timeout_seconds is None:
+                await ev.wait()
+            else:
+                await asyncio.wait_for(ev.wait(), timeout=timeout_seconds)
+        except TimeoutError:
+            return None
+        finally:
+            state.waiters -= 1
+
+        state = self._runs.get(run_id)
+        if not state:
+            return None
+        return state.workflow_payloads.get(key)
+
+    async def pop_workflow_payload(self, run_id: str, key: str) -> object | None:
+        state = self._runs.get(run_id)
+        if not state:
+            return None
+        payload = state.workflow_payloads.pop(key, None)
+        ev = state.workflow_events.get(key)
+        if ev:
+            ev.clear()
+        return payload
@@ -0,0 +1,504 @@
+"""
+Multi-process run bus backed by a SQLite database in WAL mode.
+
+Lets `uvicorn --workers N` on one host share runs: every worker appends events
+to `run_events`, and a poller in each worker tails that table and fans new
+frames out to the SSE subscribers connected to it. Run status, cancellation
+and workflow payloads live in the database too, so HITL answers posted to any
+worker wake the workflow waiting in another one (within one poll interval).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import sqlite3
+import time
+import uuid
+from collections import Counter
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any, AsyncGenerator, TypeVar
+
+from pydantic_core import to_json
+
+from app.core.config import settings
+from app.core.sqlite_file import SqliteFile, write_transaction
+from app.schemas.run import OverflowPolicy, RunStats, RunStatus
+from app.services.run_bus.base import (
+    TERMINAL_EVENT_STATES,
+    RunBus,
+    Subscriber,
+    frame_event,
+    record_offer,
+    stream_subscriber,
+    utc_now,
+)
+from app.services.task_supervisor import supervisor as task_supervisor
+
+_T = TypeVar("_T")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    cancelled INTEGER NOT NULL DEFAULT 0,
+    seq INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    last_access REAL NOT NULL,
+    finished_at REAL,
+    dropped_events INTEGER NOT NULL DEFAULT 0,
+    coalesced_events INTEGER NOT NULL DEFAULT 0,
+    slow_disconnects INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS run_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    frame BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_run_events_run_id_seq ON run_events (run_id, seq);
+CREATE TABLE IF NOT EXISTS run_payloads (
+    run_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (run_id, key)
+);
+"""
+
+_STATUS_COLUMNS = (
+    "run_id, state, created_at, updated_at, dropped_events, coalesced_events, slow_disconnects"
+)
+
+
+def _ensure_run(conn: sqlite3.Connection, run_id: str, now: datetime) -> None:
+    conn.execute(
+        "INSERT OR IGNORE INTO runs (run_id, state, created_at, updated_at, last_access) "
+        "VALUES (?, 'running', ?, ?, ?)",
+        (run_id, now.isoformat(), now.isoformat(), time.time()),
+    )
+
+
+def _resume_run(conn: sqlite3.Connection, run_id: str, min_seq: int) -> None:
+    with write_transaction(conn):
+        _ensure_run(conn, run_id, utc_now())
+        conn.execute(
+            "UPDATE runs SET seq = MAX(seq, ?) WHERE run_id = ?", (min_seq, run_id)
+        )
+
+
+def _status_from_row(row: tuple[Any, ...]) -> RunStatus:
+    run_id, state, created_at, updated_at, dropped, coalesced, disconnects = row
+    return RunStatus(
+        run_id=run_id,
+        state=state,
+        created_at=datetime.fromisoformat(created_at),
+        updated_at=datetime.fromisoformat(updated_at),
+        dropped_events=dropped,
+        coalesced_events=coalesced,
+        slow_disconnects=disconnects,
+    )
+
+
+def _get_status(conn: sqlite3.Connection, run_id: str) -> RunStatus | None:
+    row = conn.execute(
+        f"SELECT {_STATUS_COLUMNS} FROM runs WHERE run_id = ?", (run_id,)
+    ).fetchone()
+    return _status_from_row(row) if row else None
+
+
+def _publish(
+    conn: sqlite3.Connection, run_id: str, event_type: str, now: datetime, payload_json: bytes
+) -> None:
+    terminal_state = TERMINAL_EVENT_STATES.get(event_type)
+    with write_transaction(conn):
+        # If someone publishes before create_run, auto-create a placeholder
+        _ensure_run(conn, run_id, now)
+        # SET expressions see the pre-update row, so `state = 'running'` guards both.
+        (seq,) = conn.execute(
+            "UPDATE runs SET seq = seq + 1, updated_at = ?, last_access = ?, "
+            "finished_at = CASE WHEN ? IS NOT NULL AND state = 'running' "
+            "THEN ? ELSE finished_at END, "
+            "state = CASE WHEN ? IS NOT NULL AND state = 'running' THEN ? ELSE state END "
+            "WHERE run_id = ? RETURNING seq",
+            (
+                now.isoformat(),
+                time.time(),
+                terminal_state,
+                time.time(),
+                terminal_state,
+                terminal_state,
+                run_id,
+            ),
+        ).fetchone()
+        # Only the seq-dependent framing happens under the write lock
+        frame = frame_event(
+            run_id=run_id, seq=seq, event_type=event_type, ts=now, payload_json=payload_json
+        )
+        conn.execute(
+            "INSERT INTO run_events (run_id, seq, type, frame) VALUES (?, ?, ?, ?)",
+            (run_id, seq, event_type, frame),
+        )
+
+
+def _replay(
+    conn: sqlite3.Connection, run_id: str, last_event_id: int
+) -> tuple[list[tuple[int, bytes]], int, int]:
+    with write_transaction(conn):
+        _ensure_run(conn, run_id, utc_now())
+        conn.execute(
+            "UPDATE runs SET last_access = ? WHERE run_id = ?", (time.time(), run_id)
+        )
+    (latest_seq,) = conn.execute(
+        "SELECT seq FROM runs WHERE run_id = ?", (run_id,)
+    ).fetchone()
+    (oldest,) = conn.execute(
+        "SELECT MIN(seq) FROM run_events WHERE run_id = ?", (run_id,)
+    ).fetchone()
+    replay = conn.execute(
+        "SELECT seq, frame FROM run_events WHERE run_id = ? AND seq > ? ORDER BY seq",
+        (run_id, last_event_id),
+    ).fetchall()
+    return replay, oldest if oldest is not None else latest_seq + 1, latest_seq
+
+
+def _tail(
+    conn: sqlite3.Connection, after_id: int, with_frames: bool
+) -> tuple[list[tuple[int, str, int, str, bytes]], int]:
+    if not with_frames:
+        (last_id,) = conn.execute(
+            "SELECT COALESCE(MAX(id), ?) FROM run_events", (after_id,)
+        ).fetchone()
+        return [], last_id
+    rows = conn.execute(
+        "SELECT id, run_id, seq, type, frame FROM run_events WHERE id > ? ORDER BY id",
+        (after_id,),
+    ).fetchall()
+    return rows, rows[-1][0] if rows else after_id
+
+
+def _add_delivery_metrics(
+    conn: sqlite3.Connection, deltas: dict[str, RunStatus]
+) -> None:
+    with write_transaction(conn):
+        conn.executemany(
+            "UPDATE runs SET dropped_events = dropped_events + ?, "
+            "coalesced_events = coalesced_events + ?, "
+            "slow_disconnects = slow_disconnects + ? WHERE run_id = ?",
+            [
+                (d.dropped_events, d.coalesced_events, d.slow_disconnects, run_id)
+                for run_id, d in deltas.items()
+            ],
+        )
+
+
+def _submit_payload(conn: sqlite3.Connection, run_id: str, key: str, payload: bytes) -> bool:
+    with write_transaction(conn):
+        touched = conn.execute(
+            "UPDATE runs SET last_access = ? WHERE run_id = ?", (time.time(), run_id)
+        ).rowcount
+        if not touched:
+            return False
+        conn.execute(
+            "INSERT OR REPLACE INTO run_payloads (run_id, key, payload) VALUES (?, ?, ?)",
+            (run_id, key, payload),
+        )
+    return True
+
+
+def _is_cancelled(conn: sqlite3.Connection, run_id: str) -> bool:
+    row = conn.execute("SELECT cancelled FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+    return bool(row and row[0])
+
+
+def _peek_payload(
+    conn: sqlite3.Connection, run_id: str, key: str
+) -> tuple[bool, bool, bytes | None]:
+    """(run exists, run cancelled, payload)"""
+    row = conn.execute("SELECT cancelled FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+    if not row:
+        return False, False, None
+    payload = conn.execute(
+        "SELECT payload FROM run_payloads WHERE run_id = ? AND key = ?", (run_id, key)
+    ).fetchone()
+    return True, bool(row[0]), payload[0] if payload else None
+
+
+def _pop_payload(conn: sqlite3.Connection, run_id: str, key: str) -> bytes | None:
+    with write_transaction(conn):
+        row = conn.execute(
+            "DELETE FROM run_payloads WHERE run_id = ? AND key = ? RETURNING payload",
+            (run_id, key),
+        ).fetchone()
+    return row[0] if row else None
+
+
+def _reap(
+    conn: sqlite3.Connection, local_run_ids: list[str], pinned_run_ids: list[str]
+) -> tuple[int, set[str]]:
+    """
+    Evict expired runs, enforce RUNS_MAX_COUNT and trim replay buffers.
+    Returns (evicted runs, locally subscribed runs that no longer exist).
+
+    `pinned_run_ids` are live runs of this worker that a workflow waits on or
+    a supervised task drives; every worker refreshes its own on each pass, so
+    they never look idle and are left out of the LRU eviction below.
+    """
+    now = time.time()
+    with write_transaction(conn):
+        # Runs with subscribers or pinned in this worker are not idle.
+        conn.executemany(
+            "UPDATE runs SET last_access = ? WHERE run_id = ?",
+            [(now, run_id) for run_id in {*local_run_ids, *pinned_run_ids}],
+        )
+        evicted = conn.execute(
+            "DELETE FROM runs WHERE (finished_at IS NOT NULL AND finished_at < ?) "
+            "OR last_access < ?",
+            (now - settings.RUNS_TERMINAL_TTL_SECONDS, now - settings.RUNS_IDLE_TTL_SECONDS),
+        ).rowcount
+        (count,) = conn.execute("SELECT COUNT(*) FROM runs").fetchone()
+        if count > settings.RUNS_MAX_COUNT:
+            # Terminal runs first, then least recently used; live runs refreshed
+            # within the last two passes may be pinned by some worker.
+            evicted += conn.execute(
+                "DELETE FROM runs WHERE run_id IN ("
+                "SELECT run_id FROM runs WHERE finished_at IS NOT NULL OR last_access < ? "
+                "ORDER BY finished_at IS NULL, last_access LIMIT ?)",
+                (
+                    now - 2 * settings.RUNS_REAPER_INTERVAL_SECONDS,
+                    count - int(settings.RUNS_MAX_COUNT * 0.9),
+                ),
+            ).rowcount
+        conn.execute("DELETE FROM run_events WHERE run_id NOT IN (SELECT run_id FROM runs)")
+        conn.execute("DELETE FROM run_payloads WHERE run_id NOT IN (SELECT run_id FROM runs)")
+        # Same caps as the in-memory ring buffer; the newest event is always kept.
+        conn.execute(
+            "DELETE FROM run_events WHERE id IN ("
+            "SELECT id FROM ("
+            "SELECT id, "
+            "ROW_NUMBER() OVER w AS rn, "
+            "SUM(length(frame)) OVER w AS total "
+            "FROM run_events "
+            "WINDOW w AS (PARTITION BY run_id ORDER BY seq DESC)"
+            ") WHERE rn > 1 AND (rn > ? OR total > ?))",
+            (settings.RUNS_EVENT_BUFFER_MAX_EVENTS, settings.RUNS_EVENT_BUFFER_MAX_BYTES),
+        )
+    gone = set(local_run_ids)
+    if gone:
+        placeholders = ",".join("?" * len(local_run_ids))
+        gone -= {
+            run_id
+            for (run_id,) in conn.execute(
+                f"SELECT run_id FROM runs WHERE run_id IN ({placeholders})", local_run_ids
+            )
+        }
+    return evicted, gone
+
+
+def _stats(conn: sqlite3.Connection) -> tuple[dict[str, int], tuple[int, ...]]:
+    by_state = dict(conn.execute("SELECT state, COUNT(*) FROM runs GROUP BY state").fetchall())
+    totals = conn.execute(
+        "SELECT "
+        "(SELECT COUNT(*) FROM runs), "
+        "(SELECT COUNT(*) FROM run_events), "
+        "(SELECT COALESCE(SUM(length(frame)), 0) FROM run_events), "
+        "(SELECT COALESCE(SUM(length(payload)), 0) FROM run_payloads), "
+        "COALESCE(SUM(dropped_events), 0), "
+        "COALESCE(SUM(coalesced_events), 0), "
+        "COALESCE(SUM(slow_disconnects), 0) "
+        "FROM runs"
+    ).fetchone()
+    return by_state, totals
+
+
+class SqliteRunBus(RunBus):
+    """Run bus shared by all worker processes on one host."""
+
+    def __init__(self, path: str) -> None:
+        self._db = SqliteFile(path, _SCHEMA)
+        self._subscribers: dict[str, set[Subscriber]] = {}
+        self._metric_deltas: dict[str, RunStatus] = {}
+        self._last_event_id: int | None = None
+        self._evicted_total = 0
+        # Runs with a workflow blocked in wait_workflow_payload() in this worker
+        self._waiting: Counter[str] = Counter()
+        self._tasks: list[asyncio.Task[None]] = []
+
+    async def _call(self, fn: Callable[..., _T], *args: Any) -> _T:
+        return await self._db.call(fn, *args)
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        _, self._last_event_id = await self._call(_tail, 0, False)
+        self._tasks = [
+            asyncio.create_task(self._tail_forever()),
+            asyncio.create_task(self._reap_forever()),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+        self._db.close()
+
+    async def _tail_forever(self) -> None:
+        while True:
+            await asyncio.sleep(settings.RUN_BUS_POLL_INTERVAL_SECONDS)
+            try:
+                await self._deliver_new_events()
+            except sqlite3.Error:
+                # Transient (e.g. busy) errors: retry on the next tick
+                continue
+
+    async def _deliver_new_events(self) -> None:
+        rows, self._last_event_id = await self._call(
+            _tail, self._last_event_id or 0, bool(self._subscribers)
+        )
+        for _, run_id, seq, event_type, frame in rows:
+            for sub in self._subscribers.get(run_id, ()):
+                outcome = sub.offer(seq, event_type, frame)
+                if outcome in ("coalesced", "dropped", "disconnected"):
+                    delta = self._metric_deltas.get(run_id)
+                    if delta is None:
+                        now = utc_now()
+                        delta = RunStatus(run_id=run_id, created_at=now, updated_at=now)
+                        self._metric_deltas[run_id] = delta
+                    record_offer(delta, outcome)
+        if self._metric_deltas:
+            deltas, self._metric_deltas = self._metric_deltas, {}
+            await self._call(_add_delivery_metrics, deltas)
+
+    async def _reap_forever(self) -> None:
+        while True:
+            await asyncio.sleep(settings.RUNS_REAPER_INTERVAL_SECONDS)
+            try:
+                evicted, gone = await self._call(
+                    _reap, list(self._subscribers), [*self._waiting, *task_supervisor.keys()]
+                )
+            except sqlite3.Error:
+                continue
+            self._evicted_total += evicted
+            for run_id in gone:
+                for sub in self._subscribers.get(run_id, ()):
+                    sub.disconnect("evicted")
+
+    async def get_stats(self) -> RunStats:
+        by_state, totals = await self._call(_stats)
+        live, events, event_bytes, payload_bytes, dropped, coalesced, disconnects = totals
+        return RunStats(
+            backend="sqlite",
+            live_runs=live,
+            runs_by_state=by_state,
+            # Only SSE connections held by this worker are known here.
+            subscribers=sum(len(subs) for subs in self._subscribers.values()),
+            buffered_events=events,
+            dropped_events=dropped,
+            coalesced_events=coalesced,
+            slow_disconnects=disconnects,
+            approx_bytes=event_bytes + payload_bytes,
+            evicted_total=self._evicted_total,
+            max_runs=settings.RUNS_MAX_COUNT,
+        )
+
+    async def create_run(self) -> str:
+        run_id = uuid.uuid4().hex
+        await self.publish(run_id, "run_created", {"run_id": run_id})
+        return run_id
+
+    async def resume_run(self, run_id: str, *, min_seq: int) -> None:
+        await self._call(_resume_run, run_id, min_seq)
+
+    async def get_run_status(self, run_id: str) -> RunStatus | None:
+        return await self._call(_get_status, run_id)
+
+    async def cancel_run(self, run_id: str) -> RunStatus | None:
+        def _cancel(conn: sqlite3.Connection) -> bool:
+            with write_transaction(conn):
+                return bool(
+                    conn.execute(
+                        "UPDATE runs SET cancelled = 1, last_access = ? WHERE run_id = ?",
+                        (time.time(), run_id),
+                    ).rowcount
+                )
+
+        if not await self._call(_cancel):
+            return None
+        await self.publish(run_id, "run_cancelled", {"run_id": run_id})
+        return await self.get_run_status(run_id)
+
+    async def publish(self, run_id: str, event_type: str, payload: Any) -> None:
+        await self._call(_publish, run_id, event_type, utc_now(), to_json(payload))
+
+    async def subscribe(
+        self,
+        run_id: str,
+        *,
+        last_event_id: int | None = None,
+        overflow_policy: OverflowPolicy | None = None,
+        keepalive_seconds: int = 15,
+    ) -> AsyncGenerator[bytes, None]:
+        cursor = last_event_id or 0
+        sub = Subscriber(
+            policy=overflow_policy or settings.RUNS_SUBSCRIBER_OVERFLOW_POLICY,
+            maxsize=settings.RUNS_SUBSCRIBER_QUEUE_SIZE,
+            cursor=cursor,
+        )
+        # Register before reading the replay: events tailed in between are
+        # deduplicated by seq in `stream_subscriber`.
+        self._subscribers.setdefault(run_id, set()).add(sub)
+        try:
+            replay, oldest_buffered, latest_seq = await self._call(_replay, run_id, cursor)
+            async for msg in stream_subscriber(
+                run_id,
+                sub,
+                replay=replay,
+                last_event_id=cursor,
+                oldest_buffered=oldest_buffered,
+                latest_seq=latest_seq,
+                keepalive_seconds=keepalive_seconds,
+            ):
+                yield msg
+        finally:
+            subs = self._subscribers.get(run_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[run_id]
+
+    async def is_cancelled(self, run_id: str) -> bool:
+        return await self._call(_is_cancelled, run_id)
+
+    async def submit_workflow_payload(self, run_id: str, key: str, payload: object) -> bool:
+        return await self._call(_submit_payload, run_id, key, to_json(payload))
+
+    async def wait_workflow_payload(
+        self, run_id: str, key: str, *, timeout_seconds: float | None = None
+    ) -> object | None:
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout_seconds is None else loop.time() + timeout_seconds
+        self._waiting[run_id] += 1
+        try:
+            while True:
+                exists, cancelled, payload = await self._call(_peek_payload, run_id, key)
+                if payload is not None:
+                    return json.loads(payload)
+                if not exists or cancelled:
+                    return None
+                if deadline is not None and loop.time() >= deadline:
+                    return None
+                await asyncio.sleep(settings.RUN_BUS_POLL_INTERVAL_SECONDS)
+        finally:
+            self._waiting[run_id] -= 1
+            if not self._waiting[run_id]:
+                del self._waiting[run_id]
+
+    async def pop_workflow_payload(self, run_id: str, key: str) -> object | None:
+        payload = await self._call(_pop_payload, run_id, key)
+        return json.loads(payload) if payload is not None else None
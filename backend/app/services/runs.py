@@ -1,168 +1,91 @@
+"""
+Runs: status, SSE event streams and workflow payloads of long-running workflows.
+
+Thin facade over the run bus backend selected by RUN_BUS_BACKEND
+(see `app.services.run_bus`).
+"""
+
 from __future__ import annotations
 
-import asyncio
-import json
-import uuid
-from dataclasses import dataclass, field
-from datetime import datetime, timezone
 from typing import Any, AsyncGenerator
 
-from app.schemas.run import RunEvent, RunStatus
+from app.schemas.run import OverflowPolicy, RunStats, RunStatus
+from app.services.run_bus import RunBus, create_run_bus
 
+_bus: RunBus = create_run_bus()
 
-def _utc_now() -> datetime:
-    return datetime.now(timezone.utc)
 
+async def start() -> None:
+    """Start the run bus background tasks (reaper, pollers)."""
+    await _bus.start()
 
-def _format_sse(*, event: str, data: str, event_id: int | None = None) -> str:
-    """
-    Minimal SSE framing.
-    See: https://html.spec.whatwg.org/multipage/server-sent-events.html#server-sent-events
-    """
-    parts: list[str] = []
-    if event_id is not None:
-        parts.append(f"id: {event_id}")
-    parts.append(f"event: {event}")
 
-    # SSE supports multi-line data; we split to be safe.
-    for line in data.splitlines() or [""]:
-        parts.append(f"data: {line}")
-    parts.append("")  # blank line terminates event
-    return "\n".join(parts) + "\n"
+async def stop() -> None:
+    await _bus.stop()
 
 
-@dataclass
-class _RunState:
-    status: RunStatus
-    cancelled: bool = False
-    seq: int = 0
-    subscribers: set[asyncio.Queue[str]] = field(default_factory=set)
-    workflow_payloads: dict[str, object] = field(default_factory=dict)
-    workflow_events: dict[str, asyncio.Event] = field(default_factory=dict)
+async def get_stats() -> RunStats:
+    """Snapshot of live runs, subscribers and approximate memory held."""
+    return await _bus.get_stats()
 
 
-_runs: dict[str, _RunState] = {}
-_lock = asyncio.Lock()
+async def create_run() -> str:
+    return await _bus.create_run()
 
 
-async def create_run() -> str:
-    run_id = uuid.uuid4().hex
-    now = _utc_now()
-    state = _RunState(
-        status=RunStatus(run_id=run_id, state="running", created_at=now, updated_at=now)
-    )
-    async with _lock:
-        _runs[run_id] = state
-    await publish(run_id, "run_created", {"run_id": run_id})
-    return run_id
+async def resume_run(run_id: str, *, min_seq: int) -> None:
+    """
+    Register a run resumed by this worker before its workflow publishes again,
+    so `/runs/{id}` finds it. Events continue after `min_seq`: clients holding
+    ids of the previous worker get `replay_truncated` plus everything buffered
+    since, instead of having new events skipped as already seen.
+    """
+    await _bus.resume_run(run_id, min_seq=min_seq)
 
 
 async def get_run_status(run_id: str) -> RunStatus | None:
-    async with _lock:
-        state = _runs.get(run_id)
-        if not state:
-            return None
-        return state.status
+    return await _bus.get_run_status(run_id)
 
 
 async def cancel_run(run_id: str) -> RunStatus | None:
-    async with _lock:
-        state = _runs.get(run_id)
-        if not state:
-            return None
-        state.cancelled = True
-        state.status.state = "cancelled"
-        state.status.updated_at = _utc_now()
-        # Unblock any workflows waiting for input
-        for ev in state.workflow_events.values():
-            ev.set()
-
-    await publish(run_id, "run_cancelled", {"run_id": run_id})
-    return await get_run_status(run_id)
+    return await _bus.cancel_run(run_id)
 
 
 async def publish(run_id: str, event_type: str, payload: Any) -> None:
-    async with _lock:
-        state = _runs.get(run_id)
-        if not state:
-            # If someone publishes before create_run, auto-create a placeholder
-            now = _utc_now()
-            state = _RunState(
-                status=RunStatus(
-                    run_id=run_id, state="running", created_at=now, updated_at=now
-                )
-            )
-            _runs[run_id] = state
-
-        state.seq += 1
-        state.status.updated_at = _utc_now()
-        envelope = RunEvent(
-            run_id=run_id,
-            seq=state.seq,
-            type=event_type,
-            ts=state.status.updated_at,
-            payload=payload,
-        )
-        message = _format_sse(
-            event=event_type,
-            event_id=envelope.seq,
-            data=json.dumps(envelope.model_dump(mode="json"), ensure_ascii=False),
-        )
-        subscribers = list(state.subscribers)
-
-    # Fan-out without holding the lock
-    for q in subscribers:
-        try:
-            q.put_nowait(message)
-        except asyncio.QueueFull:
-            # Drop if client is too slow; future: backpressure / disconnect
-            pass
-
-
-async def subscribe(
+    await _bus.publish(run_id, event_type, payload)
+
+
+def subscribe(
     run_id: str,
     *,
+    last_event_id: int | None = None,
+    overflow_policy: OverflowPolicy | None = None,
     keepalive_seconds: int = 15,
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[bytes, None]:
     """
     Subscribe to SSE messages for a run_id.
-    Yields already-framed SSE strings.
+    Yields already-framed SSE messages as bytes.
+
+    Buffered events with seq > `last_event_id` (all buffered events if None)
+    are replayed first, so reconnecting clients and late subscribers do not
+    miss anything still held in the run's replay buffer.
+
+    When the client falls behind by more than RUNS_SUBSCRIBER_QUEUE_SIZE events,
+    pending `stage` events are coalesced and critical events (hitl_questions,
+    world_skeleton, done, error, run_cancelled) are always kept. Anything else
+    is handled by `overflow_policy`: "drop" discards the event, "disconnect"
+    ends the stream with an `overflow` event carrying the resume cursor.
     """
-    q: asyncio.Queue[str] = asyncio.Queue(maxsize=100)
-    async with _lock:
-        state = _runs.get(run_id)
-        if not state:
-            now = _utc_now()
-            state = _RunState(
-                status=RunStatus(
-                    run_id=run_id, state="running", created_at=now, updated_at=now
-                )
-            )
-            _runs[run_id] = state
-        state.subscribers.add(q)
-
-    try:
-        # Initial hello so the client sees immediate activity
-        yield _format_sse(event="hello", data=json.dumps({"run_id": run_id}))
-
-        while True:
-            try:
-                msg = await asyncio.wait_for(q.get(), timeout=keepalive_seconds)
-                yield msg
-            except TimeoutError:
-                # Comment ping keeps the connection alive across some intermediaries
-                yield ": ping\n\n"
-    finally:
-        async with _lock:
-            state = _runs.get(run_id)
-            if state:
-                state.subscribers.discard(q)
+    return _bus.subscribe(
+        run_id,
+        last_event_id=last_event_id,
+        overflow_policy=overflow_policy,
+        keepalive_seconds=keepalive_seconds,
+    )
 
 
 async def is_cancelled(run_id: str) -> bool:
-    async with _lock:
-        state = _runs.get(run_id)
-        return bool(state.cancelled) if state else False
+    return await _bus.is_cancelled(run_id)
 
 
 async def submit_workflow_payload(run_id: str, key: str, payload: object) -> bool:
@@ -170,17 +93,7 @@ async def submit_workflow_payload(run_id: str, key: str, payload: object) -> boo
     Store a workflow payload (e.g. HITL answers) and signal waiters.
     Returns False if run not found.
     """
-    async with _lock:
-        state = _runs.get(run_id)
-        if not state:
-            return False
-        state.workflow_payloads[key] = payload
-        ev = state.workflow_events.get(key)
-        if not ev:
-            ev = asyncio.Event()
-            state.workflow_events[key] = ev
-        ev.set()
-        return True
+    return await _bus.submit_workflow_payload(run_id, key, payload)
 
 
 async def wait_workflow_payload(
@@ -190,42 +103,11 @@ async def wait_workflow_payload(
     Wait until a workflow payload for `key` is submitted.
     Returns the stored payload (and keeps it stored) or None on timeout / missing run.
     """
-    async with _lock:
-        state = _runs.get(run_id)
-        if not state:
-            return None
-        ev = state.workflow_events.get(key)
-        if not ev:
-            ev = asyncio.Event()
-            state.workflow_events[key] = ev
-
-    try:
-        if timeout_seconds is None:
-            await ev.wait()
-        else:
-            await asyncio.wait_for(ev.wait(), timeout=timeout_seconds)
-    except TimeoutError:
-        return None
-
-    async with _lock:
-        state = _runs.get(run_id)
-        if not state:
-            return None
-        return state.workflow_payloads.get(key)
+    return await _bus.wait_workflow_payload(run_id, key, timeout_seconds=timeout_seconds)
 
 
 async def pop_workflow_payload(run_id: str, key: str) -> object | None:
     """
     Pop a stored workflow payload and reset its event.
     """
-    async with _lock:
-        state = _runs.get(run_id)
-        if not state:
-            return None
-        payload = state.workflow_payloads.pop(key, None)
-        ev = state.workflow_events.get(key)
-        if ev:
-            ev.clear()
-        return payload
-
-
+    return await _bus.pop_workflow_payload(run_id, key)
@@ -3,110 +3,164 @@ Story service for CRUD operations.
 """
 
 from datetime import datetime
-from typing import Iterable
+from typing import Any, Iterable
 
 from fastapi import HTTPException, status
-from sqlmodel import Session, select
+from sqlalchemy import ColumnElement, delete, exists, update
+from sqlalchemy.orm import joinedload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.story import Story, StoryConfig
+from app.schemas.config_preset import EffectiveConfig
 from app.schemas.story import (
     StoryCreate,
     StoryUpdate,
     StoryConfigUpdate,
 )
+from app.services import effective_config
+
+
+_CONFIG_OVERRIDES = (
+    "main_model_override",
+    "rag_model_override",
+    "guard_model_override",
+    "storytelling_model_override",
+    "embedding_override",
+    "rag_enabled_override",
+    "guard_enabled_override",
+    "storytelling_enabled_override",
+)
+
+
+def _story_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Story not found",
+    )
+
 
+def _owned_by(user_id: str, story_id: str) -> ColumnElement[bool]:
+    """Condition on StoryConfig: its story is `story_id` and belongs to `user_id`."""
+    return (StoryConfig.story_id == story_id) & exists().where(
+        Story.id == story_id, Story.user_id == user_id
+    )
 
-def create_story(session: Session, user_id: str, payload: StoryCreate) -> Story:
-    """Create a new story with its config."""
+
+async def create_story(session: AsyncSession, user_id: str, payload: StoryCreate) -> Story:
+    """Create a new story with its (empty) config."""
     story = Story(
         user_id=user_id,
         title=payload.title,
         description=payload.description,
         preset_id=payload.preset_id,
     )
+    # Ids are generated client-side: both rows go out in one flush, no refresh needed
+    story.config = StoryConfig(story_id=story.id)
     session.add(story)
-    session.flush()  # Get story ID
-
-    # Create empty story config
-    config = StoryConfig(story_id=story.id)
-    session.add(config)
-
-    session.commit()
-    session.refresh(story)
+    await session.commit()
     return story
 
 
-def list_stories(
-    session: Session, user_id: str, active_only: bool = False
+async def list_stories(
+    session: AsyncSession, user_id: str, active_only: bool = False
 ) -> Iterable[Story]:
     """List all stories for a user."""
     query = select(Story).where(Story.user_id == user_id)
     if active_only:
         query = query.where(Story.is_active == True)
-    return session.exec(query.order_by(Story.updated_at.desc())).all()
+    return (await session.exec(query.order_by(Story.updated_at.desc()))).all()
 
 
-def get_story(session: Session, user_id: str, story_id: str) -> Story:
-    """Get a specific story."""
-    story = session.exec(
+async def get_story(
+    session: AsyncSession, user_id: str, story_id: str, *, with_preset: bool = False
+) -> Story:
+    """Get a specific story with its config (and preset if `with_preset`), in one query."""
+    query = (
         select(Story)
         .where(Story.id == story_id)
         .where(Story.user_id == user_id)
-    ).first()
+        .options(joinedload(Story.config))
+    )
+    if with_preset:
+        query = query.options(joinedload(Story.preset))
+    story = (await session.exec(query)).first()
     if not story:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Story not found",
-        )
+        raise _story_not_found()
     return story
 
 
-def update_story(
-    session: Session, user_id: str, story_id: str, payload: StoryUpdate
+async def update_story(
+    session: AsyncSession, user_id: str, story_id: str, payload: StoryUpdate
 ) -> Story:
     """Update a story."""
-    story = get_story(session, user_id, story_id)
-
     update_data = payload.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(story, key, value)
-
-    story.updated_at = datetime.utcnow()
-    session.add(story)
-    session.commit()
-    session.refresh(story)
+    story = await session.scalar(
+        update(Story)
+        .where(Story.id == story_id)
+        .where(Story.user_id == user_id)
+        .values(**update_data, updated_at=datetime.utcnow())
+        .returning(Story)
+    )
+    if story is None:
+        raise _story_not_found()
+    await session.commit()
+    if "preset_id" in update_data:
+        effective_config.invalidate(story_id=story_id)
     return story
 
 
-def delete_story(session: Session, user_id: str, story_id: str) -> None:
+async def delete_story(session: AsyncSession, user_id: str, story_id: str) -> None:
     """Delete a story and its config."""
-    story = get_story(session, user_id, story_id)
+    # Config first (foreign key); the ownership check makes it a no-op for foreign stories
+    await session.execute(delete(StoryConfig).where(_owned_by(user_id, story_id)))
+    result = await session.execute(
+        delete(Story).where(Story.id == story_id).where(Story.user_id == user_id)
+    )
+    if result.rowcount == 0:
+        raise _story_not_found()
+    await session.commit()
+    effective_config.invalidate(story_id=story_id)
 
-    # Delete config first
-    if story.config:
-        session.delete(story.config)
 
-    session.delete(story)
-    session.commit()
+async def get_story_config(
+    session: AsyncSession, user_id: str, story_id: str
+) -> StoryConfig:
+    """Get the config for a story."""
+    config = (
+        await session.exec(select(StoryConfig).where(_owned_by(user_id, story_id)))
+    ).first()
+    if not config:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Story config not found",
+        )
+    return config
 
 
-def get_story_config(session: Session, user_id: str, story_id: str) -> StoryConfig:
-    """Get the config for a story."""
-    story = get_story(session, user_id, story_id)
-    if not story.config:
+async def _update_story_config(
+    session: AsyncSession, user_id: str, story_id: str, values: dict[str, Any]
+) -> StoryConfig:
+    config = await session.scalar(
+        update(StoryConfig)
+        .where(_owned_by(user_id, story_id))
+        .values(**values, updated_at=datetime.utcnow())
+        .returning(StoryConfig)
+    )
+    if config is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Story config not found",
         )
-    return story.config
+    await session.commit()
+    effective_config.invalidate(story_id=story_id)
+    return config
 
 
-def update_story_config(
-    session: Session, user_id: str, story_id: str, payload: StoryConfigUpdate
+async def update_story_config(
+    session: AsyncSession, user_id: str, story_id: str, payload: StoryConfigUpdate
 ) -> StoryConfig:
     """Update story config overrides."""
-    config = get_story_config(session, user_id, story_id)
-
     update_data = payload.model_dump(exclude_unset=True)
 
     # Convert override objects to dicts
@@ -116,35 +170,24 @@ def update_story_config(
         "guard_model_override",
         "storytelling_model_override",
     ]:
-        if key in update_data and update_data[key] is not None:
+        if hasattr(update_data.get(key), "model_dump"):
             update_data[key] = update_data[key].model_dump(exclude_unset=True)
 
-    for key, value in update_data.items():
-        setattr(config, key, value)
-
-    config.updated_at = datetime.utcnow()
-    session.add(config)
-    session.commit()
-    session.refresh(config)
-    return config
+    return await _update_story_config(session, user_id, story_id, update_data)
 
 
-def reset_story_config(session: Session, user_id: str, story_id: str) -> StoryConfig:
+async def reset_story_config(
+    session: AsyncSession, user_id: str, story_id: str
+) -> StoryConfig:
     """Reset all story config overrides to None."""
-    config = get_story_config(session, user_id, story_id)
-
-    config.main_model_override = None
-    config.rag_model_override = None
-    config.guard_model_override = None
-    config.storytelling_model_override = None
-    config.embedding_override = None
-    config.rag_enabled_override = None
-    config.guard_enabled_override = None
-    config.storytelling_enabled_override = None
-    config.updated_at = datetime.utcnow()
-
-    session.add(config)
-    session.commit()
-    session.refresh(config)
-    return config
+    return await _update_story_config(
+        session, user_id, story_id, dict.fromkeys(_CONFIG_OVERRIDES)
+    )
+
 
+async def get_story_effective_config(
+    session: AsyncSession, user_id: str, story_id: str
+) -> EffectiveConfig:
+    """Effective config of a story: its preset's config with the story overrides applied."""
+    story = await get_story(session, user_id, story_id, with_preset=True)
+    return effective_config.resolve_effective_config(story.preset, story.config)
@@ -0,0 +1,223 @@
+"""
+Task supervisor: owns the background tasks executing workflow runs.
+
+Tasks are keyed by run_id and admitted through a bounded queue; at most
+TASKS_MAX_RUNNING of them run at once (TASKS_PER_USER_MAX_RUNNING per user),
+the rest wait for a slot in FIFO order.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Coroutine
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Entry:
+    user_id: str | None
+    task: asyncio.Task[None]
+    running: bool = False
+
+
+class TaskSupervisor:
+    def __init__(
+        self,
+        *,
+        max_running: int,
+        max_queued: int,
+        per_user_max_running: int,
+        per_user_max_active: int,
+    ) -> None:
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.per_user_max_running = per_user_max_running
+        self.per_user_max_active = per_user_max_active
+        self._entries: dict[str, _Entry] = {}
+        self._running = 0
+        self._running_by_user: Counter[str | None] = Counter()
+        self._active_by_user: Counter[str | None] = Counter()
+        self._waiters: list[tuple[str | None, asyncio.Future[None]]] = []
+        # Admitted via reserve(), not spawned yet
+        self._reserved = 0
+        self._closed = False
+        self.rejected_total = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._entries) - self._running + self._reserved
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def keys(self) -> list[str]:
+        return list(self._entries)
+
+    def check_admission(self, user_id: str | None) -> None:
+        """Raise 503 / 429 if a new task of `user_id` would not be accepted."""
+        if self._closed:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is shutting down",
+            )
+        if self.queued >= self.max_queued:
+            self.rejected_total += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many runs queued, try again later",
+            )
+        if self._active_by_user[user_id] >= self.per_user_max_active:
+            self.rejected_total += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many active runs for this user",
+            )
+
+    def reserve(self, user_id: str | None) -> None:
+        """
+        Admit a task of `user_id` now and hold its place until it is spawned
+        (`spawn(..., reserved=True)`) or given back (`unreserve`). For callers
+        that await between admission and spawn: concurrent requests would all
+        pass a bare `check_admission` in between.
+        """
+        self.check_admission(user_id)
+        self._reserved += 1
+        self._active_by_user[user_id] += 1
+
+    def unreserve(self, user_id: str | None) -> None:
+        self._reserved -= 1
+        self._forget_active(user_id)
+
+    def spawn(
+        self,
+        key: str,
+        coro_fn: Callable[[], Coroutine[Any, Any, None]],
+        *,
+        user_id: str | None,
+        admitted: bool = False,
+        reserved: bool = False,
+    ) -> None:
+        """
+        Queue `coro_fn()` for execution under `key`. Admission limits are checked
+        unless the caller already did (`admitted=True`, e.g. resumed runs) or
+        holds a reservation for it (`reserved=True`).
+        """
+        if reserved:
+            self.unreserve(user_id)
+        elif not admitted:
+            self.check_admission(user_id)
+        if key in self._entries:
+            return
+        # Fresh context: the task outlives the request that spawned it, so
+        # request-scoped state (e.g. its SQL metrics scope) must not leak into it.
+        task = asyncio.create_task(
+            self._run(key, user_id, coro_fn), context=contextvars.Context()
+        )
+        self._entries[key] = _Entry(user_id=user_id, task=task)
+        self._active_by_user[user_id] += 1
+        task.add_done_callback(lambda _: self._forget(key, user_id))
+
+    def _forget(self, key: str, user_id: str | None) -> None:
+        self._entries.pop(key, None)
+        self._forget_active(user_id)
+
+    def _forget_active(self, user_id: str | None) -> None:
+        self._active_by_user[user_id] -= 1
+        if self._active_by_user[user_id] <= 0:
+            del self._active_by_user[user_id]
+
+    async def _acquire(self, user_id: str | None) -> None:
+        fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append((user_id, fut))
+        self._dispatch()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Slot was handed over right before cancellation: give it back.
+                self._release(user_id)
+            else:
+                self._waiters.remove((user_id, fut))
+            raise
+
+    def _dispatch(self) -> None:
+        """Hand free slots to the oldest waiters whose user is under quota."""
+        for waiter in list(self._waiters):
+            if self._running >= self.max_running:
+                break
+            waiter_user, fut = waiter
+            if self._running_by_user[waiter_user] < self.per_user_max_running:
+                self._waiters.remove(waiter)
+                self._running += 1
+                self._running_by_user[waiter_user] += 1
+                fut.set_result(None)
+
+    def _release(self, user_id: str | None) -> None:
+        self._running -= 1
+        self._running_by_user[user_id] -= 1
+        if self._running_by_user[user_id] <= 0:
+            del self._running_by_user[user_id]
+        self._dispatch()
+
+    async def _run(
+        self, key: str, user_id: str | None, coro_fn: Callable[[], Coroutine[Any, Any, None]]
+    ) -> None:
+        await self._acquire(user_id)
+        entry = self._entries.get(key)
+        if entry:
+            entry.running = True
+        try:
+            await coro_fn()
+        except Exception:  # noqa: BLE001
+            logger.exception("Background task %s failed", key)
+        finally:
+            self._release(user_id)
+
+    def cancel(self, key: str) -> bool:
+        """Cancel a queued or running task. False if there is no such task."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        entry.task.cancel()
+        return True
+
+    async def drain(self, timeout: float) -> None:
+        """
+        Stop admitting tasks, drop queued ones and give running ones `timeout`
+        seconds to finish before cancelling them.
+        """
+        self._closed = True
+        for entry in list(self._entries.values()):
+            if not entry.running:
+                entry.task.cancel()
+        tasks = [entry.task for entry in self._entries.values()]
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        for task in pending:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+
+supervisor = TaskSupervisor(
+    max_running=settings.TASKS_MAX_RUNNING,
+    max_queued=settings.TASKS_MAX_QUEUED,
+    per_user_max_running=settings.TASKS_PER_USER_MAX_RUNNING,
+    per_user_max_active=settings.TASKS_PER_USER_MAX_ACTIVE,
+)
@@ -3,17 +3,28 @@ Token service for CRUD operations.
 """
 
 from datetime import datetime
-from typing import Iterable
+from typing import Any, Iterable
 
 from fastapi import HTTPException, status
-from sqlmodel import Session, select
+from sqlalchemy import delete, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.crypto import decrypt_token, encrypt_token
 from app.models.token import Token
 from app.schemas.token import TokenCreate, TokenUpdate
 
 
-def create_token(session: Session, user_id: str, payload: TokenCreate) -> Token:
+def _token_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Token not found",
+    )
+
+
+async def create_token(
+    session: AsyncSession, user_id: str, payload: TokenCreate
+) -> Token:
     """Create a new API token."""
     token = Token(
         user_id=user_id,
@@ -22,65 +33,75 @@ def create_token(session: Session, user_id: str, payload: TokenCreate) -> Token:
         encrypted_token=encrypt_token(payload.token),
     )
     session.add(token)
-    session.commit()
-    session.refresh(token)
+    await session.commit()
     return token
 
 
-def list_tokens(session: Session, user_id: str) -> Iterable[Token]:
+async def list_tokens(session: AsyncSession, user_id: str) -> Iterable[Token]:
     """List all tokens for a user."""
-    return session.exec(
-        select(Token)
-        .where(Token.user_id == user_id)
-        .order_by(Token.created_at)
+    return (
+        await session.exec(
+            select(Token)
+            .where(Token.user_id == user_id)
+            .order_by(Token.created_at)
+        )
     ).all()
 
 
-def get_token(session: Session, user_id: str, token_id: str) -> Token:
+async def get_token(session: AsyncSession, user_id: str, token_id: str) -> Token:
     """Get a specific token."""
-    token = session.exec(
-        select(Token)
-        .where(Token.id == token_id)
-        .where(Token.user_id == user_id)
+    token = (
+        await session.exec(
+            select(Token)
+            .where(Token.id == token_id)
+            .where(Token.user_id == user_id)
+        )
     ).first()
     if not token:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Token not found",
-        )
+        raise _token_not_found()
     return token
 
 
-def update_token(
-    session: Session, user_id: str, token_id: str, payload: TokenUpdate
+async def update_token(
+    session: AsyncSession, user_id: str, token_id: str, payload: TokenUpdate
 ) -> Token:
     """Update a token."""
-    token = get_token(session, user_id, token_id)
-
+    values: dict[str, Any] = {"updated_at": datetime.utcnow()}
     if payload.name is not None:
-        token.name = payload.name
+        values["name"] = payload.name
     if payload.token is not None:
-        token.encrypted_token = encrypt_token(payload.token)
+        values["encrypted_token"] = encrypt_token(payload.token)
     if payload.is_active is not None:
-        token.is_active = payload.is_active
+        values["is_active"] = payload.is_active
 
-    token.updated_at = datetime.utcnow()
-    session.add(token)
-    session.commit()
-    session.refresh(token)
+    token = await session.scalar(
+        update(Token)
+        .where(Token.id == token_id)
+        .where(Token.user_id == user_id)
+        .values(**values)
+        .returning(Token)
+    )
+    if token is None:
+        raise _token_not_found()
+    await session.commit()
     return token
 
 
-def delete_token(session: Session, user_id: str, token_id: str) -> None:
+async def delete_token(session: AsyncSession, user_id: str, token_id: str) -> None:
     """Delete a token."""
-    token = get_token(session, user_id, token_id)
-    session.delete(token)
-    session.commit()
+    result = await session.execute(
+        delete(Token).where(Token.id == token_id).where(Token.user_id == user_id)
+    )
+    if result.rowcount == 0:
+        raise _token_not_found()
+    await session.commit()
 
 
-def get_decrypted_token(session: Session, user_id: str, token_id: str) -> str:
+async def get_decrypted_token(
+    session: AsyncSession, user_id: str, token_id: str
+) -> str:
     """Get the decrypted value of a token (for internal use)."""
-    token = get_token(session, user_id, token_id)
+    token = await get_token(session, user_id, token_id)
     if not token.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -1,12 +1,18 @@
+import asyncio
 from typing import Iterable, Optional
 
 from fastapi import HTTPException, status
 from passlib.context import CryptContext
-from sqlmodel import Session, select
+from sqlalchemy import delete, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.models.config_preset import ConfigPreset
+from app.models.story import Story, StoryConfig
+from app.models.token import Token
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdatePassword
-from app.services import presets
+from app.services import effective_config, presets
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -16,8 +22,8 @@ def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def verify_unique_name(session: Session, name: str) -> None:
-    existing = session.exec(select(User).where(User.name == name)).first()
+async def verify_unique_name(session: AsyncSession, name: str) -> None:
+    existing = (await session.exec(select(User).where(User.name == name))).first()
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -25,49 +31,76 @@ def verify_unique_name(session: Session, name: str) -> None:
         )
 
 
-def create_user(session: Session, payload: UserCreate) -> User:
-    verify_unique_name(session, payload.name)
+async def create_user(session: AsyncSession, payload: UserCreate) -> User:
+    await verify_unique_name(session, payload.name)
 
     password_hash: Optional[str] = None
     if payload.password:
-        password_hash = hash_password(payload.password)
+        # bcrypt takes ~100ms of CPU: keep it off the event loop
+        password_hash = await asyncio.to_thread(hash_password, payload.password)
 
     user = User(name=payload.name, password_hash=password_hash)
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
 
     # Initialize default presets for the new user
-    presets.create_default_preset_structure(session, user.id)
+    await presets.create_default_preset_structure(session, user.id)
 
     return user
 
 
-def list_users(session: Session) -> Iterable[User]:
-    return session.exec(select(User).order_by(User.created_at)).all()
+async def list_users(session: AsyncSession) -> Iterable[User]:
+    return (await session.exec(select(User).order_by(User.created_at))).all()
 
 
-def get_user(session: Session, user_id: str) -> User:
-    user = session.get(User, user_id)
+async def get_user(session: AsyncSession, user_id: str) -> User:
+    user = await session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return user
 
 
-def update_password(session: Session, user_id: str, payload: UserUpdatePassword) -> User:
-    user = get_user(session, user_id)
+async def update_password(
+    session: AsyncSession, user_id: str, payload: UserUpdatePassword
+) -> User:
+    password_hash: Optional[str] = None
     if payload.password:
-        user.password_hash = hash_password(payload.password)
-    else:
-        user.password_hash = None
-    session.add(user)
-    session.commit()
-    session.refresh(user)
+        password_hash = await asyncio.to_thread(hash_password, payload.password)
+    user = await session.scalar(
+        update(User)
+        .where(User.id == user_id)
+        .values(password_hash=password_hash)
+        .returning(User)
+    )
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    await session.commit()
     return user
 
 
-def delete_user(session: Session, user_id: str) -> None:
-    user = get_user(session, user_id)
-    session.delete(user)
-    session.commit()
+async def delete_user(session: AsyncSession, user_id: str) -> None:
+    # Bulk DELETEs, children first (foreign keys): no reads, one statement per table
+    user_stories = select(Story.id).where(Story.user_id == user_id)
+    await session.execute(delete(StoryConfig).where(StoryConfig.story_id.in_(user_stories)))
+    story_ids = (
+        await session.scalars(
+            delete(Story).where(Story.user_id == user_id).returning(Story.id)
+        )
+    ).all()
+    preset_ids = (
+        await session.scalars(
+            delete(ConfigPreset)
+            .where(ConfigPreset.user_id == user_id)
+            .returning(ConfigPreset.id)
+        )
+    ).all()
+    await session.execute(delete(Token).where(Token.user_id == user_id))
+    result = await session.execute(delete(User).where(User.id == user_id))
+    if result.rowcount == 0:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    await session.commit()
+    for story_id in story_ids:
+        effective_config.invalidate(story_id=story_id)
+    for preset_id in preset_ids:
+        effective_config.invalidate(preset_id=preset_id)
 
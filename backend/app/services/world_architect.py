@@ -1,12 +1,21 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import json
+import logging
+import time
+from collections import Counter
 from typing import Any, cast
 
 import httpx
+import jinja2
 from pydantic import TypeAdapter, ValidationError
 
 from app.core.config import settings
+from app.core.database import run_in_session
+from app.core.http_client import http_clients
+from app.models.workflow_checkpoint import WorkflowCheckpoint
 from app.schemas.world_architect import (
     ArchitectDoneResponse,
     ArchitectLLMResponse,
@@ -15,11 +24,24 @@ from app.schemas.world_architect import (
     WorldArchitectStartRequest,
     WorldSkeleton,
 )
+from app.services import checkpoints as checkpoints_service
+from app.services import providers as provider_service
 from app.services import runs as runs_service
+from app.services.llm_cache import cache_key, llm_cache
+from app.services.llm_json import JsonObjectScanner, loads_tolerant
+from app.services.task_supervisor import supervisor as task_supervisor
 
+logger = logging.getLogger(__name__)
 
+_WORKFLOW = "world_architect"
 _ANSWERS_KEY = "world_architect_answers"
+# Event seqs of a resumed run start at attempt * stride (see resume_pending_runs)
+_RESUME_SEQ_STRIDE = 1_000_000_000
 _ARCHITECT_RESPONSE_ADAPTER = TypeAdapter(ArchitectLLMResponse)
+# strict / local_repair / llm_repair / failed (+ local_repair:<kind>)
+_json_parse_paths: Counter[str] = Counter()
+# calls / prompt_tokens / cached_prompt_tokens / completion_tokens
+_llm_usage: Counter[str] = Counter()
 
 
 def _build_plot_text(req: WorldArchitectStartRequest) -> str:
@@ -28,71 +50,124 @@ def _build_plot_text(req: WorldArchitectStartRequest) -> str:
     return (req.plot_type_custom or "").strip()
 
 
-def _json_schema_text() -> str:
-    # We embed JSON Schema as a guardrail + we validate strictly on the backend anyway.
-    return json.dumps(_ARCHITECT_RESPONSE_ADAPTER.json_schema(), ensure_ascii=False)
-
-
-def _system_prompt() -> str:
-    return (
-        "Ты — агент-архитектор мира. Ты создаёшь общий каркас вселенной для текстового игрового движка.\n\n"
-        "Ключевая идея:\n"
-        "- game_prompt = WORLD_CORE: краткое предисловие/синопсис СЕТТИНГА.\n"
-        "  Это НЕ инструкция, не обращение ко «второму лицу» и не роль ведущего.\n"
-        "  В WORLD_CORE НЕ должно быть сюжета, конкретных сцен, миссий, персонажей или событий.\n"
-        "  Только общая картина мира: эпоха, технологии/магия, устройство общества, ключевые реалии.\n"
-        "- world_bible = CORE_LORE: длинный, плотный, подробный лор мира.\n"
-        "  Это опорный текст, на базе которого будут генерироваться фракции, локации, детали и т.д.\n"
-        "  CORE_LORE должен быть существенно длиннее WORLD_CORE и покрывать мир «широкими мазками».\n"
-        "- global_conflict (опционально): макро-конфликт уровня мира (не квест/не конкретная сцена).\n\n"
-        "Жёсткие правила:\n"
-        "- Верни ТОЛЬКО валидный JSON. Никакого Markdown, комментариев или текста вокруг.\n"
-        "- JSON должен строго соответствовать SCHEMA (см. ниже).\n"
-        "- Фокус на общем, а не частном: не создавать персонажей, имена НПС, сюжетные арки, конкретные события.\n"
-        "- Можно упоминать «типы сил/групп» и «примеры локаций» без частных деталей и без имён персонажей.\n"
-        "- plot_type влияет только на акценты/темы/тип конфликтов и темп игры, но не превращается в сюжет.\n"
-        "- Вопросы задавай только если без них НЕЛЬЗЯ сделать качественный WORLD_CORE + CORE_LORE.\n"
-        "- Максимум 4 вопроса.\n"
-        "- Не спрашивай то, что уже дано пользователем: plot_type и нужен ли глобальный конфликт.\n"
-        "- Если is_global_conflict_enabled=false: global_conflict должен быть null/отсутствовать.\n"
-        "- Пиши нейтрально (3-е лицо), без «ты/вы/ведите игрока/реагируй».\n"
-    )
+# ---- Prompts: static parts are built once at import, per-run parts rendered from
+# precompiled templates ----
+
+# We embed JSON Schema as a guardrail + we validate strictly on the backend anyway.
+_RESPONSE_SCHEMA = _ARCHITECT_RESPONSE_ADAPTER.json_schema()
+_SCHEMA_TEXT = json.dumps(_RESPONSE_SCHEMA, ensure_ascii=False)
+
+# Native structured output for models that support it. Not `strict`: the
+# response is a union (top-level `oneOf`), which strict mode does not accept.
+_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "architect_response", "schema": _RESPONSE_SCHEMA},
+}
+
+_SYSTEM_PROMPT = (
+    "Ты — агент-архитектор мира. Ты создаёшь общий каркас вселенной для текстового игрового движка.\n\n"
+    "Ключевая идея:\n"
+    "- game_prompt = WORLD_CORE: краткое предисловие/синопсис СЕТТИНГА.\n"
+    "  Это НЕ инструкция, не обращение ко «второму лицу» и не роль ведущего.\n"
+    "  В WORLD_CORE НЕ должно быть сюжета, конкретных сцен, миссий, персонажей или событий.\n"
+    "  Только общая картина мира: эпоха, технологии/магия, устройство общества, ключевые реалии.\n"
+    "- world_bible = CORE_LORE: длинный, плотный, подробный лор мира.\n"
+    "  Это опорный текст, на базе которого будут генерироваться фракции, локации, детали и т.д.\n"
+    "  CORE_LORE должен быть существенно длиннее WORLD_CORE и покрывать мир «широкими мазками».\n"
+    "- global_conflict (опционально): макро-конфликт уровня мира (не квест/не конкретная сцена).\n\n"
+    "Жёсткие правила:\n"
+    "- Верни ТОЛЬКО валидный JSON. Никакого Markdown, комментариев или текста вокруг.\n"
+    "- JSON должен строго соответствовать SCHEMA (см. ниже).\n"
+    "- Фокус на общем, а не частном: не создавать персонажей, имена НПС, сюжетные арки, конкретные события.\n"
+    "- Можно упоминать «типы сил/групп» и «примеры локаций» без частных деталей и без имён персонажей.\n"
+    "- plot_type влияет только на акценты/темы/тип конфликтов и темп игры, но не превращается в сюжет.\n"
+    "- Вопросы задавай только если без них НЕЛЬЗЯ сделать качественный WORLD_CORE + CORE_LORE.\n"
+    "- Максимум 4 вопроса.\n"
+    "- Не спрашивай то, что уже дано пользователем: plot_type и нужен ли глобальный конфликт.\n"
+    "- Если is_global_conflict_enabled=false: global_conflict должен быть null/отсутствовать.\n"
+    "- Пиши нейтрально (3-е лицо), без «ты/вы/ведите игрока/реагируй».\n"
+)
+
+# Stable prefix shared by every call of every run (initial, final and repair
+# calls): rules + SCHEMA. Only user messages differ, so providers with prompt
+# caching (via the `cache_control` breakpoint, or automatic prefix caching)
+# serve this part from cache after the first call.
+_SYSTEM_CONTENT = f"{_SYSTEM_PROMPT}\nSCHEMA:\n{_SCHEMA_TEXT}\n"
+
+
+def _system_message() -> dict[str, Any]:
+    if not settings.OPENROUTER_PROMPT_CACHE:
+        return {"role": "system", "content": _SYSTEM_CONTENT}
+    return {
+        "role": "system",
+        "content": [
+            {"type": "text", "text": _SYSTEM_CONTENT, "cache_control": {"type": "ephemeral"}}
+        ],
+    }
+
+
+_TEMPLATES = jinja2.Environment(
+    autoescape=False,
+    keep_trailing_newline=True,
+    undefined=jinja2.StrictUndefined,
+)
+
+_INPUT_TEMPLATE_SOURCE = (
+    "INPUT:\n"
+    "- world_description: {{ world_description }}\n"
+    "- plot_type: {{ plot_type }}\n"
+    "- plot_type_custom: {{ plot_type_custom }}\n"
+    "- plot_text: {{ plot_text }}\n"
+    "- is_global_conflict_enabled: {{ is_global_conflict_enabled }}\n"
+)
+
+_USER_PROMPT_INITIAL_TEMPLATE = _TEMPLATES.from_string(
+    _INPUT_TEMPLATE_SOURCE
+    + "\n"
+    "Задача:\n"
+    "1) Если вход уже достаточно качественный — сразу верни mode=done со скелетом.\n"
+    "2) Если не хватает критически важных данных — верни mode=questions и задай вопросы.\n\n"
+    "Критерии качества для mode=done:\n"
+    "- WORLD_CORE (game_prompt) должен читаться как краткое предисловие к миру.\n"
+    "- CORE_LORE (world_bible) должен быть длинным и структурированным (можно списками/разделами).\n"
+    "- Никаких инструкций, 2-го лица, «ты ведущий», «реагируй», «описывай», и т.п.\n"
+    "- Никаких конкретных сюжетных сцен/миссий/персонажей. Только устройство мира.\n\n"
+    "Рекомендуемая структура CORE_LORE (не обязательно заголовками, но содержательно):\n"
+    "- Обзор мира и масштаб (планета/континенты/мегаполисы/мультивселенная)\n"
+    "- Технологии/магия/наука (что возможно, что запрещено/опасно)\n"
+    "- Социальное устройство, экономика, власть (какие силы доминируют)\n"
+    "- Культура/повседневность (как живут обычные люди)\n"
+    "- География/типы локаций (уровни/регионы/биомы) — без конкретных сюжетных точек\n"
+    "- Типы угроз и конфликтов (локальные, системные)\n"
+    "- Точки входа для игры (какие «роли» обычно возможны) без имен персонажей\n"
+)
+
+_USER_PROMPT_FINAL_TEMPLATE = _TEMPLATES.from_string(
+    _INPUT_TEMPLATE_SOURCE
+    + "- user_answers: {{ answers_json }}\n\n"
+    "Теперь ОБЯЗАТЕЛЬНО верни mode=done и заполни skeleton.\n"
+    "Те же правила: никакого 2-го лица и инструкций; никакого сюжета/персонажей/сцен.\n"
+    "WORLD_CORE = краткое предисловие; CORE_LORE = длинный базовый лор.\n"
+)
+
+
+def _input_context(req: WorldArchitectStartRequest) -> dict[str, Any]:
+    return {
+        "world_description": req.world_description.strip(),
+        "plot_type": req.plot_type,
+        "plot_type_custom": (req.plot_type_custom or "").strip(),
+        "plot_text": _build_plot_text(req),
+        "is_global_conflict_enabled": req.is_global_conflict_enabled,
+    }
 
 
 def _user_prompt_initial(req: WorldArchitectStartRequest) -> str:
-    plot_text = _build_plot_text(req)
-    return (
-        "INPUT:\n"
-        f"- world_description: {req.world_description.strip()}\n"
-        f"- plot_type: {req.plot_type}\n"
-        f"- plot_type_custom: {(req.plot_type_custom or '').strip()}\n"
-        f"- plot_text: {plot_text}\n"
-        f"- is_global_conflict_enabled: {req.is_global_conflict_enabled}\n\n"
-        "Задача:\n"
-        "1) Если вход уже достаточно качественный — сразу верни mode=done со скелетом.\n"
-        "2) Если не хватает критически важных данных — верни mode=questions и задай вопросы.\n\n"
-        "Критерии качества для mode=done:\n"
-        "- WORLD_CORE (game_prompt) должен читаться как краткое предисловие к миру.\n"
-        "- CORE_LORE (world_bible) должен быть длинным и структурированным (можно списками/разделами).\n"
-        "- Никаких инструкций, 2-го лица, «ты ведущий», «реагируй», «описывай», и т.п.\n"
-        "- Никаких конкретных сюжетных сцен/миссий/персонажей. Только устройство мира.\n\n"
-        "Рекомендуемая структура CORE_LORE (не обязательно заголовками, но содержательно):\n"
-        "- Обзор мира и масштаб (планета/континенты/мегаполисы/мультивселенная)\n"
-        "- Технологии/магия/наука (что возможно, что запрещено/опасно)\n"
-        "- Социальное устройство, экономика, власть (какие силы доминируют)\n"
-        "- Культура/повседневность (как живут обычные люди)\n"
-        "- География/типы локаций (уровни/регионы/биомы) — без конкретных сюжетных точек\n"
-        "- Типы угроз и конфликтов (локальные, системные)\n"
-        "- Точки входа для игры (какие «роли» обычно возможны) без имен персонажей\n\n"
-        "SCHEMA:\n"
-        f"{_json_schema_text()}\n"
-    )
+    return _USER_PROMPT_INITIAL_TEMPLATE.render(_input_context(req))
 
 
 def _user_prompt_final(
     req: WorldArchitectStartRequest, answers: dict[str, HitlAnswer]
 ) -> str:
-    plot_text = _build_plot_text(req)
     answers_json = json.dumps(
         {
             qid: {
@@ -103,35 +178,20 @@ def _user_prompt_final(
         },
         ensure_ascii=False,
     )
-    return (
-        "INPUT:\n"
-        f"- world_description: {req.world_description.strip()}\n"
-        f"- plot_type: {req.plot_type}\n"
-        f"- plot_type_custom: {(req.plot_type_custom or '').strip()}\n"
-        f"- plot_text: {plot_text}\n"
-        f"- is_global_conflict_enabled: {req.is_global_conflict_enabled}\n"
-        f"- user_answers: {answers_json}\n\n"
-        "Теперь ОБЯЗАТЕЛЬНО верни mode=done и заполни skeleton.\n"
-        "Те же правила: никакого 2-го лица и инструкций; никакого сюжета/персонажей/сцен.\n"
-        "WORLD_CORE = краткое предисловие; CORE_LORE = длинный базовый лор.\n\n"
-        "SCHEMA:\n"
-        f"{_json_schema_text()}\n"
-    )
-
+    return _USER_PROMPT_FINAL_TEMPLATE.render(_input_context(req), answers_json=answers_json)
 
-def _extract_json(text: str) -> str:
-    s = text.strip()
-    if s.startswith("{") and s.endswith("}"):
-        return s
-    # Best-effort: cut first JSON object.
-    start = s.find("{")
-    end = s.rfind("}")
-    if start >= 0 and end > start:
-        return s[start : end + 1]
-    return s
 
+async def _call_openrouter_chat(
+    *, user: str, run_id: str | None = None, phase: str = "repair", cache: bool = False
+) -> str:
+    """
+    Chat completion text for `user` after the shared system prefix. With `run_id`
+    (and OPENROUTER_STREAMING) the completion is streamed and its deltas are
+    published to the run as `token` events.
 
-async def _call_openrouter_chat(*, system: str, user: str) -> str:
+    With `cache` (and LLM_CACHE_ENABLED) an identical earlier request is
+    answered from the LLM response cache without calling the model.
+    """
     model = settings.openrouter_main_model
     if not model:
         raise RuntimeError("OPENROUTER model is not configured in env")
@@ -141,23 +201,54 @@ async def _call_openrouter_chat(*, system: str, user: str) -> str:
     if token:
         headers["Authorization"] = f"Bearer {token}"
 
-    payload = {
+    payload: dict[str, Any] = {
         "model": model,
-        "messages": [
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
-        ],
+        "messages": [_system_message(), {"role": "user", "content": user}],
         "temperature": 0.2,
+        # Token counts (incl. cached prompt tokens) in the response
+        "usage": {"include": True},
     }
+    if await _supports_structured_output(model):
+        payload["response_format"] = _RESPONSE_FORMAT
+        # Route only to providers of the model that honour `response_format`
+        payload["provider"] = {"require_parameters": True}
+
+    key = cache_key(payload) if cache and settings.LLM_CACHE_ENABLED else None
+    if key is not None:
+        cached = await llm_cache.get(key)
+        if cached is not None:
+            if run_id is not None and settings.OPENROUTER_STREAMING:
+                await runs_service.publish(
+                    run_id, "token", {"phase": phase, "offset": 0, "delta": cached}
+                )
+            return cached
+
+    text = await _request_openrouter_chat(payload, headers, run_id=run_id, phase=phase)
+    if key is not None and _is_cacheable(text):
+        await llm_cache.put(key, text)
+    return text
+
+
+def _is_cacheable(text: str) -> bool:
+    """Only complete JSON objects are cached: truncated / garbled output is not replayed."""
+    try:
+        _, repairs = loads_tolerant(text)
+    except ValueError:
+        return False
+    return "truncated" not in repairs
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        resp = await client.post(
-            f"{settings.OPENROUTER_BASE_URL.rstrip('/')}/chat/completions",
-            headers=headers,
-            json=payload,
-        )
-        resp.raise_for_status()
-        data = resp.json()
+
+async def _request_openrouter_chat(
+    payload: dict[str, Any], headers: dict[str, str], *, run_id: str | None, phase: str
+) -> str:
+    url = f"{settings.OPENROUTER_BASE_URL.rstrip('/')}/chat/completions"
+    if run_id is not None and settings.OPENROUTER_STREAMING:
+        return await _stream_openrouter_chat(url, headers, payload, run_id=run_id, phase=phase)
+
+    resp = await http_clients.get(url).post(url, headers=headers, json=payload, timeout=60.0)
+    resp.raise_for_status()
+    data = resp.json()
+    _record_usage(data.get("usage"), phase)
 
     try:
         return str(data["choices"][0]["message"]["content"])
@@ -165,38 +256,165 @@ async def _call_openrouter_chat(*, system: str, user: str) -> str:
         raise RuntimeError(f"Unexpected OpenRouter response format: {e}") from e
 
 
+async def _supports_structured_output(model: str) -> bool:
+    """
+    Whether `model` accepts `response_format: json_schema`, per the OpenRouter
+    catalog. Unknown models keep relying on the SCHEMA embedded in the prompt.
+    """
+    if not settings.OPENROUTER_STRUCTURED_OUTPUT:
+        return False
+    params = await provider_service.get_openrouter_supported_parameters(model)
+    return params is not None and "structured_outputs" in params
+
+
+async def _stream_openrouter_chat(
+    url: str, headers: dict[str, str], payload: dict[str, Any], *, run_id: str, phase: str
+) -> str:
+    """
+    `stream: true` completion. Deltas are batched into one `token` event
+    ({"phase", "offset", "delta"}) per LLM_TOKEN_EVENT_INTERVAL_SECONDS; `offset`
+    lets clients detect gaps. A JsonObjectScanner follows the JSON object as it
+    arrives, so it is ready for validation the moment its closing brace does.
+    """
+    scanner = JsonObjectScanner()
+    pending: list[str] = []
+    offset = 0
+    last_flush = time.monotonic()
+
+    async def flush() -> None:
+        nonlocal offset, last_flush
+        last_flush = time.monotonic()
+        if not pending:
+            return
+        delta = "".join(pending)
+        pending.clear()
+        await runs_service.publish(
+            run_id, "token", {"phase": phase, "offset": offset, "delta": delta}
+        )
+        offset += len(delta)
+
+    # No limit on the total duration, only on silence between chunks.
+    timeout = httpx.Timeout(
+        settings.OPENROUTER_STREAM_IDLE_TIMEOUT_SECONDS,
+        connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS,
+    )
+    client = http_clients.get(url)
+    async with client.stream(
+        "POST", url, headers=headers, json={**payload, "stream": True}, timeout=timeout
+    ) as resp:
+        resp.raise_for_status()
+        async for line in resp.aiter_lines():
+            # Skip event separators and ": OPENROUTER PROCESSING" keep-alive comments
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            try:
+                chunk = json.loads(data)
+            except json.JSONDecodeError as e:
+                raise RuntimeError(f"Unexpected OpenRouter stream chunk: {e}") from e
+            if "error" in chunk:
+                raise RuntimeError(f"OpenRouter stream error: {chunk['error']}")
+            if chunk.get("usage"):
+                # Sent with the last chunk, after the JSON object is complete
+                _record_usage(chunk["usage"], phase)
+            choices = chunk.get("choices") or []
+            delta = (choices[0].get("delta") or {}).get("content") if choices else None
+            if not delta or scanner.complete:
+                continue
+            scanner.feed(delta)
+            pending.append(delta)
+            if time.monotonic() - last_flush >= settings.LLM_TOKEN_EVENT_INTERVAL_SECONDS:
+                await flush()
+    await flush()
+    return scanner.text
+
+
+def _record_usage(usage: dict[str, Any] | None, phase: str) -> None:
+    if not usage:
+        return
+    prompt_tokens = int(usage.get("prompt_tokens") or 0)
+    cached_tokens = int((usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0)
+    completion_tokens = int(usage.get("completion_tokens") or 0)
+    _llm_usage["calls"] += 1
+    _llm_usage["prompt_tokens"] += prompt_tokens
+    _llm_usage["cached_prompt_tokens"] += cached_tokens
+    _llm_usage["completion_tokens"] += completion_tokens
+    logger.info(
+        "OpenRouter %s call: prompt_tokens=%d (cached %d), completion_tokens=%d",
+        phase,
+        prompt_tokens,
+        cached_tokens,
+        completion_tokens,
+    )
+
+
+def get_llm_usage_stats() -> dict[str, int]:
+    """Token usage of world architect LLM calls; `cached_prompt_tokens` were served from the provider's prompt cache."""
+    return dict(_llm_usage)
+
+
+async def get_llm_cache_stats() -> dict[str, int] | None:
+    """LLM response cache counters and size; None when the cache is disabled."""
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    return await llm_cache.stats()
+
+
+def get_json_parse_stats() -> dict[str, int]:
+    """How LLM outputs were turned into a valid response, by path and local repair kind."""
+    return dict(_json_parse_paths)
+
+
 async def _parse_and_validate_llm_json(
     raw_text: str, *, attempt_repair: int = 2
 ) -> ArchitectLLMResponse:
+    """
+    Parse + validate LLM output. Defects that can be fixed locally (see
+    `llm_json.loads_tolerant`) never cost a request; asking the model to fix
+    its JSON is the last resort, at most `attempt_repair` times.
+    """
     last_error: str | None = None
     text = raw_text
 
-    for _ in range(attempt_repair + 1):
-        candidate = _extract_json(text)
+    for attempt in range(attempt_repair + 1):
         try:
-            payload = json.loads(candidate)
-        except json.JSONDecodeError as e:
+            payload, repairs = loads_tolerant(text)
+        except ValueError as e:
             last_error = f"JSON parse error: {e}"
-            text = await _call_openrouter_chat(
-                system=(
-                    "Ты исправляешь JSON. Верни ТОЛЬКО валидный JSON по SCHEMA, без текста."
-                ),
-                user=f"Invalid JSON:\n{candidate}\n\nError:\n{last_error}\n\nSCHEMA:\n{_json_schema_text()}",
+            repair_prompt = (
+                "Ты исправляешь JSON. Верни ТОЛЬКО валидный JSON по SCHEMA, без текста.\n\n"
+                f"Invalid JSON:\n{text}\n\nError:\n{last_error}\n"
             )
-            continue
-
-        try:
-            return _ARCHITECT_RESPONSE_ADAPTER.validate_python(payload)
-        except ValidationError as e:
-            last_error = f"Schema validation error: {e.errors()[:3]}"
-            text = await _call_openrouter_chat(
-                system=(
+        else:
+            try:
+                result = _ARCHITECT_RESPONSE_ADAPTER.validate_python(payload)
+            except ValidationError as e:
+                last_error = f"Schema validation error: {e.errors()[:3]}"
+                repair_prompt = (
                     "Ты исправляешь JSON, чтобы он строго соответствовал SCHEMA. "
-                    "Верни ТОЛЬКО JSON, без текста."
-                ),
-                user=f"Invalid JSON:\n{json.dumps(payload, ensure_ascii=False)}\n\nError:\n{last_error}\n\nSCHEMA:\n{_json_schema_text()}",
-            )
-
+                    "Верни ТОЛЬКО JSON, без текста.\n\n"
+                    f"Invalid JSON:\n{json.dumps(payload, ensure_ascii=False)}\n\n"
+                    f"Error:\n{last_error}\n"
+                )
+            else:
+                if attempt:
+                    _json_parse_paths["llm_repair"] += 1
+                elif repairs:
+                    _json_parse_paths["local_repair"] += 1
+                else:
+                    _json_parse_paths["strict"] += 1
+                for kind in repairs:
+                    _json_parse_paths[f"local_repair:{kind}"] += 1
+                return result
+
+        # No repair request whose answer would never be parsed
+        if attempt == attempt_repair:
+            break
+        text = await _call_openrouter_chat(user=repair_prompt)
+
+    _json_parse_paths["failed"] += 1
     raise RuntimeError(last_error or "Failed to parse/validate LLM JSON")
 
 
@@ -204,51 +422,128 @@ async def _publish_stage(run_id: str, stage: str) -> None:
     await runs_service.publish(run_id, "stage", {"stage": stage})
 
 
-async def run_world_architect(run_id: str, req: WorldArchitectStartRequest) -> None:
+async def _checkpoint(run_id: str, **fields: Any) -> None:
+    await run_in_session(
+        checkpoints_service.save_checkpoint, run_id, **fields
+    )
+
+
+def _restore_skeleton(checkpoint: WorkflowCheckpoint | None) -> WorldSkeleton | None:
+    if checkpoint is None or checkpoint.result is None:
+        return None
+    return WorldSkeleton.model_validate(checkpoint.result)
+
+
+def _restore_analysis(checkpoint: WorkflowCheckpoint | None) -> ArchitectLLMResponse | None:
+    if checkpoint is None or checkpoint.analysis is None:
+        return None
+    return _ARCHITECT_RESPONSE_ADAPTER.validate_python(checkpoint.analysis)
+
+
+async def _collect_answers(
+    run_id: str, questions: ArchitectQuestionsResponse
+) -> dict[str, HitlAnswer] | None:
+    """Publish HITL questions and wait for answers. None if the run was cancelled."""
+    await _publish_stage(run_id, "asking")
+    await runs_service.publish(
+        run_id,
+        "hitl_questions",
+        {"questions": [q.model_dump(mode="json") for q in questions.questions]},
+    )
+
+    # Wait for answers
+    await _publish_stage(run_id, "waiting_for_answers")
+    payload = await runs_service.wait_workflow_payload(run_id, _ANSWERS_KEY)
+    # No payload: the run was cancelled, or evicted / never registered on the bus
+    if payload is None or await runs_service.is_cancelled(run_id):
+        return None
+    payload = await runs_service.pop_workflow_payload(run_id, _ANSWERS_KEY)
+    answers = (
+        cast(dict[str, Any], payload) if isinstance(payload, dict) else {}
+    )
+    return {qid: HitlAnswer.model_validate(a) for qid, a in answers.items()}
+
+
+async def run_world_architect(
+    run_id: str,
+    req: WorldArchitectStartRequest,
+    checkpoint: WorkflowCheckpoint | None = None,
+) -> None:
     """
     Main workflow:
     - Analyze input -> either ask questions or finish skeleton.
     - If asked -> wait for answers -> finalize skeleton.
     Publishes progress through SSE run events.
+
+    Every completed stage is checkpointed; with `checkpoint` the workflow
+    resumes after its last completed stage instead of starting over.
     """
     try:
-        await _publish_stage(run_id, "analyzing")
-
-        raw = await _call_openrouter_chat(system=_system_prompt(), user=_user_prompt_initial(req))
-        result = await _parse_and_validate_llm_json(raw)
-
-        # Round 1
-        if isinstance(result, ArchitectQuestionsResponse):
-            await _publish_stage(run_id, "asking")
-            await runs_service.publish(
-                run_id,
-                "hitl_questions",
-                {"questions": [q.model_dump(mode="json") for q in result.questions]},
-            )
-
-            # Wait for answers
-            await _publish_stage(run_id, "waiting_for_answers")
-            _ = await runs_service.wait_workflow_payload(run_id, _ANSWERS_KEY)
-            if await runs_service.is_cancelled(run_id):
-                return
-            payload = await runs_service.pop_workflow_payload(run_id, _ANSWERS_KEY)
-            answers = (
-                cast(dict[str, Any], payload) if isinstance(payload, dict) else {}
-            )
-            parsed_answers: dict[str, HitlAnswer] = {
-                qid: HitlAnswer.model_validate(a) for qid, a in answers.items()
-            }
-
-            await _publish_stage(run_id, "building")
-            raw2 = await _call_openrouter_chat(
-                system=_system_prompt(), user=_user_prompt_final(req, parsed_answers)
-            )
-            final_result = await _parse_and_validate_llm_json(raw2)
-            if not isinstance(final_result, ArchitectDoneResponse):
-                raise RuntimeError("LLM returned questions again during finalize")
-            skeleton = final_result.skeleton
-        else:
-            skeleton = result.skeleton
+        if await runs_service.is_cancelled(run_id):
+            await _checkpoint(run_id, stage="cancelled")
+            return
+
+        skeleton = _restore_skeleton(checkpoint)
+        if skeleton is None:
+            result = _restore_analysis(checkpoint)
+            if result is None:
+                await _publish_stage(run_id, "analyzing")
+                raw = await _call_openrouter_chat(
+                    user=_user_prompt_initial(req),
+                    run_id=run_id,
+                    phase="analysis",
+                    cache=not req.bypass_cache,
+                )
+                result = await _parse_and_validate_llm_json(raw)
+                await _checkpoint(
+                    run_id,
+                    stage="waiting_for_answers"
+                    if isinstance(result, ArchitectQuestionsResponse)
+                    else "finalizing",
+                    analysis_raw=raw,
+                    analysis=result.model_dump(mode="json"),
+                )
+
+            # Round 1
+            if isinstance(result, ArchitectQuestionsResponse):
+                if checkpoint is not None and checkpoint.answers is not None:
+                    parsed_answers = {
+                        qid: HitlAnswer.model_validate(a)
+                        for qid, a in checkpoint.answers.items()
+                    }
+                else:
+                    answers = await _collect_answers(run_id, result)
+                    if answers is None:
+                        await _checkpoint(run_id, stage="cancelled")
+                        return
+                    parsed_answers = answers
+                    await _checkpoint(
+                        run_id,
+                        stage="building",
+                        answers={
+                            qid: a.model_dump(mode="json") for qid, a in parsed_answers.items()
+                        },
+                    )
+
+                await _publish_stage(run_id, "building")
+                raw2 = await _call_openrouter_chat(
+                    user=_user_prompt_final(req, parsed_answers),
+                    run_id=run_id,
+                    phase="final",
+                    cache=not req.bypass_cache,
+                )
+                final_result = await _parse_and_validate_llm_json(raw2)
+                if not isinstance(final_result, ArchitectDoneResponse):
+                    raise RuntimeError("LLM returned questions again during finalize")
+                skeleton = final_result.skeleton
+                await _checkpoint(
+                    run_id,
+                    stage="finalizing",
+                    final_raw=raw2,
+                    result=skeleton.model_dump(mode="json"),
+                )
+            else:
+                skeleton = result.skeleton
 
         # Enforce global conflict toggle
         if not req.is_global_conflict_enabled:
@@ -266,6 +561,145 @@ async def run_world_architect(run_id: str, req: WorldArchitectStartRequest) -> N
         await _publish_stage(run_id, "finalizing")
         await runs_service.publish(run_id, "world_skeleton", skeleton.model_dump(mode="json"))
         await runs_service.publish(run_id, "done", {"ok": True})
+        await _checkpoint(run_id, stage="completed", result=skeleton.model_dump(mode="json"))
+    except asyncio.CancelledError:
+        # Cancelled via `/runs/{id}/cancel` (the checkpoint is already marked) or
+        # by shutdown: then the checkpoint stays resumable.
+        raise
     except Exception as e:  # noqa: BLE001
         await runs_service.publish(run_id, "error", {"message": str(e)})
+        with contextlib.suppress(Exception):
+            await _checkpoint(run_id, stage="failed", error=str(e))
+
+
+# ---- Execution: leases, resume after restart ----
+
+_maintenance_task: asyncio.Task[None] | None = None
+
+
+def _spawn(
+    run_id: str,
+    req: WorldArchitectStartRequest,
+    checkpoint: WorkflowCheckpoint | None,
+    *,
+    user_id: str | None,
+    reserved: bool = False,
+) -> None:
+    task_supervisor.spawn(
+        run_id,
+        lambda: run_world_architect(run_id, req, checkpoint),
+        user_id=user_id,
+        admitted=True,
+        reserved=reserved,
+    )
 
+
+async def start_run(req: WorldArchitectStartRequest, *, user_id: str) -> str:
+    """
+    Create a run, checkpoint it and queue it for execution.
+    Raises 429 / 503 when the task supervisor does not admit more runs.
+    """
+    # Reserved before the first await, so concurrent requests cannot all be admitted
+    task_supervisor.reserve(user_id)
+    try:
+        run_id = await runs_service.create_run()
+        await run_in_session(
+            checkpoints_service.create_checkpoint,
+            run_id=run_id,
+            workflow=_WORKFLOW,
+            user_id=user_id,
+            request=req.model_dump(mode="json"),
+            stage="analyzing",
+            lease_seconds=settings.WORKFLOW_CHECKPOINT_LEASE_SECONDS,
+        )
+    except BaseException:
+        task_supervisor.unreserve(user_id)
+        raise
+    _spawn(run_id, req, None, user_id=user_id, reserved=True)
+    return run_id
+
+
+async def resume_pending_runs() -> int:
+    """Resume unfinished runs left behind by crashed or stopped workers."""
+    claimed = await run_in_session(
+        checkpoints_service.claim_expired,
+        workflow=_WORKFLOW,
+        lease_seconds=settings.WORKFLOW_CHECKPOINT_LEASE_SECONDS,
+    )
+    for checkpoint in claimed:
+        logger.info("Resuming run %s from stage %s", checkpoint.run_id, checkpoint.stage)
+        req = WorldArchitectStartRequest.model_validate(checkpoint.request)
+        # Every attempt gets its own seq range, above any id of the previous one.
+        await runs_service.resume_run(
+            checkpoint.run_id, min_seq=checkpoint.attempt * _RESUME_SEQ_STRIDE
+        )
+        _spawn(checkpoint.run_id, req, checkpoint, user_id=checkpoint.user_id)
+    return len(claimed)
+
+
+async def renew_leases() -> None:
+    """
+    Renew leases of all runs supervised by this worker (queued ones included)
+    and stop runs whose lease was lost, e.g. cancelled from another worker.
+    """
+    run_ids = task_supervisor.keys()
+    owned = await run_in_session(
+        checkpoints_service.renew_leases,
+        run_ids,
+        settings.WORKFLOW_CHECKPOINT_LEASE_SECONDS,
+    )
+    for run_id in run_ids:
+        if run_id not in owned and task_supervisor.cancel(run_id):
+            logger.warning("Lost lease on run %s, stopping it here", run_id)
+
+
+async def _maintain_forever() -> None:
+    # Leases are renewed every third of their duration; resuming runs of dead
+    # workers and purging old checkpoints happens once per lease period.
+    # Checkpoints are written with resuming disabled too, so they are purged
+    # regardless, and a failed resume does not skip the purge.
+    interval = settings.WORKFLOW_CHECKPOINT_LEASE_SECONDS / 3
+    tick = 0
+    while True:
+        if settings.WORKFLOW_RESUME_ENABLED:
+            try:
+                await renew_leases()
+                if tick % 3 == 0:
+                    await resume_pending_runs()
+            except Exception:  # noqa: BLE001
+                logger.exception("Workflow checkpoint maintenance failed")
+        if tick % 3 == 0:
+            try:
+                await run_in_session(
+                    checkpoints_service.delete_finished,
+                    older_than_seconds=settings.WORKFLOW_CHECKPOINT_RETENTION_SECONDS,
+                )
+            except Exception:  # noqa: BLE001
+                logger.exception("Purging finished workflow checkpoints failed")
+        tick += 1
+        await asyncio.sleep(interval)
+
+
+async def start() -> None:
+    """
+    Start checkpoint maintenance (called from the app lifespan): purging old
+    checkpoints and, with WORKFLOW_RESUME_ENABLED, lease renewal / resuming.
+    """
+    global _maintenance_task
+    if _maintenance_task is None or _maintenance_task.done():
+        _maintenance_task = asyncio.create_task(_maintain_forever())
+
+
+async def stop() -> None:
+    """
+    Stop lease maintenance and hand checkpoints of unfinished runs over to other
+    workers. Called after the task supervisor has drained.
+    """
+    global _maintenance_task
+    if _maintenance_task is not None:
+        _maintenance_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await _maintenance_task
+        _maintenance_task = None
+    await run_in_session(checkpoints_service.release_leases)
+    llm_cache.close()
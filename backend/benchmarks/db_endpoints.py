@@ -0,0 +1,142 @@
+"""
+Load benchmark of the database-backed stories / presets endpoints.
+
+Requests go through the ASGI app in-process (no network), `--concurrency` at a
+time, on one event loop like a uvicorn worker, so the numbers include session
+setup, pooling, queries and serialization. The database is a fresh SQLite file
+unless `--url` is given.
+
+Usage (from `backend/`):
+    python -m benchmarks.db_endpoints
+    python -m benchmarks.db_endpoints --stories 200 --requests 2000 --concurrency 32
+    python -m benchmarks.db_endpoints --echo   # cost of SQL logging (discarded)
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+from typing import Any
+
+_USER_ID = "bench-user"
+
+
+async def _seed(stories: int) -> tuple[list[str], list[str]]:
+    from app.core.database import async_session, init_db
+    from app.models import User
+    from app.schemas.story import StoryCreate
+    from app.services import presets as presets_service
+    from app.services import stories as stories_service
+
+    init_db()
+    async with async_session() as session:
+        if await session.get(User, _USER_ID) is None:
+            session.add(User(id=_USER_ID, name="bench"))
+            await session.commit()
+        preset_ids = [
+            (await presets_service.create_default_preset_structure(session, _USER_ID)).id
+            for _ in range(5)
+        ]
+        story_ids = [
+            (
+                await stories_service.create_story(
+                    session,
+                    _USER_ID,
+                    StoryCreate(title=f"Story {i}", preset_id=preset_ids[i % len(preset_ids)]),
+                )
+            ).id
+            for i in range(stories)
+        ]
+    return preset_ids, story_ids
+
+
+async def _run(paths: list[str], requests: int, concurrency: int) -> tuple[float, list[float]]:
+    import httpx
+
+    from app.main import app
+
+    latencies: list[float] = []
+    counter = iter(range(requests))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", headers={"X-User-ID": _USER_ID}
+    ) as client:
+
+        async def worker() -> None:
+            for i in counter:
+                started = time.perf_counter()
+                response = await client.get(paths[i % len(paths)])
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return elapsed, latencies
+
+
+def _report(name: str, elapsed: float, latencies: list[float]) -> None:
+    ms = sorted(latency * 1000 for latency in latencies)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    print(
+        f"{name:<16} {len(ms):>8} {len(ms) / elapsed:>8.0f} "
+        f"{statistics.median(ms):>8.2f} {p95:>8.2f} {ms[-1]:>8.2f}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="DATABASE_URL (default: a temporary SQLite file)")
+    parser.add_argument("--stories", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--echo", action="store_true", help="log every SQL statement")
+    args = parser.parse_args()
+
+    tmpdir: Any = None
+    if args.url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        args.url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    # Settings (and the engine) are read on first import of the app.
+    os.environ["DATABASE_URL"] = args.url
+    os.environ["DATABASE_ECHO"] = "true" if args.echo else "false"
+    if args.echo:
+        from app.core.database import engine  # noqa: F401  (installs the echo handler)
+
+        # Keep formatting / emitting the records, just not to the terminal.
+        for handler in logging.getLogger("sqlalchemy.engine.Engine").handlers:
+            if isinstance(handler, logging.StreamHandler):
+                handler.setStream(open(os.devnull, "w"))
+
+    preset_ids, story_ids = await _seed(args.stories)
+    prefix = "/api/v1"
+    scenarios = {
+        "stories list": [f"{prefix}/stories/"],
+        "story detail": [f"{prefix}/stories/{story_id}" for story_id in story_ids],
+        "presets list": [f"{prefix}/presets/"],
+        "preset detail": [f"{prefix}/presets/{preset_id}" for preset_id in preset_ids],
+    }
+
+    print(f"{args.url} (echo={args.echo}, concurrency={args.concurrency})")
+    print(f"{'scenario':<16} {'requests':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for name, paths in scenarios.items():
+        # Warm up pools / caches
+        await _run(paths, min(args.concurrency, args.requests), args.concurrency)
+        elapsed, latencies = await _run(paths, args.requests, args.concurrency)
+        _report(name, elapsed, latencies)
+
+    from app.core.database import async_engine, engine
+
+    await async_engine.dispose()
+    engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,201 @@
+"""
+Latency of the per-user list queries as the tables grow.
+
+Seeds users with a fixed number of stories / presets / tokens each and grows
+the dataset step by step (default up to 100k stories); at every step the
+stories / presets / tokens services are timed for random users. With the
+listing indexes the latency should stay flat; `--no-indexes` drops them for
+comparison, `--explain` prints the SQLite query plans.
+
+Usage (from `backend/`):
+    python -m benchmarks.list_scaling
+    python -m benchmarks.list_scaling --stories 1000 10000 100000 --no-indexes
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable
+
+# Indexes added for the list queries (alembic c3e5a7b9d1f2)
+_LISTING_INDEXES = (
+    "ix_stories_user_updated",
+    "ix_stories_user_active_updated",
+    "ix_config_presets_user_created",
+    "ix_config_presets_user_default",
+    "ix_tokens_user_created",
+)
+
+
+def _seed_users(users: int, stories_per_user: int) -> list[str]:
+    """Insert `users` users with their presets, tokens and stories; returns their ids."""
+    from sqlalchemy import insert
+    from sqlmodel import Session
+
+    from app.core.database import engine
+    from app.models import ConfigPreset, Story, Token, User
+    from app.models.provider import ProviderType
+
+    now = datetime.utcnow()
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+    user_rows, preset_rows, token_rows, story_rows = [], [], [], []
+    for user_id in user_ids:
+        user_rows.append({"id": user_id, "name": f"user-{user_id}", "created_at": now})
+        preset_ids = [str(uuid.uuid4()) for _ in range(3)]
+        for i, preset_id in enumerate(preset_ids):
+            preset_rows.append(
+                {
+                    "id": preset_id,
+                    "user_id": user_id,
+                    "name": f"Preset {i}",
+                    "is_default": i == 0,
+                    "config_data": {},
+                    "created_at": now - timedelta(minutes=i),
+                    "updated_at": now,
+                }
+            )
+        for i in range(2):
+            token_rows.append(
+                {
+                    "id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "provider": ProviderType.OPENROUTER,
+                    "name": f"Key {i}",
+                    "encrypted_token": "x",
+                    "is_active": True,
+                    "created_at": now - timedelta(minutes=i),
+                    "updated_at": now,
+                }
+            )
+        for i in range(stories_per_user):
+            story_rows.append(
+                {
+                    "id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "title": f"Story {i}",
+                    "preset_id": preset_ids[0],
+                    "is_active": i % 4 != 0,
+                    "created_at": now,
+                    "updated_at": now - timedelta(seconds=random.randrange(86400 * 30)),
+                }
+            )
+
+    with Session(engine) as session:
+        for model, rows in (
+            (User, user_rows),
+            (ConfigPreset, preset_rows),
+            (Token, token_rows),
+            (Story, story_rows),
+        ):
+            session.execute(insert(model), rows)
+        session.commit()
+    return user_ids
+
+
+def _explain(user_id: str) -> None:
+    from sqlalchemy import text
+
+    from app.core.database import engine
+
+    queries = {
+        "stories": "SELECT * FROM stories WHERE user_id = :u ORDER BY updated_at DESC",
+        "active stories": (
+            "SELECT * FROM stories WHERE user_id = :u AND is_active = 1 "
+            "ORDER BY updated_at DESC"
+        ),
+        "presets": "SELECT * FROM config_presets WHERE user_id = :u ORDER BY created_at",
+        "default preset": "SELECT * FROM config_presets WHERE user_id = :u AND is_default = 1",
+        "tokens": "SELECT * FROM tokens WHERE user_id = :u ORDER BY created_at",
+    }
+    with engine.connect() as conn:
+        for name, sql in queries.items():
+            plan = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), {"u": user_id}).all()
+            print(f"  {name:<15} {'; '.join(row[-1] for row in plan)}")
+
+
+async def _time(
+    fn: Callable[[Any, str], Awaitable[Any]], user_ids: list[str], repeats: int
+) -> tuple[float, float]:
+    from app.core.database import async_session
+
+    latencies = []
+    async with async_session() as session:
+        for _ in range(repeats):
+            user_id = random.choice(user_ids)
+            started = time.perf_counter()
+            await fn(session, user_id)
+            latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95)]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--stories", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--stories-per-user", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=300)
+    parser.add_argument("--no-indexes", action="store_true", help="drop the listing indexes")
+    parser.add_argument("--explain", action="store_true", help="print SQLite query plans")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    # Settings (and the engines) are read on first import of the app.
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir.name, 'list_scaling.db')}"
+    os.environ["DATABASE_ECHO"] = "false"
+
+    from sqlalchemy import text
+
+    from app.core.database import async_engine, engine, init_db
+    from app.services import presets as presets_service
+    from app.services import stories as stories_service
+    from app.services import tokens as tokens_service
+
+    init_db()
+    if args.no_indexes:
+        with engine.begin() as conn:
+            for name in _LISTING_INDEXES:
+                conn.execute(text(f"DROP INDEX {name}"))
+
+    scenarios: dict[str, Callable[[Any, str], Awaitable[Any]]] = {
+        "stories": stories_service.list_stories,
+        "active stories": lambda s, u: stories_service.list_stories(s, u, active_only=True),
+        "presets": presets_service.list_presets,
+        "default preset": presets_service.get_default_preset,
+        "tokens": tokens_service.list_tokens,
+    }
+
+    print(
+        f"indexes={'off' if args.no_indexes else 'on'}, "
+        f"{args.stories_per_user} stories per user, p50 / p95 ms"
+    )
+    print(f"{'stories':>8} {'users':>6} " + " ".join(f"{name:>15}" for name in scenarios))
+    user_ids: list[str] = []
+    for total in sorted(args.stories):
+        missing = total // args.stories_per_user - len(user_ids)
+        if missing > 0:
+            user_ids += _seed_users(missing, args.stories_per_user)
+            with engine.connect() as conn:
+                conn.execute(text("ANALYZE"))
+        cells = []
+        for fn in scenarios.values():
+            p50, p95 = await _time(fn, user_ids, args.repeats)
+            cells.append(f"{p50:>7.2f} /{p95:>6.2f}")
+        print(f"{len(user_ids) * args.stories_per_user:>8} {len(user_ids):>6} " + " ".join(cells))
+        if args.explain:
+            _explain(user_ids[0])
+
+    await async_engine.dispose()
+    engine.dispose()
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
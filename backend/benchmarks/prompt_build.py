@@ -0,0 +1,72 @@
+"""
+Microbenchmark: building world architect prompts.
+
+Before prompt compilation every prompt build (and every JSON repair attempt)
+regenerated the response JSON Schema (`TypeAdapter.json_schema()` +
+`json.dumps`); now the schema text and system prompt are computed once at
+import and user prompts are rendered from precompiled Jinja2 templates.
+
+Usage (from `backend/`):
+    python -m benchmarks.prompt_build
+    python -m benchmarks.prompt_build --number 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import timeit
+
+from pydantic import TypeAdapter
+
+from app.schemas.world_architect import (
+    ArchitectLLMResponse,
+    HitlAnswer,
+    WorldArchitectStartRequest,
+)
+from app.services import world_architect as wa
+
+
+_ADAPTER = TypeAdapter(ArchitectLLMResponse)
+
+
+def _schema_text_per_call() -> str:
+    return json.dumps(_ADAPTER.json_schema(), ensure_ascii=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=5000)
+    args = parser.parse_args()
+
+    req = WorldArchitectStartRequest(
+        world_description="Мир вечной осени, где города дрейфуют по небу. " * 20,
+        plot_type="exploration",
+        is_global_conflict_enabled=True,
+    )
+    answers = {
+        f"q{i}": HitlAnswer(selected_option_id=f"opt{i}", free_text="Свободный ответ " * 5)
+        for i in range(4)
+    }
+
+    cases = {
+        "schema text (old, per prompt)": _schema_text_per_call,
+        "initial user prompt": lambda: wa._user_prompt_initial(req),
+        "final user prompt": lambda: wa._user_prompt_final(req, answers),
+    }
+    timings = {
+        name: timeit.timeit(fn, number=args.number) / args.number * 1e6
+        for name, fn in cases.items()
+    }
+
+    print(f"{'build':>30} {'us/call':>9}")
+    for name, us in timings.items():
+        print(f"{name:>30} {us:>9.1f}")
+    schema_us = timings["schema text (old, per prompt)"]
+    for name in ("initial user prompt", "final user prompt"):
+        saved = schema_us / (schema_us + timings[name])
+        print(f"{name}: {saved:.0%} of the old build time was schema regeneration")
+
+
+if __name__ == "__main__":
+    main()
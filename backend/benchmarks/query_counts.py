@@ -0,0 +1,132 @@
+"""
+SQL statements issued per request by the CRUD endpoints (report only).
+
+Walks through the users / presets / stories / tokens endpoints on a fresh
+SQLite database and prints the statements each request sent, read from the
+`X-DB-Queries` header (app.core.sql_metrics). The budgets are enforced by
+tests/test_query_budgets.py.
+
+Usage (from `backend/`):
+    python -m benchmarks.query_counts
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import tempfile
+from typing import Any
+
+from cryptography.fernet import Fernet
+
+async def _measure() -> dict[str, int]:
+    import httpx
+
+    from app.core.database import async_engine, engine, init_db
+    from app.main import app
+
+    init_db()
+    counts: dict[str, int] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def call(name: str, method: str, path: str, **kwargs: Any) -> Any:
+            response = await client.request(method, f"/api/v1{path}", **kwargs)
+            response.raise_for_status()
+            counts[name] = int(response.headers["X-DB-Queries"])
+            return response.json() if response.content else None
+
+        user = await call("POST /users", "POST", "/users/", json={"name": "query-counts"})
+        user_id = user["id"]
+        headers = {"X-User-ID": user_id}
+        await call("GET /users/{id}", "GET", f"/users/{user_id}")
+        await call(
+            "PATCH /users/{id}/password", "PATCH", f"/users/{user_id}/password", json={}
+        )
+
+        default = await call("GET /presets", "GET", "/presets/", headers=headers)
+        preset = await call(
+            "POST /presets",
+            "POST",
+            "/presets/",
+            headers=headers,
+            json={"name": "Copy", "is_default": True, "config_data": default[0]["config_data"]},
+        )
+        await call("GET /presets/{id}", "GET", f"/presets/{preset['id']}", headers=headers)
+        await call(
+            "PATCH /presets/{id}",
+            "PATCH",
+            f"/presets/{preset['id']}",
+            headers=headers,
+            json={"name": "Renamed", "is_default": True},
+        )
+
+        story = await call(
+            "POST /stories",
+            "POST",
+            "/stories/",
+            headers=headers,
+            json={"title": "Story", "preset_id": preset["id"]},
+        )
+        story_path = f"/stories/{story['id']}"
+        await call("GET /stories", "GET", "/stories/", headers=headers)
+        await call("GET /stories/{id}", "GET", story_path, headers=headers)
+        await call(
+            "PATCH /stories/{id}", "PATCH", story_path, headers=headers, json={"title": "New"}
+        )
+        await call("GET /stories/{id}/config", "GET", f"{story_path}/config", headers=headers)
+        await call(
+            "PATCH /stories/{id}/config",
+            "PATCH",
+            f"{story_path}/config",
+            headers=headers,
+            json={"main_model_override": {"temperature": 1.0}},
+        )
+        await call(
+            "DELETE /stories/{id}/config", "DELETE", f"{story_path}/config", headers=headers
+        )
+        await call(
+            "GET /stories/{id}/effective-config",
+            "GET",
+            f"{story_path}/effective-config",
+            headers=headers,
+        )
+        await call("DELETE /stories/{id}", "DELETE", story_path, headers=headers)
+
+        token = await call(
+            "POST /tokens",
+            "POST",
+            "/tokens/",
+            headers=headers,
+            json={"provider": "openrouter", "name": "key", "token": "sk-query-counts"},
+        )
+        await call(
+            "PATCH /tokens/{id}",
+            "PATCH",
+            f"/tokens/{token['id']}",
+            headers=headers,
+            json={"is_active": False},
+        )
+        await call("DELETE /tokens/{id}", "DELETE", f"/tokens/{token['id']}", headers=headers)
+
+    await async_engine.dispose()
+    engine.dispose()
+    return counts
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # Settings (and the engines) are read on first import of the app.
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'query_counts.db')}"
+        os.environ["DATABASE_ECHO"] = "false"
+        os.environ["SQL_METRICS_HEADERS"] = "true"
+        os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
+        counts = asyncio.run(_measure())
+
+    print(f"{'endpoint':<38} {'queries':>8}")
+    for name, queries in counts.items():
+        print(f"{name:<38} {queries:>8}")
+
+
+if __name__ == "__main__":
+    main()
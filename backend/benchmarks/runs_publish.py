@@ -0,0 +1,81 @@
+"""
+Publish throughput of `app.services.runs` vs. number of concurrent runs.
+
+Every run gets one SSE subscriber and one producer publishing `stage` events,
+all on a single event loop (like one uvicorn worker).
+
+Usage (from `backend/`):
+    python -m benchmarks.runs_publish
+    python -m benchmarks.runs_publish --runs 1 10 100 500 --events 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from app.services import runs as runs_service
+
+
+async def _consume(run_id: str, expected: int, ready: asyncio.Event) -> int:
+    received = 0
+    stream = runs_service.subscribe(run_id)
+    try:
+        async for msg in stream:
+            if not ready.is_set():
+                # First message is the `hello` frame: subscription is registered.
+                ready.set()
+            if b"\nevent: stage\n" not in msg:
+                # hello / replayed run_created / pings
+                continue
+            received += 1
+            if received >= expected:
+                break
+    finally:
+        await stream.aclose()
+    return received
+
+
+async def _produce(run_id: str, events: int) -> None:
+    for i in range(events):
+        await runs_service.publish(run_id, "stage", {"stage": "building", "i": i})
+        # Yield like a real workflow does between stages.
+        await asyncio.sleep(0)
+
+
+async def _bench(runs: int, events: int) -> tuple[float, int]:
+    run_ids = [await runs_service.create_run() for _ in range(runs)]
+    readies = [asyncio.Event() for _ in run_ids]
+    consumers = [
+        asyncio.create_task(_consume(run_id, events, ready))
+        for run_id, ready in zip(run_ids, readies)
+    ]
+    await asyncio.gather(*(ready.wait() for ready in readies))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_produce(run_id, events) for run_id in run_ids))
+    elapsed = time.perf_counter() - started
+
+    delivered = sum(await asyncio.gather(*consumers))
+    return elapsed, delivered
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--events", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'runs':>6} {'published':>10} {'delivered':>10} {'seconds':>8} {'events/s':>10}")
+    for runs in args.runs:
+        elapsed, delivered = await _bench(runs, args.events)
+        published = runs * args.events
+        print(
+            f"{runs:>6} {published:>10} {delivered:>10} "
+            f"{elapsed:>8.3f} {published / elapsed:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""
+Microbenchmark: encoding one run event into an SSE frame.
+
+Compares the previous publish path (RunEvent model -> model_dump(mode="json")
+-> json.dumps -> splitlines framing -> str) with `run_bus.base.encode_event`
+(single `pydantic_core.to_json` pass straight to bytes).
+
+Usage (from `backend/`):
+    python -m benchmarks.sse_encode
+    python -m benchmarks.sse_encode --number 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import timeit
+from datetime import datetime, timezone
+
+from app.schemas.run import RunEvent
+from app.services.run_bus.base import encode_event
+
+
+def _legacy_format_sse(*, event: str, data: str, event_id: int | None = None) -> str:
+    parts: list[str] = []
+    if event_id is not None:
+        parts.append(f"id: {event_id}")
+    parts.append(f"event: {event}")
+    for line in data.splitlines() or [""]:
+        parts.append(f"data: {line}")
+    parts.append("")
+    return "\n".join(parts) + "\n"
+
+
+def _legacy_encode(run_id: str, seq: int, event_type: str, ts: datetime, payload: object) -> str:
+    envelope = RunEvent(run_id=run_id, seq=seq, type=event_type, ts=ts, payload=payload)
+    return _legacy_format_sse(
+        event=event_type,
+        event_id=envelope.seq,
+        data=json.dumps(envelope.model_dump(mode="json"), ensure_ascii=False),
+    )
+
+
+_PAYLOADS: dict[str, object] = {
+    "stage": {"stage": "analyzing"},
+    "world_skeleton": {
+        "game_prompt": "Мир вечной осени, где города дрейфуют по небу. " * 40,
+        "world_bible": "Летающие острова удерживаются кристаллами эфира.\n" * 400,
+        "global_conflict": "Запасы эфира истощаются, и острова начинают падать. " * 20,
+    },
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=5000)
+    args = parser.parse_args()
+
+    run_id = "0" * 32
+    ts = datetime.now(timezone.utc)
+    print(f"{'event':>16} {'legacy us':>10} {'encoder us':>11} {'speedup':>8}")
+    for event_type, payload in _PAYLOADS.items():
+        legacy = timeit.timeit(
+            lambda: _legacy_encode(run_id, 7, event_type, ts, payload), number=args.number
+        )
+        encoder = timeit.timeit(
+            lambda: encode_event(
+                run_id=run_id, seq=7, event_type=event_type, ts=ts, payload=payload
+            ),
+            number=args.number,
+        )
+        print(
+            f"{event_type:>16} {legacy / args.number * 1e6:>10.1f} "
+            f"{encoder / args.number * 1e6:>11.1f} {legacy / encoder:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
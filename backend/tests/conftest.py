@@ -0,0 +1,50 @@
+"""
+Shared fixtures: the app on a fresh SQLite database, driven in-process.
+
+Requests go through `httpx.ASGITransport`, which runs the app in the test's
+own task, so SQL statements of a request count into an enclosing
+`sql_metrics.track()` / `query_budget()` scope.
+"""
+
+import os
+import tempfile
+import uuid
+from collections.abc import AsyncIterator, Iterator
+
+import pytest
+from cryptography.fernet import Fernet
+
+# Settings (and the engines) are read on first import of the app.
+_tmpdir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir.name, 'test.db')}"
+os.environ["DATABASE_ECHO"] = "false"
+os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
+
+import httpx  # noqa: E402
+
+from app.core.database import async_engine, engine, init_db  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database() -> Iterator[None]:
+    init_db()
+    yield
+    engine.dispose()
+    _tmpdir.cleanup()
+
+
+@pytest.fixture
+async def client() -> AsyncIterator[httpx.AsyncClient]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    # Pooled aiosqlite connections belong to this test's event loop
+    await async_engine.dispose()
+
+
+@pytest.fixture
+async def user_headers(client: httpx.AsyncClient) -> dict[str, str]:
+    response = await client.post("/api/v1/users/", json={"name": f"user-{uuid.uuid4().hex[:8]}"})
+    response.raise_for_status()
+    return {"X-User-ID": response.json()["id"]}
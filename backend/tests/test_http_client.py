@@ -0,0 +1,48 @@
+"""
+Eviction of pooled clients in `HttpClientRegistry` (no requests are sent).
+"""
+
+import asyncio
+
+import pytest
+
+from app.core import http_client
+from app.core.http_client import HttpClientRegistry
+
+
+async def test_get_requires_an_open_registry() -> None:
+    registry = HttpClientRegistry(max_origins=1)
+    with pytest.raises(RuntimeError):
+        registry.get("https://a.example/v1")
+
+
+async def test_evicted_client_is_closed_only_once_idle(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(http_client, "_EVICTED_CLOSE_DELAY_SECONDS", 0.01)
+    registry = HttpClientRegistry(max_origins=1)
+    registry.open()
+
+    busy = registry.get("https://a.example/v1")
+    busy_transport = registry._clients["https://a.example"][1]
+    busy_transport.in_flight = 1
+    # A request is in flight on the only client: it is kept, above the cap
+    registry.get("https://b.example/v1")
+    assert [s["origin"] for s in registry.stats()] == ["https://a.example", "https://b.example"]
+
+    # Idle again: the next new origin evicts both, yet a caller that got the
+    # client just before can still send its request on it
+    busy_transport.in_flight = 0
+    registry.get("https://b.example/v1")
+    registry.get("https://c.example/v1")
+    assert [s["origin"] for s in registry.stats()] == ["https://c.example"]
+    assert not busy.is_closed
+    busy_transport.in_flight = 1
+    await asyncio.sleep(0.05)
+    assert not busy.is_closed
+
+    busy_transport.in_flight = 0
+    await asyncio.sleep(0.05)
+    assert busy.is_closed
+
+    await registry.aclose()
@@ -0,0 +1,136 @@
+"""
+SQL statements per request of the CRUD endpoints, enforced with query budgets.
+
+Each request runs inside `sql_metrics.query_budget(n)`: one statement more
+fails it with `QueryBudgetExceeded`, so a lazy load, a refresh after commit
+or a read before a write shows up here instead of as a slower endpoint.
+Updates and deletes are single statements (UPDATE ... RETURNING, DELETE
+checking the rowcount), so those budgets are exact.
+"""
+
+import uuid
+from typing import Any
+
+import httpx
+import pytest
+
+from app.core import sql_metrics
+
+
+async def _call(
+    client: httpx.AsyncClient,
+    budget: int,
+    method: str,
+    path: str,
+    *,
+    exact: bool = False,
+    **kwargs: Any,
+) -> Any:
+    """Request `path` within `budget` statements (exactly `budget` if `exact`)."""
+    with sql_metrics.query_budget(budget) as stats:
+        response = await client.request(method, f"/api/v1{path}", **kwargs)
+    response.raise_for_status()
+    if exact:
+        assert stats.statements == budget, f"{method} {path}: {stats.statements} statements"
+    return response.json() if response.content else None
+
+
+async def _create_preset(client: httpx.AsyncClient, headers: dict[str, str]) -> dict[str, Any]:
+    presets = await _call(client, 1, "GET", "/presets/", headers=headers)
+    return await _call(
+        client,
+        2,
+        "POST",
+        "/presets/",
+        headers=headers,
+        json={"name": "Copy", "config_data": presets[0]["config_data"]},
+    )
+
+
+async def test_user_endpoints(client: httpx.AsyncClient) -> None:
+    name = f"budget-{uuid.uuid4().hex[:8]}"
+    user = await _call(client, 4, "POST", "/users/", json={"name": name})
+    await _call(client, 1, "GET", f"/users/{user['id']}")
+    await _call(client, 1, "PATCH", f"/users/{user['id']}/password", exact=True, json={})
+    # One DELETE per table: story configs, stories, presets, tokens, then the user
+    await _call(client, 5, "DELETE", f"/users/{user['id']}", exact=True)
+
+
+async def test_preset_endpoints(
+    client: httpx.AsyncClient, user_headers: dict[str, str]
+) -> None:
+    preset = await _create_preset(client, user_headers)
+    path = f"/presets/{preset['id']}"
+    await _call(client, 1, "GET", path, headers=user_headers)
+    await _call(
+        client, 1, "PATCH", path, exact=True, headers=user_headers, json={"name": "Renamed"}
+    )
+    # Making it the default also clears the flag on the user's other presets
+    await _call(
+        client, 2, "PATCH", path, exact=True, headers=user_headers, json={"is_default": True}
+    )
+    await _call(client, 1, "DELETE", path, exact=True, headers=user_headers)
+
+
+async def test_story_endpoints(
+    client: httpx.AsyncClient, user_headers: dict[str, str]
+) -> None:
+    preset = await _create_preset(client, user_headers)
+    story = await _call(
+        client,
+        2,
+        "POST",
+        "/stories/",
+        headers=user_headers,
+        json={"title": "Story", "preset_id": preset["id"]},
+    )
+    path = f"/stories/{story['id']}"
+    await _call(client, 1, "GET", "/stories/", headers=user_headers)
+    await _call(client, 1, "GET", path, headers=user_headers)
+    await _call(client, 1, "GET", f"{path}/config", headers=user_headers)
+    await _call(client, 1, "GET", f"{path}/effective-config", headers=user_headers)
+
+    await _call(
+        client, 1, "PATCH", path, exact=True, headers=user_headers, json={"title": "New"}
+    )
+    await _call(
+        client,
+        1,
+        "PATCH",
+        f"{path}/config",
+        exact=True,
+        headers=user_headers,
+        json={"main_model_override": {"temperature": 1.0}},
+    )
+    await _call(client, 1, "DELETE", f"{path}/config", exact=True, headers=user_headers)
+    # A preset in use is kept
+    response = await client.delete(f"/api/v1/presets/{preset['id']}", headers=user_headers)
+    assert response.status_code == 409
+    # One DELETE per table: the story's config row, then the story
+    await _call(client, 2, "DELETE", path, exact=True, headers=user_headers)
+
+
+async def test_token_endpoints(
+    client: httpx.AsyncClient, user_headers: dict[str, str]
+) -> None:
+    token = await _call(
+        client,
+        1,
+        "POST",
+        "/tokens/",
+        exact=True,
+        headers=user_headers,
+        json={"provider": "openrouter", "name": "key", "token": "sk-budget"},
+    )
+    path = f"/tokens/{token['id']}"
+    await _call(
+        client, 1, "PATCH", path, exact=True, headers=user_headers, json={"is_active": False}
+    )
+    await _call(client, 1, "DELETE", path, exact=True, headers=user_headers)
+
+
+async def test_budget_exceeded_fails_the_request(
+    client: httpx.AsyncClient, user_headers: dict[str, str]
+) -> None:
+    with pytest.raises(sql_metrics.QueryBudgetExceeded):
+        await _call(client, 0, "GET", "/presets/", headers=user_headers)
@@ -0,0 +1,67 @@
+"""Admission and isolation of supervised background tasks."""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app.core import sql_metrics
+from app.core.database import async_engine, async_session
+from app.services.task_supervisor import TaskSupervisor
+
+
+async def _select_one() -> None:
+    async with async_session() as session:
+        await session.execute(text("SELECT 1"))
+
+
+async def test_background_statements_are_not_counted_into_the_request() -> None:
+    supervisor = TaskSupervisor(
+        max_running=1, max_queued=1, per_user_max_running=1, per_user_max_active=1
+    )
+    done = asyncio.Event()
+
+    async def workflow() -> None:
+        for _ in range(3):
+            await _select_one()
+        done.set()
+
+    # A strict budget of one statement: the request's own query fits, the
+    # workflow's must neither count nor fail against it.
+    with sql_metrics.query_budget(1) as stats:
+        await _select_one()
+        supervisor.spawn("run", workflow, user_id=None)
+        await asyncio.wait_for(done.wait(), timeout=5)
+
+    assert stats.statements == 1
+    assert not stats.exceeded
+    await async_engine.dispose()
+
+
+async def test_reservation_holds_the_slot_until_spawned() -> None:
+    supervisor = TaskSupervisor(
+        max_running=1, max_queued=2, per_user_max_running=1, per_user_max_active=1
+    )
+    done = asyncio.Event()
+
+    async def workflow() -> None:
+        done.set()
+
+    # Two requests admitted before either spawns: the second one is refused
+    supervisor.reserve("u")
+    with pytest.raises(HTTPException) as exc_info:
+        supervisor.reserve("u")
+    assert exc_info.value.status_code == 429
+    assert supervisor.queued == 1
+
+    supervisor.spawn("run", workflow, user_id="u", reserved=True)
+    with pytest.raises(HTTPException):
+        supervisor.reserve("u")
+    await asyncio.wait_for(done.wait(), timeout=5)
+    await asyncio.sleep(0)
+
+    # A reservation given back (e.g. the run could not be created) frees the slot
+    supervisor.reserve("u")
+    supervisor.unreserve("u")
+    supervisor.reserve("u")
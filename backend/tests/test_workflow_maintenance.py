@@ -0,0 +1,39 @@
+"""
+Checkpoint maintenance loop of the world architect workflow.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services import checkpoints as checkpoints_service
+from app.services import world_architect
+
+
+async def test_finished_checkpoints_are_purged_with_resuming_disabled(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    purged = asyncio.Event()
+
+    def delete_finished(session: object, *, older_than_seconds: float) -> int:
+        purged.set()
+        return 0
+
+    async def unexpected() -> None:
+        raise AssertionError("leases are not maintained with resuming disabled")
+
+    monkeypatch.setattr(settings, "WORKFLOW_RESUME_ENABLED", False)
+    monkeypatch.setattr(checkpoints_service, "delete_finished", delete_finished)
+    monkeypatch.setattr(world_architect, "renew_leases", unexpected)
+    monkeypatch.setattr(world_architect, "resume_pending_runs", unexpected)
+
+    await world_architect.start()
+    try:
+        await asyncio.wait_for(purged.wait(), timeout=5)
+    finally:
+        task = world_architect._maintenance_task
+        assert task is not None
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        world_architect._maintenance_task = None
@@ -0,0 +1,29 @@
+"""
+Repair requests made by `_parse_and_validate_llm_json` (the LLM is stubbed).
+"""
+
+import pytest
+
+from app.services import world_architect
+
+
+async def test_unrepairable_output_costs_at_most_attempt_repair_calls(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    prompts: list[str] = []
+
+    async def fake_chat(*, user: str, **kwargs: object) -> str:
+        prompts.append(user)
+        return "still not json"
+
+    monkeypatch.setattr(world_architect, "_call_openrouter_chat", fake_chat)
+
+    with pytest.raises(RuntimeError, match="JSON parse error"):
+        await world_architect._parse_and_validate_llm_json("not json", attempt_repair=2)
+    # Every answer is parsed: no repair request after the last attempt
+    assert len(prompts) == 2
+
+    prompts.clear()
+    with pytest.raises(RuntimeError):
+        await world_architect._parse_and_validate_llm_json("not json", attempt_repair=0)
+    assert prompts == []